@@ -4,8 +4,10 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_login import LoginManager
 import os
+from app.replica import RoutingSession
 
-db = SQLAlchemy()
+# La sesión envía a la réplica de lectura los SELECT de las vistas marcadas con read_replica
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 login = LoginManager()
 login.login_view = 'auth.login'
@@ -26,6 +28,30 @@ def create_app(config_class=Config):
     migrate.init_app(app, db)
     login.init_app(app)
 
+    from app.replica import read_replica_state
+    read_replica_state.init_app(app)
+
+    from app.cache import student_cache, door_cache, user_cache
+    student_cache.init_app(app)
+    door_cache.init_app(app)
+    user_cache.init_app(app)
+
+    from app.exit_writer import exit_writer
+    exit_writer.init_app(app)
+
+    from app.live_feed import live_feed
+    live_feed.init_app(app)
+
+    from app.jobs import job_runner
+    job_runner.init_app(app)
+
+    # Antes que los límites, para que el tiempo medido incluya la espera en cola
+    from app.metrics import request_metrics
+    request_metrics.init_app(app)
+
+    from app.limits import request_limiter
+    request_limiter.init_app(app)
+
     # Registrar Blueprints
     from app.routes.auth import bp as auth_bp
     app.register_blueprint(auth_bp, url_prefix='/auth')
@@ -39,6 +65,18 @@ def create_app(config_class=Config):
     from app.routes.scanner import bp as scanner_bp
     app.register_blueprint(scanner_bp)
 
+    from app.routes.api import bp as api_bp
+    app.register_blueprint(api_bp, url_prefix='/api')
+
+    from app.routes.stream import bp as stream_bp
+    app.register_blueprint(stream_bp, url_prefix='/stream')
+
+    from app.routes.jobs import bp as jobs_bp
+    app.register_blueprint(jobs_bp, url_prefix='/jobs')
+
+    from app.routes.metrics import bp as metrics_bp
+    app.register_blueprint(metrics_bp)
+
     from app import commands
     commands.register_commands(app)
 
@@ -48,4 +86,4 @@ def create_app(config_class=Config):
 
     return app
 
-from app.models import user, student, door, exit_log
\ No newline at end of file
+from app.models import user, student, door, exit_log, cache_version, exit_stats
\ No newline at end of file
@@ -0,0 +1,232 @@
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy.orm import make_transient_to_detached
+from app import db
+from app.models.cache_version import current_version, bump_version, bump_version_on
+from app.replica import on_primary
+
+
+class VersionedCache:
+    """
+    Caché LRU en memoria del proceso, invalidada mediante un contador de versión
+    guardado en la base de datos (tabla cache_version).
+
+    - Dentro del mismo proceso, invalidate() descarta la copia de inmediato.
+    - Los demás procesos (workers de gunicorn) comparan la versión como máximo
+      cada CACHE_VERSION_CHECK_SECONDS y se vacían si cambió.
+    - La versión y los datos se leen siempre de la base principal: una réplica
+      atrasada dejaría en la caché datos viejos bajo una versión nueva.
+    """
+    name = None
+
+    def __init__(self, maxsize=1024, check_interval=5):
+        self.maxsize = maxsize
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._version = None
+        self._checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def init_app(self, app):
+        self.check_interval = app.config.get('CACHE_VERSION_CHECK_SECONDS', self.check_interval)
+        self.clear()
+        self.hits = self.misses = self.invalidations = 0
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+            self._checked_at = 0.0
+
+    def invalidate(self):
+        """
+        Incrementa la versión en la transacción actual, vacía la copia local y
+        devuelve la nueva versión. Debe llamarse antes del db.session.commit()
+        de la escritura.
+        """
+        version = bump_version(self.name)
+        self.clear()
+        self.invalidations += 1
+        return version
+
+    def _check_version(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        with on_primary():
+            version = current_version(self.name)
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            self._checked_at = now
+
+    def _get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def _put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    @property
+    def version(self):
+        """Versión de la base de datos con la que se llenó la copia local."""
+        return self._version
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'version': self._version,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / total, 4) if total else 0.0,
+            'invalidations': self.invalidations,
+        }
+
+
+def student_entry(student):
+    """Diccionario reducido con lo que el escáner necesita de un estudiante."""
+    return {
+        'id': student.id,
+        'name': student.name,
+        'course': student.course,
+        'photo_url': f"/static/uploads/photos/{student.photo}" if student.photo else "/static/img/avatar.png",
+        'authorized': student.authorized_to_leave,
+        'qr_code_data': student.qr_code_data,
+        'card_version': student.card_version,
+    }
+
+
+class StudentCache(VersionedCache):
+    """Caché de estudiantes consultable por qr_code_data y por ID."""
+    name = 'students'
+
+    def init_app(self, app):
+        self.maxsize = app.config.get('STUDENT_CACHE_SIZE', self.maxsize)
+        super().init_app(app)
+
+    def get_by_qr(self, qr_code_data):
+        from app.models.student import Student
+        self._check_version()
+        found, entry = self._get(('qr', qr_code_data))
+        if found:
+            return entry
+        with on_primary():
+            student = Student.query.filter_by(qr_code_data=qr_code_data).first()
+        return self._store(student)
+
+    def get_by_id(self, student_id):
+        from app.models.student import Student
+        self._check_version()
+        found, entry = self._get(('id', student_id))
+        if found:
+            return entry
+        with on_primary():
+            student = db.session.get(Student, student_id) if student_id else None
+        return self._store(student)
+
+    def _store(self, student):
+        # Los QR desconocidos no se cachean: no deben ocupar espacio ni ocultar altas nuevas.
+        if student is None:
+            return None
+        entry = student_entry(student)
+        self._put(('qr', entry['qr_code_data']), entry)
+        self._put(('id', entry['id']), entry)
+        return entry
+
+
+class DoorCache(VersionedCache):
+    """
+    Registro de puertas (id -> nombre y estado) y lista de puertas abiertas.
+    Las puertas cambian pocas veces al día, así que se guardan todas en una sola entrada.
+    """
+    name = 'doors'
+
+    def _doors(self):
+        from app.models.door import Door
+        self._check_version()
+        found, doors = self._get('all')
+        if found:
+            return doors
+        with on_primary():
+            doors = {
+                door.id: {'id': door.id, 'name': door.name, 'status': door.status}
+                for door in Door.query.order_by(Door.id).all()
+            }
+        self._put('all', doors)
+        return doors
+
+    def get(self, door_id):
+        try:
+            door_id = int(door_id)
+        except (TypeError, ValueError):
+            return None
+        return self._doors().get(door_id)
+
+    def all_doors(self):
+        return list(self._doors().values())
+
+    def open_doors(self):
+        from app.models.door import DoorStatus
+        return [door for door in self._doors().values() if door['status'] == DoorStatus.OPEN]
+
+
+class UserCache(VersionedCache):
+    """
+    Usuarios para flask-login: evita un SELECT de user en cada petición autenticada.
+    Además de la invalidación por versión, cada entrada caduca a los USER_CACHE_TTL_SECONDS.
+    """
+    name = 'users'
+
+    def __init__(self, maxsize=256, check_interval=5, ttl=60):
+        super().__init__(maxsize=maxsize, check_interval=check_interval)
+        self.ttl = ttl
+
+    def init_app(self, app):
+        self.ttl = app.config.get('USER_CACHE_TTL_SECONDS', self.ttl)
+        super().init_app(app)
+
+    def get(self, user_id):
+        from app.models.user import User
+        self._check_version()
+        found, cached = self._get(user_id)
+        if found and cached[0] > time.monotonic():
+            entry = cached[1]
+        else:
+            with on_primary():
+                user = db.session.get(User, user_id)
+            if user is None:
+                return None
+            entry = {'id': user.id, 'username': user.username, 'email': user.email, 'role': user.role}
+            self._put(user_id, (time.monotonic() + self.ttl, entry))
+        # Instancia desprendida de la sesión: si algún código la añade a una sesión
+        # se trata como fila existente (no se intenta un INSERT).
+        user = User(**entry)
+        make_transient_to_detached(user)
+        return user
+
+    def invalidate_on(self, connection):
+        """Invalida desde un evento de flush de User (cambio de rol, contraseña, borrado)."""
+        bump_version_on(connection, self.name)
+        self.clear()
+        self.invalidations += 1
+
+
+student_cache = StudentCache(maxsize=5000)
+user_cache = UserCache()
+door_cache = DoorCache(maxsize=1)
@@ -1,3 +1,4 @@
+import time
 import click
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
@@ -7,6 +8,9 @@ from app import db
 from app.models.user import User, UserRole
 from app.models.student import Student
 from app.models.door import Door
+from app.models.exit_stats import rebuild_exit_stats
+from app.jobs import job_runner
+from app.seed import seed_database, OPERATOR_PREFIX
 
 # Creamos un grupo de comandos para organizarnos mejor
 @click.group()
@@ -58,6 +62,86 @@ def create_admin():
 
     click.secho(f"¡Usuario administrador '{username}' creado exitosamente!", fg="green")
 
+@admin.command("reset-password")
+@click.argument("username")
+@with_appcontext
+def reset_password(username):
+    """Cambia la contraseña de un usuario de forma interactiva."""
+    user = User.query.filter_by(username=username).first()
+    if not user:
+        click.secho(f"No existe el usuario '{username}'.", fg="red")
+        return
+
+    password = click.prompt(
+        click.style("Nueva contraseña", fg="cyan"),
+        hide_input=True,
+        confirmation_prompt=click.style("Repetir contraseña", fg="cyan")
+    )
+    user.set_password(password)
+    db.session.commit()
+    click.secho(f"Contraseña de '{username}' actualizada.", fg="green")
+
+@admin.command("set-role")
+@click.argument("username")
+@click.argument("role", type=click.Choice([role.name for role in UserRole], case_sensitive=False))
+@with_appcontext
+def set_role(username, role):
+    """Cambia el rol de un usuario (ADMIN u OPERATOR)."""
+    user = User.query.filter_by(username=username).first()
+    if not user:
+        click.secho(f"No existe el usuario '{username}'.", fg="red")
+        return
+
+    user.role = UserRole[role.upper()]
+    db.session.commit()
+    click.secho(f"Rol de '{username}' cambiado a {user.role.value}.", fg="green")
+
+@admin.command("rebuild-stats")
+@with_appcontext
+def rebuild_stats():
+    """Reconstruye la tabla exit_stats del dashboard a partir del historial de salidas."""
+    try:
+        total = rebuild_exit_stats()
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        click.secho(f"Error al reconstruir las estadísticas: {e}", fg="red")
+        return
+    click.secho(f"Estadísticas reconstruidas a partir de {total} salidas.", fg="green")
+
+@admin.command("clean-jobs")
+@with_appcontext
+def clean_jobs():
+    """Borra los resultados de trabajos en segundo plano más viejos que JOB_TTL_SECONDS."""
+    removed = job_runner.cleanup_expired()
+    click.secho(f"Se borraron {removed} archivos de trabajos vencidos.", fg="green")
+
+@admin.command("seed")
+@click.option("--students", default=1000, show_default=True, help="Estudiantes a crear.")
+@click.option("--exits", default=100000, show_default=True, help="Salidas a crear.")
+@click.option("--doors", default=4, show_default=True, help="Puertas a crear.")
+@click.option("--operators", default=5, show_default=True, help="Operadores a crear.")
+@click.option("--days", default=180, show_default=True, help="Días hábiles sobre los que se reparten las salidas.")
+@click.option("--seed", default=42, show_default=True, help="Semilla: los mismos parámetros generan los mismos datos.")
+@click.option("--end-date", type=click.DateTime(formats=["%Y-%m-%d"]), default=None,
+              help="Último día con salidas (AAAA-MM-DD, por defecto hoy).")
+@click.option("--batch-size", default=10000, show_default=True, help="Filas por INSERT.")
+@with_appcontext
+def seed(students, exits, doors, operators, days, seed, end_date, batch_size):
+    """Genera datos sintéticos (estudiantes, puertas, operadores y salidas) para pruebas de carga."""
+    started = time.monotonic()
+    try:
+        result = seed_database(students=students, exits=exits, doors=doors, operators=operators, days=days,
+                               seed=seed, end_date=end_date.date() if end_date else None,
+                               batch_size=batch_size, progress=click.echo)
+    except ValueError as e:
+        db.session.rollback()
+        click.secho(str(e), fg="red")
+        return
+    click.secho(f"Se generaron {result['students']} estudiantes y {result['exits']} salidas en "
+                f"{result['days']} días ({time.monotonic() - started:.1f} s). "
+                f"Contraseña de los operadores: {OPERATOR_PREFIX}", fg="green")
+
 @admin.command("migrate-sqlite-to-mysql")
 @with_appcontext
 def migrate_data():
@@ -0,0 +1,109 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import func, select
+from app import db
+from app.cache import door_cache
+from app.models.cache_version import current_version
+from app.models.exit_log import ExitLog, colombia_tz
+from app.models.exit_stats import ExitStats
+from app.models.student import Student
+
+# Máximo de salidas por respuesta de /api/exits; el cliente pide el resto con since_id
+EXIT_FEED_LIMIT = 500
+# Los ids se asignan al insertar pero se ven al confirmar: una salida con id menor
+# puede confirmarse después de una mayor (peticiones simultáneas, escritura agrupada).
+# Por eso el feed vuelve a leer los últimos EXIT_FEED_OVERLAP ids ya vistos y quien
+# lo consume descarta los repetidos por id. Debe ser menor que EXIT_FEED_LIMIT.
+EXIT_FEED_OVERLAP = 100
+
+
+def dashboard_etag(today):
+    """
+    Identifica el estado del dashboard sin calcularlo: cambia con cada nueva
+    salida (último id), con el día, con el roster y con el registro de puertas.
+    """
+    door_cache.all_doors()  # asegura que door_cache.version esté al día
+    last_id = db.session.execute(select(func.max(ExitLog.id))).scalar() or 0
+    return f"dashboard-{today.isoformat()}-{last_id}-{current_version('students')}-{door_cache.version}"
+
+
+def today_counts(today):
+    """
+    Salidas del día por puerta y por curso con una sola consulta al rollup.
+    Devuelve ([(door_id, nombre, conteo)], {curso: conteo}).
+    """
+    exits_by_door_count = defaultdict(int)
+    exits_by_course_count = defaultdict(int)
+    for door_id, course, count in db.session.query(
+            ExitStats.door_id, ExitStats.course, func.sum(ExitStats.count)
+    ).filter(ExitStats.local_date == today).group_by(ExitStats.door_id, ExitStats.course):
+        exits_by_door_count[door_id] += count
+        exits_by_course_count[course] += count
+
+    # Conteo por ID de puerta; los nombres salen del registro de puertas en caché
+    door_names = {door['id']: door['name'] for door in door_cache.all_doors()}
+    exits_by_door_today = [
+        (door_id, door_names.get(door_id, f'Puerta {door_id}'), count)
+        for door_id, count in sorted(exits_by_door_count.items())
+    ]
+    return exits_by_door_today, dict(exits_by_course_count)
+
+
+def dashboard_summary(today):
+    """Contadores y series de las gráficas, leídos del rollup exit_stats."""
+    total_students = db.session.query(func.count(Student.id)).scalar()
+    exits_by_door_today, exits_by_course_count = today_counts(today)
+
+    # Histograma de 7 días agrupado por la fecha local ya guardada en el rollup
+    seven_days_ago = today - timedelta(days=6)
+    daily_exits_dict = dict(db.session.query(ExitStats.local_date, func.sum(ExitStats.count)).filter(
+        ExitStats.local_date >= seven_days_ago
+    ).group_by(ExitStats.local_date).all())
+    days = [seven_days_ago + timedelta(days=i) for i in range(7)]
+    courses = sorted(exits_by_course_count)
+
+    return {
+        'total_students': total_students,
+        'total_exits_today': sum(count for door_id, door_name, count in exits_by_door_today),
+        'exits_by_door_today': exits_by_door_today,
+        'chart_data': {
+            'days': {'labels': [day.strftime("%Y-%m-%d") for day in days],
+                     'data': [daily_exits_dict.get(day, 0) for day in days]},
+            'courses': {'labels': courses, 'data': [exits_by_course_count[course] for course in courses]},
+            'doors': {'labels': [door_name for door_id, door_name, count in exits_by_door_today],
+                      'data': [count for door_id, door_name, count in exits_by_door_today]}
+        }
+    }
+
+
+def exit_feed(since_id=0, local_date=None, limit=EXIT_FEED_LIMIT):
+    """
+    Salidas con id mayor que since_id (solo las de local_date, si se indica),
+    en orden de id, en el formato simple que usa el modal del dashboard.
+    """
+    stmt = (
+        select(ExitLog.id, ExitLog.timestamp, ExitLog.local_date, ExitLog.door_id,
+               Student.name, Student.course, Student.photo)
+        .join(Student, ExitLog.student_id == Student.id)
+        .where(ExitLog.id > since_id)
+        .order_by(ExitLog.id)
+        .limit(limit)
+    )
+    if local_date is not None:
+        stmt = stmt.where(ExitLog.local_date == local_date)
+    return [
+        {
+            "id": log_id,
+            "date": exit_date.isoformat(),
+            "student_name": name,
+            "student_course": course,
+            "student_photo_url": f"/static/uploads/photos/{photo}" if photo else "/static/img/avatar.png",
+            "door_id": door_id,
+            # El timestamp guardado ya es la hora de Colombia
+            "timestamp": timestamp.strftime('%I:%M %p')
+        } for log_id, timestamp, exit_date, door_id, name, course, photo in db.session.execute(stmt)
+    ]
+
+
+def colombia_today():
+    return datetime.now(colombia_tz).date()
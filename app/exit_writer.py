@@ -0,0 +1,188 @@
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from sqlalchemy.exc import OperationalError
+from app import db
+from app.models.exit_log import ExitLog, colombia_tz
+from app.models.exit_stats import add_exit_stats
+
+
+class _PendingExit:
+    """Salida en espera de ser confirmada por el hilo de escritura."""
+    __slots__ = ('student', 'door_id', 'operator_id', 'timestamp', 'done', 'log_id', 'error')
+
+    def __init__(self, student, door_id, operator_id):
+        self.student = student
+        self.door_id = door_id
+        self.operator_id = operator_id
+        self.timestamp = datetime.now(colombia_tz)
+        self.done = threading.Event()
+        self.log_id = None
+        self.error = None
+
+
+class ExitLogWriter:
+    """
+    Escritura agrupada (group commit) de salidas para las horas pico.
+
+    Con EXIT_LOG_WRITE_BEHIND activo, log_exit encola la salida y un hilo por
+    proceso la confirma junto con las demás que llegaron en los últimos
+    EXIT_LOG_FLUSH_INTERVAL_MS, o en cuanto se juntan EXIT_LOG_BATCH_MAX_ROWS:
+    un solo commit (un solo fsync) por lote en lugar de uno por estudiante.
+    El cooldown se sigue decidiendo con claim_exit dentro de la transacción del
+    lote, y la petición HTTP solo responde cuando su lote ya es durable.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._queue = queue.Queue()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.reset_metrics()
+
+    def init_app(self, app):
+        self.app = app
+        self.batch_max_rows = app.config.get('EXIT_LOG_BATCH_MAX_ROWS', 50)
+        self.flush_interval = app.config.get('EXIT_LOG_FLUSH_INTERVAL_MS', 20) / 1000
+        self.wait_timeout = app.config.get('EXIT_LOG_WRITE_TIMEOUT_SECONDS', 10)
+        self.reset_metrics()
+
+    @property
+    def enabled(self):
+        return bool(self.app and self.app.config.get('EXIT_LOG_WRITE_BEHIND'))
+
+    def reset_metrics(self):
+        self.batches = 0
+        self.rows = 0
+        self.max_batch_size = 0
+        self.flush_seconds_total = 0.0
+        self.max_flush_seconds = 0.0
+        self.max_queue_depth = 0
+
+    def submit(self, student, door_id, operator_id):
+        """
+        Encola la salida y espera a que su lote se confirme.
+        Devuelve (id del ExitLog, None) o (None, mensaje de error de cooldown).
+        """
+        self._ensure_thread()
+        pending = _PendingExit(student, door_id, operator_id)
+        self._queue.put(pending)
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+        if not pending.done.wait(self.wait_timeout):
+            raise TimeoutError('La escritura agrupada de salidas no respondió a tiempo.')
+        if isinstance(pending.error, Exception):
+            raise pending.error
+        return pending.log_id, pending.error
+
+    def _ensure_thread(self):
+        # Un hilo por proceso: tras un fork (workers de gunicorn) se crea uno nuevo.
+        # Si el hilo murió en este mismo proceso se conserva la cola: lo ya encolado
+        # sigue esperando su lote.
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._pid = os.getpid()
+                self._thread = None
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='exit-log-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        work_queue = self._queue
+        while True:
+            batch = [work_queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_max_rows:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(work_queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._flush(batch)
+            except Exception:
+                # El lote ya recibió el error; el hilo sigue atendiendo la cola
+                self.app.logger.exception('Error confirmando un lote de salidas')
+
+    def _flush(self, batch):
+        from app.exits import claim_exit, cooldown_message, REGISTER_EXIT_ATTEMPTS
+
+        started = time.monotonic()
+        try:
+            with self.app.app_context():
+                for attempt in range(REGISTER_EXIT_ATTEMPTS):
+                    try:
+                        written = []
+                        for pending in batch:
+                            pending.error = None
+                            if not claim_exit(pending.student['id'], pending.timestamp):
+                                pending.error = cooldown_message(pending.student)
+                                continue
+                            new_log = ExitLog(
+                                timestamp=pending.timestamp,
+                                student_id=pending.student['id'],
+                                door_id=pending.door_id,
+                                operator_id=pending.operator_id
+                            )
+                            db.session.add(new_log)
+                            written.append((pending, new_log))
+                        add_exit_stats(
+                            (pending.timestamp, pending.door_id, pending.student['course'])
+                            for pending, new_log in written
+                        )
+                        # Los ids se leen antes del commit: después, cada objeto
+                        # expirado costaría otro SELECT con el lote aún esperando
+                        db.session.flush()
+                        log_ids = [new_log.id for pending, new_log in written]
+                        db.session.commit()
+                        for (pending, new_log), log_id in zip(written, log_ids):
+                            pending.log_id = log_id
+                        break
+                    except OperationalError as error:
+                        db.session.rollback()
+                        if attempt == REGISTER_EXIT_ATTEMPTS - 1:
+                            for pending in batch:
+                                pending.error = error
+                    except Exception as error:
+                        db.session.rollback()
+                        for pending in batch:
+                            pending.error = error
+                        break
+                db.session.remove()
+        except Exception as error:
+            # Fallo fuera de la transacción (contexto, cierre de la sesión): las
+            # salidas que no quedaron confirmadas reciben el error
+            for pending in batch:
+                if pending.log_id is None and pending.error is None:
+                    pending.error = error
+            raise
+        finally:
+            elapsed = time.monotonic() - started
+            self.batches += 1
+            self.rows += len(batch)
+            self.max_batch_size = max(self.max_batch_size, len(batch))
+            self.flush_seconds_total += elapsed
+            self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+            for pending in batch:
+                pending.done.set()
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'queue_depth': self._queue.qsize(),
+            'max_queue_depth': self.max_queue_depth,
+            'batches': self.batches,
+            'rows': self.rows,
+            'avg_batch_size': round(self.rows / self.batches, 2) if self.batches else 0.0,
+            'max_batch_size': self.max_batch_size,
+            'avg_flush_ms': round(self.flush_seconds_total / self.batches * 1000, 2) if self.batches else 0.0,
+            'max_flush_ms': round(self.max_flush_seconds * 1000, 2),
+        }
+
+
+exit_writer = ExitLogWriter()
@@ -0,0 +1,161 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import insert, update, select, bindparam
+from sqlalchemy.exc import IntegrityError, OperationalError
+from app import db
+from app.models.exit_log import ExitLog, StudentLastExit, colombia_tz
+from app.models.exit_stats import add_exit_stats
+from app.models.student import Student
+
+# Reintentos ante bloqueos mutuos (deadlock de InnoDB, "database is locked" de SQLite)
+REGISTER_EXIT_ATTEMPTS = 3
+
+
+def cooldown_message(student):
+    cooldown_minutes = current_app.config.get('EXIT_LOG_COOLDOWN_MINUTES', 5)
+    return f"Salida ya registrada para {student['name']} hace menos de {cooldown_minutes} minutos."
+
+
+def claim_exit(student_id, now):
+    """
+    Reserva de forma atómica la salida del estudiante en student_last_exit.
+
+    En lugar de leer la última salida y luego insertar (dos operadores podían
+    leer "sin salida reciente" al mismo tiempo), se hace una escritura condicional:
+      - UPDATE ... WHERE timestamp <= ahora - cooldown: gana si afecta una fila.
+      - Si no afecta ninguna, INSERT: la clave primaria garantiza que solo un
+        proceso crea la primera salida; el perdedor recibe IntegrityError.
+    Devuelve True si esta transacción ganó la salida. Debe ejecutarse dentro de
+    la transacción que inserta el ExitLog.
+    """
+    cooldown_minutes = current_app.config.get('EXIT_LOG_COOLDOWN_MINUTES', 5)
+    # El timestamp de la BD es naive, pero representa la hora de Colombia.
+    naive_now = now.astimezone(colombia_tz).replace(tzinfo=None)
+    cutoff = naive_now - timedelta(minutes=cooldown_minutes)
+
+    result = db.session.execute(
+        update(StudentLastExit)
+        .where(StudentLastExit.student_id == student_id, StudentLastExit.timestamp <= cutoff)
+        .values(timestamp=naive_now)
+    )
+    if result.rowcount == 1:
+        return True
+
+    try:
+        db.session.execute(insert(StudentLastExit).values(student_id=student_id, timestamp=naive_now))
+    except IntegrityError:
+        # Ya existe una salida dentro del cooldown (o la acaba de registrar otra puerta).
+        return False
+    return True
+
+
+def register_exit(student, door_id, operator_id):
+    """
+    Registra la salida del estudiante (entrada de student_cache) y hace commit.
+    Devuelve (id del ExitLog, None) si se registró, o (None, mensaje) si está en cooldown.
+    Con EXIT_LOG_WRITE_BEHIND activo, la escritura se agrupa con otras en exit_writer.
+    """
+    from app.exit_writer import exit_writer
+    if exit_writer.enabled:
+        return exit_writer.submit(student, door_id, operator_id)
+
+    for attempt in range(REGISTER_EXIT_ATTEMPTS):
+        try:
+            now = datetime.now(colombia_tz)
+            if not claim_exit(student['id'], now):
+                db.session.rollback()
+                return None, cooldown_message(student)
+
+            new_log = ExitLog(
+                timestamp=now,
+                student_id=student['id'],
+                door_id=door_id,
+                operator_id=operator_id
+            )
+            db.session.add(new_log)
+            add_exit_stats([(now, door_id, student['course'])])
+            # El id se lee antes del commit: después, el objeto expirado costaría otro SELECT
+            db.session.flush()
+            log_id = new_log.id
+            db.session.commit()
+            return log_id, None
+        except OperationalError:
+            db.session.rollback()
+            if attempt == REGISTER_EXIT_ATTEMPTS - 1:
+                raise
+
+
+def register_exit_batch(entries):
+    """
+    Registra en bloque salidas capturadas sin conexión.
+
+    Cada entrada es un dict con student_id, door_id, operator_id y timestamp
+    (hora de Colombia sin tzinfo). El cooldown se aplica contra las salidas ya
+    guardadas y contra las del mismo lote; las aceptadas se insertan con un solo
+    INSERT de varias filas; student_last_exit y exit_stats se actualizan en la
+    misma transacción. Devuelve una lista paralela a entries con None (registrada) o
+    el mensaje de error. El llamador hace el commit.
+    """
+    cooldown = timedelta(minutes=current_app.config.get('EXIT_LOG_COOLDOWN_MINUTES', 5))
+    results = [None] * len(entries)
+    if not entries:
+        return results
+
+    student_ids = {entry['student_id'] for entry in entries}
+    earliest = min(entry['timestamp'] for entry in entries) - cooldown
+    latest = max(entry['timestamp'] for entry in entries) + cooldown
+
+    # Salidas ya guardadas en la ventana del lote (usa ix_exit_log_student_id_timestamp)
+    known_exits = {student_id: [] for student_id in student_ids}
+    stored = db.session.execute(
+        select(ExitLog.student_id, ExitLog.timestamp)
+        .where(ExitLog.student_id.in_(student_ids), ExitLog.timestamp.between(earliest, latest))
+    )
+    for student_id, timestamp in stored:
+        known_exits[student_id].append(timestamp)
+
+    rows = []
+    latest_by_student = {}
+    for index in sorted(range(len(entries)), key=lambda i: entries[i]['timestamp']):
+        entry = entries[index]
+        timestamp = entry['timestamp']
+        if any(abs(timestamp - other) < cooldown for other in known_exits[entry['student_id']]):
+            results[index] = 'Salida ya registrada dentro del tiempo de espera.'
+            continue
+        known_exits[entry['student_id']].append(timestamp)
+        latest_by_student[entry['student_id']] = timestamp
+        rows.append({
+            'timestamp': timestamp,
+            'student_id': entry['student_id'],
+            'door_id': entry['door_id'],
+            'operator_id': entry['operator_id'],
+        })
+
+    if rows:
+        db.session.execute(insert(ExitLog.__table__), rows)
+        _advance_last_exits(latest_by_student)
+        courses = dict(db.session.execute(
+            select(Student.id, Student.course).where(Student.id.in_(latest_by_student))
+        ).all())
+        add_exit_stats((row['timestamp'], row['door_id'], courses[row['student_id']]) for row in rows)
+    return results
+
+
+def _advance_last_exits(latest_by_student):
+    """Adelanta student_last_exit a la salida más reciente del lote, sin retrocederla nunca."""
+    table = StudentLastExit.__table__
+    existing = set(db.session.execute(
+        select(table.c.student_id).where(table.c.student_id.in_(latest_by_student))
+    ).scalars())
+
+    updates = [{'sid': sid, 'ts': ts} for sid, ts in latest_by_student.items() if sid in existing]
+    if updates:
+        db.session.execute(
+            table.update()
+            .where(table.c.student_id == bindparam('sid'), table.c.timestamp < bindparam('ts'))
+            .values(timestamp=bindparam('ts')),
+            updates
+        )
+    inserts = [{'student_id': sid, 'timestamp': ts} for sid, ts in latest_by_student.items() if sid not in existing]
+    if inserts:
+        db.session.execute(insert(table), inserts)
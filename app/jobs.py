@@ -0,0 +1,244 @@
+import json
+import multiprocessing
+import os
+import pickle
+import re
+import secrets
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Estados de un trabajo
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+_JOB_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+
+# Tareas registradas con @job_handler (ver app/tasks.py)
+JOB_HANDLERS = {}
+
+
+def job_handler(kind):
+    """Registra la función que ejecuta los trabajos de tipo `kind` en el pool."""
+    def decorator(func):
+        JOB_HANDLERS[kind] = func
+        return func
+    return decorator
+
+
+class JobRunner:
+    """
+    Trabajos pesados (PDF, ZIP de QR, carga de fotos) fuera del worker web.
+
+    Cada proceso web tiene un ProcessPoolExecutor propio, creado al primer uso,
+    cuyos procesos arrancan con 'spawn' (no heredan hilos ni conexiones) y
+    montan su propia aplicación con la misma configuración. El estado de cada
+    trabajo es un JSON en TEMP_FOLDER/jobs, junto al archivo resultante, así que
+    cualquier worker de gunicorn puede responder el estado o la descarga sin
+    broker externo. Los trabajos vencidos (JOB_TTL_SECONDS) se borran al crear
+    trabajos nuevos o con `flask admin clean-jobs`.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        self.jobs_dir = os.path.join(app.config['TEMP_FOLDER'], 'jobs')
+        self.max_workers = app.config.get('JOB_WORKERS', 2)
+        self.ttl = app.config.get('JOB_TTL_SECONDS', 3600)
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        self.shutdown()
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn'))
+                self._pid = os.getpid()
+            return self._executor
+
+    def submit(self, kind, owner_id, params=None, download_name=None, mimetype=None):
+        """Crea el trabajo, lo encola en el pool y devuelve su id de inmediato."""
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f'Tipo de trabajo desconocido: {kind}')
+        self.cleanup_expired()
+        job_id = secrets.token_hex(16)
+        state = {
+            'id': job_id,
+            'kind': kind,
+            'owner_id': owner_id,
+            'status': QUEUED,
+            'progress': 0,
+            'message': None,
+            'error': None,
+            'artifact': None,
+            'download_name': download_name,
+            'mimetype': mimetype,
+            'created_at': time.time(),
+            'finished_at': None,
+        }
+        write_job(self.jobs_dir, state)
+
+        future = self._get_executor().submit(
+            run_job, _worker_config(self.app), self.jobs_dir, job_id, kind, params or {})
+        future.add_done_callback(lambda f: self._on_done(job_id, f))
+        return job_id
+
+    def _on_done(self, job_id, future):
+        # Si el proceso del pool murió, run_job no alcanzó a marcar el fallo
+        if future.cancelled() or future.exception() is not None:
+            state = read_job(self.jobs_dir, job_id)
+            if state and state['status'] not in (DONE, FAILED):
+                state.update(status=FAILED, error='El proceso del trabajo terminó inesperadamente.',
+                             finished_at=time.time())
+                write_job(self.jobs_dir, state)
+
+    def get(self, job_id):
+        return read_job(self.jobs_dir, job_id)
+
+    def input_path(self, name):
+        """Ruta para guardar un archivo de entrada (p. ej. un ZIP subido) antes de encolar."""
+        return os.path.join(self.jobs_dir, f'{secrets.token_hex(16)}-{os.path.basename(name)}')
+
+    def artifact_path(self, state):
+        if not state.get('artifact'):
+            return None
+        return os.path.join(self.jobs_dir, state['artifact'])
+
+    def cleanup_expired(self):
+        """Borra estados, resultados y entradas con más de JOB_TTL_SECONDS. Devuelve cuántos archivos borró."""
+        removed = 0
+        cutoff = time.time() - self.ttl
+        for name in os.listdir(self.jobs_dir):
+            path = os.path.join(self.jobs_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                continue
+        return removed
+
+
+def _worker_config(app):
+    """Configuración serializable para que el proceso del pool cree su propia app."""
+    config = {}
+    for key, value in app.config.items():
+        if not key.isupper():
+            continue
+        try:
+            pickle.dumps(value)
+        except Exception:
+            continue
+        config[key] = value
+    return config
+
+
+def _job_path(jobs_dir, job_id):
+    return os.path.join(jobs_dir, f'{job_id}.json')
+
+
+def read_job(jobs_dir, job_id):
+    """Estado del trabajo, o None si no existe (o el id no es válido)."""
+    if not job_id or not _JOB_ID_RE.match(job_id):
+        return None
+    try:
+        with open(_job_path(jobs_dir, job_id), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_job(jobs_dir, state):
+    # Escritura atómica: quien lea el estado nunca ve un JSON a medias
+    path = _job_path(jobs_dir, state['id'])
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+class Job:
+    """Lo que recibe una tarea en el proceso del pool para informar su avance."""
+
+    def __init__(self, jobs_dir, state):
+        self.jobs_dir = jobs_dir
+        self.state = state
+        self._last_write = 0.0
+
+    @property
+    def id(self):
+        return self.state['id']
+
+    def progress(self, done, total, message=None):
+        """Actualiza el porcentaje; se escribe a disco como mucho cada medio segundo."""
+        self.state['progress'] = int(done * 100 / total) if total else 100
+        if message:
+            self.state['message'] = message
+        now = time.monotonic()
+        if now - self._last_write >= 0.5:
+            write_job(self.jobs_dir, self.state)
+            self._last_write = now
+
+    def artifact_path(self, extension):
+        """Ruta donde la tarea debe escribir su resultado."""
+        self.state['artifact'] = f'{self.id}.{extension}'
+        return os.path.join(self.jobs_dir, self.state['artifact'])
+
+
+# --- Lado del proceso del pool ---
+
+_worker_app = None
+_worker_app_key = None
+
+
+def _get_worker_app(config):
+    global _worker_app, _worker_app_key
+    key = repr(sorted(config.items()))
+    if _worker_app is None or _worker_app_key != key:
+        from config import Config
+        from app import create_app
+        _worker_app = create_app(type('JobConfig', (Config,), config))
+        _worker_app_key = key
+    return _worker_app
+
+
+def run_job(config, jobs_dir, job_id, kind, params):
+    """Punto de entrada en el proceso del pool: ejecuta la tarea y deja el estado final en disco."""
+    state = read_job(jobs_dir, job_id)
+    state.update(status=RUNNING)
+    write_job(jobs_dir, state)
+    job = Job(jobs_dir, state)
+    try:
+        app = _get_worker_app(config)
+        with app.app_context():
+            message = JOB_HANDLERS[kind](job, **params)
+        state.update(status=DONE, progress=100, message=message or state.get('message'))
+    except Exception as e:
+        state.update(status=FAILED, error=str(e))
+    finally:
+        try:
+            from app import db
+            db.session.remove()
+        except Exception:
+            pass
+    state['finished_at'] = time.time()
+    write_job(jobs_dir, state)
+
+
+job_runner = JobRunner()
+
+# Las tareas se registran al importar el módulo (después de definir job_handler)
+from app import tasks  # noqa: E402,F401
@@ -0,0 +1,177 @@
+import threading
+import time
+from flask import g, jsonify, request, Response
+
+# Clases de petición
+SCANNER = 'scanner'
+HEAVY = 'heavy'
+STREAM = 'stream'
+DEFAULT = 'default'
+
+# Endpoints costosos en CPU o en tiempo de conexión (exportaciones, carnets, cargas)
+# con los métodos que hacen el trabajo: el GET de un formulario de carga es liviano
+HEAVY_ENDPOINTS = {
+    'main.export_csv': {'GET'},
+    'main.export_pdf': {'GET'},
+    'management.download_all_cards': {'GET'},
+    'management.download_qrs_zip': {'GET'},
+    'management.download_single_card': {'GET'},
+    'management.upload_photos': {'POST'},
+    'management.import_students': {'POST'},
+}
+
+
+def classify(endpoint, blueprint, method):
+    """Clase de la petición según su endpoint y método."""
+    if blueprint == 'scanner':
+        return SCANNER
+    if blueprint == 'stream':
+        return STREAM
+    if method in HEAVY_ENDPOINTS.get(endpoint, ()):
+        return HEAVY
+    return DEFAULT
+
+
+class _Pool:
+    """Semáforo acotado con métricas de espera para una clase de peticiones."""
+
+    def __init__(self, limit, timeout):
+        self.limit = limit
+        self.timeout = timeout
+        self._semaphore = threading.BoundedSemaphore(limit)
+
+    def acquire(self):
+        return self._semaphore.acquire(timeout=self.timeout) if self.timeout else self._semaphore.acquire(blocking=False)
+
+    def release(self):
+        self._semaphore.release()
+
+
+class RequestLimiter:
+    """
+    Aislamiento entre clases de peticiones dentro de cada proceso.
+
+    Los endpoints del escáner no pasan por ningún semáforo: su capacidad queda
+    reservada limitando a los demás. Las peticiones pesadas (HEAVY_ENDPOINTS)
+    usan un semáforo propio que no espera: si está lleno responden 503 con
+    Retry-After. Las conexiones SSE tienen su propio tope, y el resto, si
+    GENERAL_REQUEST_CONCURRENCY está definido, comparte un pool general que
+    espera hasta GENERAL_REQUEST_QUEUE_SECONDS. Con gunicorn gthread, dejar
+    GENERAL_REQUEST_CONCURRENCY por debajo de --threads reserva hilos para el
+    escáner. Los límites son por proceso.
+    """
+
+    def __init__(self):
+        self.pools = {}
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def init_app(self, app):
+        self.retry_after = app.config.get('BUSY_RETRY_AFTER_SECONDS', 5)
+        self.pools = {HEAVY: _Pool(app.config.get('HEAVY_REQUEST_CONCURRENCY', 2), 0)}
+        if app.config.get('STREAM_MAX_CONNECTIONS'):
+            self.pools[STREAM] = _Pool(app.config['STREAM_MAX_CONNECTIONS'], 0)
+        if app.config.get('GENERAL_REQUEST_CONCURRENCY'):
+            self.pools[DEFAULT] = _Pool(app.config['GENERAL_REQUEST_CONCURRENCY'],
+                                        app.config.get('GENERAL_REQUEST_QUEUE_SECONDS', 10))
+        self._stats = {name: self._empty_stats() for name in (SCANNER, HEAVY, STREAM, DEFAULT)}
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    @staticmethod
+    def _empty_stats():
+        return {'requests': 0, 'rejected': 0, 'in_flight': 0, 'queue_seconds_total': 0.0, 'max_queue_seconds': 0.0}
+
+    def _pools_for(self, request_class):
+        # Las pesadas ocupan además un lugar del pool general; el SSE solo el suyo
+        if request_class == HEAVY:
+            names = (HEAVY, DEFAULT)
+        elif request_class == STREAM:
+            names = (STREAM,)
+        elif request_class == DEFAULT:
+            names = (DEFAULT,)
+        else:
+            names = ()
+        return [self.pools[name] for name in names if name in self.pools]
+
+    def _before_request(self):
+        if request.endpoint is None or request.endpoint == 'static':
+            return None
+        request_class = classify(request.endpoint, request.blueprint, request.method)
+        g.request_class = request_class
+        g.request_slots = []
+
+        started = time.perf_counter()
+        for pool in self._pools_for(request_class):
+            if not pool.acquire():
+                self._release(g.pop('request_slots'))
+                g.pop('request_class')
+                self._record(request_class, time.perf_counter() - started, rejected=True)
+                return self._busy_response()
+            g.request_slots.append(pool)
+        self._record(request_class, time.perf_counter() - started)
+        return None
+
+    def _after_request(self, response):
+        # Una respuesta en streaming (CSV, SSE) sigue trabajando después de la
+        # vista: su cupo se libera cuando el servidor cierra el cuerpo.
+        if response.is_streamed and 'request_class' in g:
+            request_class = g.pop('request_class')
+            slots = g.pop('request_slots')
+            response.call_on_close(lambda: self._finish(request_class, slots))
+        return response
+
+    def _teardown_request(self, exc):
+        if 'request_class' in g:
+            self._finish(g.pop('request_class'), g.pop('request_slots'))
+
+    def _finish(self, request_class, slots):
+        self._release(slots)
+        with self._lock:
+            self._stats[request_class]['in_flight'] -= 1
+
+    @staticmethod
+    def _release(slots):
+        for pool in slots:
+            pool.release()
+
+    def _record(self, request_class, waited, rejected=False):
+        with self._lock:
+            stats = self._stats[request_class]
+            stats['requests'] += 1
+            stats['queue_seconds_total'] += waited
+            stats['max_queue_seconds'] = max(stats['max_queue_seconds'], waited)
+            if rejected:
+                stats['rejected'] += 1
+            else:
+                stats['in_flight'] += 1
+
+    def _busy_response(self):
+        message = 'El servidor está ocupado con otras descargas. Intente de nuevo en unos segundos.'
+        if request.is_json or request.accept_mimetypes.best == 'application/json':
+            response = jsonify({'success': False, 'error': message})
+        else:
+            response = Response(message, mimetype='text/plain')
+        response.status_code = 503
+        response.headers['Retry-After'] = str(self.retry_after)
+        return response
+
+    def stats(self):
+        with self._lock:
+            result = {}
+            for name, stats in self._stats.items():
+                pool = self.pools.get(name)
+                result[name] = {
+                    'limit': pool.limit if pool else None,
+                    'requests': stats['requests'],
+                    'rejected': stats['rejected'],
+                    'in_flight': stats['in_flight'],
+                    'avg_queue_ms': round(stats['queue_seconds_total'] / stats['requests'] * 1000, 2)
+                    if stats['requests'] else 0.0,
+                    'max_queue_ms': round(stats['max_queue_seconds'] * 1000, 2),
+                }
+            return result
+
+
+request_limiter = RequestLimiter()
@@ -0,0 +1,164 @@
+import json
+import os
+import queue
+import threading
+from sqlalchemy import select
+from app import db
+from app.models.exit_log import ExitLog
+
+
+class LiveFeed:
+    """
+    Publicador de salidas en vivo para /stream/exits.
+
+    Cada proceso tiene un único hilo que consulta exit_log cada
+    LIVE_FEED_POLL_SECONDS buscando ids nuevos (la base de datos hace de broker
+    entre workers) y reparte los eventos a las colas de sus suscriptores. Así la
+    carga en la BD es una consulta por proceso y por ciclo, sin importar cuántos
+    dashboards estén abiertos. El hilo se detiene cuando no quedan suscriptores.
+
+    Cada ciclo vuelve a leer los últimos EXIT_FEED_OVERLAP ids para no perder las
+    salidas confirmadas fuera de orden; _published evita repetirlas.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+        self.last_id = None
+        self._published = set()
+        self.snapshot = None
+        self.polls = 0
+        self.events = 0
+
+    def init_app(self, app):
+        self.app = app
+        self.poll_interval = app.config.get('LIVE_FEED_POLL_SECONDS', 1)
+        self.subscriber_queue_size = app.config.get('LIVE_FEED_QUEUE_SIZE', 1000)
+        with self._lock:
+            self._stop.set()
+            self._subscribers = set()
+            self._thread = None
+            self.last_id = None
+            self._published = set()
+            self.snapshot = None
+            self.polls = 0
+            self.events = 0
+
+    def subscribe(self):
+        """Registra un suscriptor y devuelve su cola de eventos (nombre, datos)."""
+        subscriber = queue.Queue(maxsize=self.subscriber_queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+            if self._thread is None or not self._thread.is_alive() or self._pid != os.getpid():
+                self._stop = threading.Event()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, args=(self._stop,), name='live-feed', daemon=True)
+                self._thread.start()
+            snapshot = self.snapshot
+        if snapshot is not None:
+            subscriber.put(('counts', snapshot))
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def _run(self, stop):
+        while not stop.is_set():
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    self.last_id = None
+                    self._published = set()
+                    return
+            try:
+                self.poll()
+            except Exception:
+                self.app.logger.exception('Error consultando salidas para el feed en vivo')
+            stop.wait(self.poll_interval)
+
+    def poll(self):
+        """Un ciclo del publicador: busca salidas nuevas y las reparte."""
+        from app.dashboard import colombia_today, exit_feed, today_counts, EXIT_FEED_OVERLAP
+
+        with self.app.app_context():
+            self.polls += 1
+            today = colombia_today()
+            if self.last_id is None:
+                # Primer ciclo: solo se toma la posición actual (con los ids de la
+                # ventana, que ya no son nuevos) y el conteo inicial
+                recent_ids = db.session.execute(
+                    select(ExitLog.id).order_by(ExitLog.id.desc()).limit(EXIT_FEED_OVERLAP)
+                ).scalars().all()
+                self.last_id = recent_ids[0] if recent_ids else 0
+                self._published = set(recent_ids)
+                self._publish('counts', self._counts(today, today_counts))
+                db.session.remove()
+                return
+
+            entries = [entry for entry in exit_feed(since_id=max(self.last_id - EXIT_FEED_OVERLAP, 0))
+                       if entry['id'] not in self._published]
+            if entries:
+                self.last_id = max(self.last_id, entries[-1]['id'])
+                for entry in entries:
+                    self._published.add(entry['id'])
+                    if entry['date'] == today.isoformat():
+                        self._publish('exit', entry)
+                self._published = {log_id for log_id in self._published
+                                   if log_id > self.last_id - EXIT_FEED_OVERLAP}
+                self._publish('counts', self._counts(today, today_counts))
+            db.session.remove()
+
+    def _counts(self, today, today_counts):
+        exits_by_door_today, exits_by_course = today_counts(today)
+        return {
+            'date': today.isoformat(),
+            'total_exits_today': sum(count for door_id, door_name, count in exits_by_door_today),
+            'exits_by_door_today': [
+                {'door_id': door_id, 'door_name': door_name, 'count': count}
+                for door_id, door_name, count in exits_by_door_today
+            ],
+            'exits_by_course_today': exits_by_course,
+        }
+
+    def _publish(self, event, data):
+        if event == 'counts':
+            self.snapshot = data
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait((event, data))
+            except queue.Full:
+                # Cliente que no lee: se descarta su cola y se le pide cerrar;
+                # EventSource se reconecta solo.
+                self.unsubscribe(subscriber)
+                while not subscriber.empty():
+                    subscriber.get_nowait()
+                subscriber.put_nowait(('close', None))
+        self.events += 1
+
+    def stats(self):
+        return {
+            'subscribers': len(self._subscribers),
+            'running': self._thread is not None and self._thread.is_alive(),
+            'last_id': self.last_id,
+            'polls': self.polls,
+            'events': self.events,
+        }
+
+
+def format_event(event, data):
+    """Serializa un evento en el formato de text/event-stream."""
+    lines = [f'event: {event}']
+    if event == 'exit':
+        lines.append(f"id: {data['id']}")
+    lines.append('data: ' + json.dumps(data, separators=(',', ':'), ensure_ascii=False))
+    return '\n'.join(lines) + '\n\n'
+
+
+live_feed = LiveFeed()
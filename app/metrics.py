@@ -0,0 +1,259 @@
+import threading
+import time
+from flask import g, has_app_context, request, current_app
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Límites de los buckets de cada histograma (Prometheus añade +Inf)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+PREFIX = 'control_salidas_'
+
+
+class Histogram:
+    """Histograma acumulado por combinación de etiquetas, como los de Prometheus."""
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, labels, value):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series['buckets'][i] += 1
+        series['sum'] += value
+        series['count'] += 1
+
+    def render(self, label_names):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for labels, series in sorted(self.series.items()):
+            base = dict(zip(label_names, labels))
+            for bound, count in zip(self.buckets, series['buckets']):
+                lines.append(f"{self.name}_bucket{format_labels({**base, 'le': format_value(bound)})} {count}")
+            lines.append(f"{self.name}_bucket{format_labels({**base, 'le': '+Inf'})} {series['count']}")
+            lines.append(f"{self.name}_sum{format_labels(base)} {format_value(series['sum'])}")
+            lines.append(f"{self.name}_count{format_labels(base)} {series['count']}")
+        return lines
+
+
+class _RequestSample:
+    """Lo medido durante una petición: las consultas las suman los eventos del motor."""
+    __slots__ = ('started', 'statements', 'sql_seconds', 'queries')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.statements = 0
+        self.sql_seconds = 0.0
+        self.queries = []
+
+
+class RequestMetrics:
+    """
+    Instrumentación por endpoint: tiempo total, número y tiempo de consultas SQL
+    y tamaño de la respuesta, en histogramas acumulados que /metrics expone en
+    formato de texto de Prometheus (las ventanas móviles se calculan al consultar,
+    p. ej. rate(...[5m])). Las peticiones que superan SLOW_REQUEST_MS se escriben
+    en el log junto con sus consultas.
+
+    Las métricas son por proceso; Prometheus agrega los workers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.slow_request_seconds = 0.5
+        self.max_logged_statements = 50
+        self._reset()
+
+    def _reset(self):
+        self.requests = {}
+        self.duration = Histogram(PREFIX + 'request_duration_seconds',
+                                  'Tiempo total de la petición.', DURATION_BUCKETS)
+        self.sql_statements = Histogram(PREFIX + 'request_sql_statements',
+                                        'Consultas SQL ejecutadas por petición.', STATEMENT_BUCKETS)
+        self.sql_duration = Histogram(PREFIX + 'request_sql_seconds',
+                                      'Tiempo en consultas SQL por petición.', DURATION_BUCKETS)
+        self.response_size = Histogram(PREFIX + 'response_size_bytes',
+                                       'Tamaño del cuerpo de la respuesta (sin las respuestas en streaming).',
+                                       SIZE_BUCKETS)
+        self.slow_requests = 0
+
+    def init_app(self, app):
+        self.slow_request_seconds = app.config.get('SLOW_REQUEST_MS', 500) / 1000
+        self.max_logged_statements = app.config.get('SLOW_REQUEST_MAX_STATEMENTS', self.max_logged_statements)
+        with self._lock:
+            self._reset()
+        _listen_to_engines()
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    def _before_request(self):
+        g.metrics_sample = _RequestSample()
+
+    def _after_request(self, response):
+        sample = g.pop('metrics_sample', None)
+        if sample is None:
+            return response
+        endpoint = request.endpoint or '<unmatched>'
+        method = request.method
+        path = request.full_path.rstrip('?')
+        status = response.status_code
+        if response.is_streamed:
+            # Un CSV o el SSE siguen consultando mientras se envía el cuerpo
+            g.metrics_streaming = sample
+            logger = current_app.logger
+            response.call_on_close(
+                lambda: self._record(sample, endpoint, method, path, status, None, logger))
+        else:
+            self._record(sample, endpoint, method, path, status, response.content_length, current_app.logger)
+        return response
+
+    def _record(self, sample, endpoint, method, path, status, size, logger):
+        elapsed = time.perf_counter() - sample.started
+        with self._lock:
+            key = (endpoint, method, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.duration.observe((endpoint,), elapsed)
+            self.sql_statements.observe((endpoint,), sample.statements)
+            self.sql_duration.observe((endpoint,), sample.sql_seconds)
+            if size is not None:
+                self.response_size.observe((endpoint,), size)
+            slow = elapsed >= self.slow_request_seconds
+            if slow:
+                self.slow_requests += 1
+        if slow:
+            lines = [f'Petición lenta: {method} {path} ({endpoint}) {status} en {elapsed * 1000:.0f} ms, '
+                     f'{sample.statements} consultas SQL ({sample.sql_seconds * 1000:.0f} ms)']
+            lines += [f'  {seconds * 1000:8.1f} ms  {statement}' for seconds, statement in sample.queries]
+            if sample.statements > len(sample.queries):
+                lines.append(f'  ... {sample.statements - len(sample.queries)} consultas más')
+            logger.warning('\n'.join(lines))
+
+    def _sql_executed(self, statement, seconds):
+        sample = g.get('metrics_sample') or g.get('metrics_streaming')
+        if sample is None:
+            return
+        sample.statements += 1
+        sample.sql_seconds += seconds
+        if len(sample.queries) < self.max_logged_statements:
+            sample.queries.append((seconds, ' '.join(statement.split())))
+
+    def stats(self):
+        """Resumen por endpoint para /manage/stats."""
+        with self._lock:
+            summary = {}
+            for labels, series in self.duration.series.items():
+                sql = self.sql_statements.series[labels]
+                summary[labels[0]] = {
+                    'requests': series['count'],
+                    'avg_ms': round(series['sum'] / series['count'] * 1000, 2),
+                    'avg_sql_statements': round(sql['sum'] / sql['count'], 2),
+                }
+            return {'slow_requests': self.slow_requests, 'endpoints': summary}
+
+    def render(self):
+        """Métricas de peticiones en formato de texto de Prometheus."""
+        with self._lock:
+            name = PREFIX + 'requests_total'
+            lines = [f'# HELP {name} Peticiones atendidas por endpoint, método y estado.', f'# TYPE {name} counter']
+            for (endpoint, method, status), count in sorted(self.requests.items()):
+                lines.append(f'{name}{format_labels({"endpoint": endpoint, "method": method, "status": status})} {count}')
+            for histogram in (self.duration, self.sql_statements, self.sql_duration, self.response_size):
+                lines += histogram.render(('endpoint',))
+            name = PREFIX + 'slow_requests_total'
+            lines += [f'# HELP {name} Peticiones por encima de SLOW_REQUEST_MS.', f'# TYPE {name} counter',
+                      f'{name} {self.slow_requests}']
+        return lines
+
+
+request_metrics = RequestMetrics()
+
+
+def component_stats():
+    """Contadores de los componentes de este proceso (cachés, escritura agrupada, feed, límites, réplica)."""
+    from app.cache import student_cache, door_cache, user_cache
+    from app.exit_writer import exit_writer
+    from app.live_feed import live_feed
+    from app.limits import request_limiter
+    from app.replica import read_replica_state
+    return {
+        'student_cache': student_cache.stats(),
+        'door_cache': door_cache.stats(),
+        'user_cache': user_cache.stats(),
+        'exit_writer': exit_writer.stats(),
+        'live_feed': live_feed.stats(),
+        'request_classes': request_limiter.stats(),
+        'read_replica': read_replica_state.stats(),
+    }
+
+
+def render_prometheus():
+    """Texto completo de /metrics: peticiones más los contadores de component_stats() como gauges."""
+    lines = request_metrics.render()
+    for component, stats in component_stats().items():
+        gauges = {}
+        for key, value in stats.items():
+            if isinstance(value, dict):
+                # request_classes: un diccionario por clase de petición
+                for sub_key, sub_value in value.items():
+                    if _is_number(sub_value):
+                        gauges.setdefault(sub_key, []).append(({'class': key}, sub_value))
+            elif _is_number(value):
+                gauges.setdefault(key, []).append(({}, value))
+        for key, samples in gauges.items():
+            name = f'{PREFIX}{component}_{key}'
+            lines.append(f'# TYPE {name} gauge')
+            lines += [f'{name}{format_labels(labels)} {format_value(value)}' for labels, value in samples]
+    return '\n'.join(lines) + '\n'
+
+
+def _is_number(value):
+    return isinstance(value, (int, float))
+
+
+def format_value(value):
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, float):
+        if value == float('inf'):
+            return '+Inf'
+        return repr(value)
+    return str(value)
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        '{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels.items()
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+_listening = False
+
+
+def _listen_to_engines():
+    """Eventos en la clase Engine: cubren la base principal y la réplica de lectura."""
+    global _listening
+    if _listening:
+        return
+    _listening = True
+
+    @event.listens_for(Engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._metrics_started = time.perf_counter()
+
+    @event.listens_for(Engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, '_metrics_started', None) if context is not None else None
+        if started is not None and has_app_context():
+            request_metrics._sql_executed(statement, time.perf_counter() - started)
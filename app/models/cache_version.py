@@ -0,0 +1,49 @@
+from app import db
+from sqlalchemy import select, update, insert
+
+class CacheVersion(db.Model):
+    """
+    Contador de versión por tipo de dato cacheado (p. ej. 'students').
+    Cada escritura desde gestión lo incrementa en la misma transacción, y los
+    procesos que cachean esos datos lo comparan para saber si deben descartar su copia.
+    """
+    __tablename__ = 'cache_version'
+
+    name = db.Column(db.String(32), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<CacheVersion {self.name}={self.version}>'
+
+
+def current_version(name):
+    """Lee la versión confirmada sin pasar por el identity map de la sesión."""
+    version = db.session.execute(
+        select(CacheVersion.version).where(CacheVersion.name == name)
+    ).scalar()
+    return version or 0
+
+def bump_version(name):
+    """
+    Incrementa la versión dentro de la transacción actual (el llamador hace el commit)
+    y devuelve el nuevo valor.
+    """
+    result = db.session.execute(
+        update(CacheVersion).where(CacheVersion.name == name).values(version=CacheVersion.version + 1)
+    )
+    if result.rowcount == 0:
+        db.session.add(CacheVersion(name=name, version=1))
+        db.session.flush()
+    return current_version(name)
+
+def bump_version_on(connection, name):
+    """
+    Igual que bump_version, pero sobre la conexión de un evento de flush
+    (p. ej. after_update), donde no se puede usar la sesión.
+    """
+    table = CacheVersion.__table__
+    result = connection.execute(
+        update(table).where(table.c.name == name).values(version=table.c.version + 1)
+    )
+    if result.rowcount == 0:
+        connection.execute(insert(table).values(name=name, version=1))
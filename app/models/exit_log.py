@@ -5,9 +5,22 @@ import pytz
 # Zona horaria de Colombia
 colombia_tz = pytz.timezone('America/Bogota')
 
+def colombia_wall_time(timestamp):
+    """Hora de Colombia sin tzinfo, tal como se guarda en la BD."""
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(colombia_tz).replace(tzinfo=None)
+    return timestamp
+
+def _default_local_date(context):
+    timestamp = context.get_current_parameters().get('timestamp') or datetime.now(colombia_tz)
+    return colombia_wall_time(timestamp).date()
+
 class ExitLog(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     timestamp = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(colombia_tz))
+    # Fecha local de Colombia derivada del timestamp al insertar, para agrupar y
+    # filtrar por día con un índice en SQLite y MySQL por igual
+    local_date = db.Column(db.Date, nullable=False, index=True, default=_default_local_date)
     
     student_id = db.Column(db.String(10), db.ForeignKey('student.id'), nullable=False)
     operator_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -18,6 +31,11 @@ class ExitLog(db.Model):
     operator = db.relationship('User', backref=db.backref('exit_logs', lazy=True))
     door = db.relationship('Door', backref=db.backref('exit_logs', lazy=True))
 
+    __table_args__ = (
+        # Historial de un estudiante ordenado por fecha (cooldown y consultas por estudiante)
+        db.Index('ix_exit_log_student_id_timestamp', 'student_id', 'timestamp'),
+    )
+
     # --- NUEVA PROPIEDAD ---
     @property
     def local_timestamp(self):
@@ -25,4 +43,19 @@ class ExitLog(db.Model):
         return self.timestamp.astimezone(colombia_tz)
 
     def __repr__(self):
-        return f'<ExitLog {self.student.name} at {self.timestamp}>'
\ No newline at end of file
+        return f'<ExitLog {self.student.name} at {self.timestamp}>'
+
+class StudentLastExit(db.Model):
+    """
+    Última salida registrada de cada estudiante. Se actualiza en la misma
+    transacción que el ExitLog, de modo que el cooldown se decide con una
+    búsqueda por clave primaria sin importar el tamaño del historial.
+    """
+    __tablename__ = 'student_last_exit'
+
+    student_id = db.Column(db.String(10), db.ForeignKey('student.id'), primary_key=True)
+    # Hora de Colombia sin tzinfo, igual que ExitLog.timestamp
+    timestamp = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f'<StudentLastExit {self.student_id} at {self.timestamp}>'
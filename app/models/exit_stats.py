@@ -0,0 +1,93 @@
+from collections import Counter
+from app import db
+from sqlalchemy import select, update, insert, delete
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.models.exit_log import ExitLog, colombia_wall_time
+from app.models.student import Student
+
+class ExitStats(db.Model):
+    """
+    Conteo de salidas por fecha local de Colombia, hora, puerta y curso.
+    Se actualiza en la misma transacción que cada ExitLog, así el dashboard
+    suma unas pocas filas en lugar de recorrer todo el historial de exit_log.
+    """
+    __tablename__ = 'exit_stats'
+
+    local_date = db.Column(db.Date, primary_key=True)
+    hour = db.Column(db.SmallInteger, primary_key=True, autoincrement=False)
+    door_id = db.Column(db.Integer, db.ForeignKey('door.id'), primary_key=True, autoincrement=False)
+    course = db.Column(db.String(64), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<ExitStats {self.local_date} {self.hour}h puerta={self.door_id} {self.course}={self.count}>'
+
+
+def stats_key(timestamp, door_id, course):
+    """Clave de la fila de estadísticas para una salida (timestamp naive o con tz de Colombia)."""
+    timestamp = colombia_wall_time(timestamp)
+    return timestamp.date(), timestamp.hour, door_id, course
+
+def _stats_rows(counts):
+    return [
+        {'local_date': local_date, 'hour': hour, 'door_id': door_id, 'course': course, 'count': count}
+        for (local_date, hour, door_id, course), count in counts.items()
+    ]
+
+def add_exit_stats(exits):
+    """
+    Suma al rollup las salidas dadas como tuplas (timestamp, door_id, course),
+    dentro de la transacción actual (el llamador hace el commit).
+    """
+    counts = Counter(stats_key(*exit_data) for exit_data in exits)
+    if not counts:
+        return
+    rows = _stats_rows(counts)
+    table = ExitStats.__table__
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        stmt = sqlite_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.local_date, table.c.hour, table.c.door_id, table.c.course],
+            set_={'count': table.c.count + stmt.excluded.count}
+        )
+        db.session.execute(stmt, rows)
+    elif dialect == 'mysql':
+        stmt = mysql_insert(table)
+        stmt = stmt.on_duplicate_key_update(count=table.c.count + stmt.inserted.count)
+        db.session.execute(stmt, rows)
+    else:
+        for row in rows:
+            result = db.session.execute(
+                update(table)
+                .where(table.c.local_date == row['local_date'], table.c.hour == row['hour'],
+                       table.c.door_id == row['door_id'], table.c.course == row['course'])
+                .values(count=table.c.count + row['count'])
+            )
+            if result.rowcount == 0:
+                db.session.execute(insert(table).values(**row))
+
+def rebuild_exit_stats(batch_size=10000):
+    """
+    Reconstruye el rollup completo a partir de exit_log dentro de la transacción
+    actual. Agrupa en Python para no depender de funciones de fecha del motor.
+    Devuelve el número de salidas procesadas.
+    """
+    db.session.execute(delete(ExitStats.__table__))
+    result = db.session.execute(
+        select(ExitLog.timestamp, ExitLog.door_id, Student.course)
+        .join(Student, ExitLog.student_id == Student.id)
+        .execution_options(yield_per=batch_size)
+    )
+    counts = Counter()
+    total = 0
+    for partition in result.partitions():
+        counts.update(stats_key(*row) for row in partition)
+        total += len(partition)
+
+    rows = _stats_rows(counts)
+    for start in range(0, len(rows), batch_size):
+        db.session.execute(insert(ExitStats.__table__), rows[start:start + batch_size])
+    return total
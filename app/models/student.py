@@ -8,6 +8,32 @@ class Student(db.Model):
     authorized_to_leave = db.Column(db.Boolean, default=False, nullable=False)
     photo = db.Column(db.String(128), nullable=True) # Ruta a la foto
     qr_code_data = db.Column(db.String(36), unique=True, nullable=False, default=lambda: str(uuid.uuid4()))
+    # Versión del carnet en los QR firmados; incrementarla revoca los carnets impresos
+    card_version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    # Versión del roster (contador 'students' de cache_version) en la que cambió por última vez
+    row_version = db.Column(db.Integer, nullable=False, default=0, server_default='0', index=True)
 
     def __repr__(self):
-        return f'<Student {self.name}>'
\ No newline at end of file
+        return f'<Student {self.name}>'
+
+class StudentTombstone(db.Model):
+    """
+    Marca de borrado de un estudiante, para que los escáneres con una copia
+    local del roster sepan qué IDs eliminar al pedir cambios desde una versión.
+    """
+    __tablename__ = 'student_tombstone'
+
+    student_id = db.Column(db.String(10), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<StudentTombstone {self.student_id} v{self.version}>'
+
+
+def record_student_deletion(student_id, version):
+    """Registra (o actualiza) la marca de borrado en la transacción actual."""
+    tombstone = db.session.get(StudentTombstone, student_id)
+    if tombstone:
+        tombstone.version = version
+    else:
+        db.session.add(StudentTombstone(student_id=student_id, version=version))
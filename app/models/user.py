@@ -1,6 +1,7 @@
 from app import db, login
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
+from sqlalchemy import event
 import enum
 
 class UserRole(enum.Enum):
@@ -25,4 +26,12 @@ class User(UserMixin, db.Model):
 
 @login.user_loader
 def load_user(id):
-    return User.query.get(int(id))
\ No newline at end of file
+    from app.cache import user_cache
+    return user_cache.get(int(id))
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def invalidate_user_cache(mapper, connection, target):
+    """Cualquier cambio de rol, contraseña o borrado invalida la caché de usuarios de todos los procesos."""
+    from app.cache import user_cache
+    user_cache.invalidate_on(connection)
\ No newline at end of file
@@ -2,8 +2,9 @@ import os
 from io import BytesIO
 from flask import current_app
 import qrcode
+from PIL import Image
 from reportlab.lib.pagesizes import letter
-from reportlab.lib.units import cm
+from reportlab.lib.units import cm, inch
 from reportlab.pdfgen import canvas
 from reportlab.lib.utils import ImageReader
 from reportlab.lib.colors import HexColor
@@ -11,6 +12,7 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib import colors
 from app.models.exit_log import colombia_tz 
+from app.qr_codes import qr_payload
 
 # --- Dimensiones Verticales del Carnet ---
 CARD_WIDTH = 5.4 * cm
@@ -20,37 +22,103 @@ CARD_HEIGHT = 8.5 * cm
 PRIMARY_COLOR = HexColor("#0A2240") # Azul oscuro para el texto
 SECONDARY_COLOR = HexColor("#4A4A4A") # Gris para subtítulos
 
+# Las imágenes del carnet se reducen a la resolución de impresión
+PRINT_DPI = 300
+PHOTO_SIZE = 3 * cm # Tamaño del área para la foto
+QR_SIZE = 2.4 * cm # Tamaño del área para el QR
+
+
+def student_photo_path(student):
+    """Ruta de la foto subida del estudiante, o None si no tiene."""
+    if not student.photo:
+        return None
+    return os.path.join(current_app.config['UPLOAD_FOLDER'], 'photos', student.photo)
+
+
+def qr_png(payload):
+    """Imagen PNG del QR del carnet."""
+    qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_L, box_size=10, border=1)
+    qr.add_data(payload)
+    qr.make(fit=True)
+    qr_img = qr.make_image(fill_color="black", back_color="white")
+
+    qr_buffer = BytesIO()
+    qr_img.save(qr_buffer, format="PNG")
+    return qr_buffer.getvalue()
+
+
+def print_photo(path):
+    """
+    Foto reducida al tamaño con que se imprime (PHOTO_SIZE a PRINT_DPI), o None
+    si el archivo no existe. Las fotos de cámara pesan varios MB y el carnet solo
+    necesita unos cientos de píxeles.
+    """
+    if not path or not os.path.exists(path):
+        return None
+    max_pixels = round(PHOTO_SIZE / inch * PRINT_DPI)
+    with Image.open(path) as img:
+        if img.format == 'JPEG' and max(img.size) <= max_pixels:
+            with open(path, 'rb') as f:
+                return f.read()
+        # En JPEG, decodifica directamente a una escala reducida (mucho más rápido)
+        img.draft('RGB', (max_pixels, max_pixels))
+        img.thumbnail((max_pixels, max_pixels), Image.LANCZOS)
+        buffer = BytesIO()
+        if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+            # Se conserva la transparencia (mask='auto' al dibujar)
+            img.convert('RGBA').save(buffer, format='PNG')
+        else:
+            img.convert('RGB').save(buffer, format='JPEG', quality=90)
+        return buffer.getvalue()
+
+
+def draw_shared_image(c, name, path, x, y, width, height, **kwargs):
+    """
+    Dibuja una imagen que se repite en todas las páginas (fondo, avatar) como un
+    formulario (XObject) con nombre: se registra la primera vez que se usa en el
+    documento y las demás páginas solo lo referencian.
+    """
+    if not c.hasForm(name):
+        c.beginForm(name)
+        c.drawImage(path, x, y, width=width, height=height, **kwargs)
+        c.endForm()
+    c.doForm(name)
+
+
 def draw_vertical_card(c, student):
     """
     Dibuja los datos del estudiante sobre la imagen de fondo del carnet.
     """
+    qr_image = qr_png(qr_payload(student))
+    photo_image = print_photo(student_photo_path(student))
+
     # --- Rutas a los archivos de imagen ---
     background_path = os.path.join(current_app.root_path, 'static/img/carnet_background.png')
-    
-    if student.photo:
-        photo_path = os.path.join(current_app.config['UPLOAD_FOLDER'], 'photos', student.photo)
-    else:
-        photo_path = os.path.join(current_app.root_path, 'static/img/avatar.png')
 
     # --- 1. Dibujar el Fondo ---
     # Esto es lo más importante. La imagen de fondo contiene todo el diseño.
-    try:
-        c.drawImage(background_path, 0, 0, width=CARD_WIDTH, height=CARD_HEIGHT)
-    except Exception:
+    if os.path.exists(background_path):
+        draw_shared_image(c, 'carnet_background', background_path, 0, 0, CARD_WIDTH, CARD_HEIGHT)
+    else:
         # Si el fondo no existe, dibuja un borde para que no quede vacío.
         c.setStrokeColorRGB(0.8, 0.8, 0.8)
         c.rect(0, 0, CARD_WIDTH, CARD_HEIGHT)
         c.drawCentredString(CARD_WIDTH / 2, CARD_HEIGHT / 2, "Fondo no encontrado")
 
     # --- 2. Colocar la Foto del Estudiante (en el recuadro superior) ---
-    PHOTO_SIZE = 3 * cm # Tamaño del área para la foto
     photo_x = (CARD_WIDTH - PHOTO_SIZE) / 2 # Centrado horizontal
     photo_y = 3.5 * cm # Posición vertical estimada desde abajo
-    
-    if os.path.exists(photo_path):
-        c.drawImage(photo_path, photo_x, photo_y, 
-                    width=PHOTO_SIZE, height=PHOTO_SIZE, 
-                    preserveAspectRatio=True, anchor='c', mask='auto')
+
+    if student.photo:
+        if photo_image:
+            c.drawImage(ImageReader(BytesIO(photo_image)), photo_x, photo_y,
+                        width=PHOTO_SIZE, height=PHOTO_SIZE,
+                        preserveAspectRatio=True, anchor='c', mask='auto')
+    else:
+        avatar_path = os.path.join(current_app.root_path, 'static/img/avatar.png')
+        if os.path.exists(avatar_path):
+            draw_shared_image(c, 'carnet_avatar', avatar_path, photo_x, photo_y, PHOTO_SIZE, PHOTO_SIZE,
+                              preserveAspectRatio=True, anchor='c', mask='auto')
 
     # --- 3. Colocar Nombre e ID (entre los dos recuadros) ---
     center_x = CARD_WIDTH / 2
@@ -68,47 +136,39 @@ def draw_vertical_card(c, student):
     c.drawCentredString(center_x, 2.65 * cm, f"{student.id}")
 
     # --- 4. Colocar el Código QR (en el recuadro inferior) ---
-    QR_SIZE = 2.4 * cm # Tamaño del área para el QR
     qr_x = (CARD_WIDTH - QR_SIZE) / 2 # Centrado horizontal
     qr_y = 0.2 * cm # Posición vertical estimada desde abajo
 
-    qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_L, box_size=10, border=1)
-    qr.add_data(student.qr_code_data)
-    qr.make(fit=True)
-    qr_img = qr.make_image(fill_color="black", back_color="white")
-    
-    qr_buffer = BytesIO()
-    qr_img.save(qr_buffer, format="PNG")
-    qr_buffer.seek(0)
-    
-    qr_reportlab_img = ImageReader(qr_buffer)
-    c.drawImage(qr_reportlab_img, qr_x, qr_y, width=QR_SIZE, height=QR_SIZE, preserveAspectRatio=True)
+    c.drawImage(ImageReader(BytesIO(qr_image)), qr_x, qr_y, width=QR_SIZE, height=QR_SIZE, preserveAspectRatio=True)
 
 
 def generate_single_card_pdf(student):
     """Genera un PDF para un solo estudiante con el nuevo diseño vertical."""
     buffer = BytesIO()
-    c = canvas.Canvas(buffer, pagesize=(CARD_WIDTH, CARD_HEIGHT))
+    c = canvas.Canvas(buffer, pagesize=(CARD_WIDTH, CARD_HEIGHT), pageCompression=1)
     draw_vertical_card(c, student)
     c.save()
     buffer.seek(0)
     return buffer
 
 
-def generate_bulk_cards_pdf(students):
+def generate_bulk_cards_pdf(students, progress=None):
     """
     Genera un PDF con todos los carnets, donde CADA PÁGINA es un carnet.
+    progress(n), si se indica, se llama tras dibujar cada carnet.
     """
     buffer = BytesIO()
     # 1. El canvas se crea con el tamaño de un solo carnet.
-    c = canvas.Canvas(buffer, pagesize=(CARD_WIDTH, CARD_HEIGHT))
-    
-    for student in students:
+    c = canvas.Canvas(buffer, pagesize=(CARD_WIDTH, CARD_HEIGHT), pageCompression=1)
+
+    for done, student in enumerate(students, start=1):
         # 2. Dibuja el carnet en la página actual.
         draw_vertical_card(c, student)
         # 3. Finaliza la página actual y crea una nueva para el siguiente carnet.
         c.showPage()
-                
+        if progress:
+            progress(done)
+
     c.save()
     buffer.seek(0)
     return buffer
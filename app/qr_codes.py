@@ -0,0 +1,69 @@
+import base64
+import hashlib
+import hmac
+from flask import current_app
+from app.cache import student_cache
+
+# Formato firmado: S1.<id estudiante>.<versión del carnet>.<firma>
+SIGNED_PREFIX = 'S1.'
+# Bytes de HMAC-SHA256 que se conservan: 72 bits, 12 caracteres en base64url
+SIGNATURE_BYTES = 9
+
+
+def _signature(student_id, card_version):
+    secret = current_app.config['SECRET_KEY'].encode('utf-8')
+    message = f'{student_id}.{card_version}'.encode('utf-8')
+    digest = hmac.new(secret, message, hashlib.sha256).digest()[:SIGNATURE_BYTES]
+    return base64.urlsafe_b64encode(digest).decode('ascii')
+
+
+def signed_payload(student_id, card_version):
+    """Contenido de un QR firmado con SECRET_KEY para el carnet indicado."""
+    return f'{SIGNED_PREFIX}{student_id}.{card_version}.{_signature(student_id, card_version)}'
+
+
+def qr_payload(student):
+    """
+    Contenido a imprimir en el QR del carnet: firmado si QR_SIGNED_PAYLOADS está
+    activo, o el UUID qr_code_data de siempre.
+    """
+    if current_app.config.get('QR_SIGNED_PAYLOADS'):
+        return signed_payload(student.id, student.card_version)
+    return student.qr_code_data
+
+
+def parse_signed_payload(qr_data):
+    """
+    Devuelve (student_id, card_version) si qr_data es un QR firmado con firma
+    válida, o None. No consulta la base de datos.
+    """
+    if not qr_data.startswith(SIGNED_PREFIX):
+        return None
+    try:
+        student_id, card_version, signature = qr_data[len(SIGNED_PREFIX):].rsplit('.', 2)
+        card_version = int(card_version)
+    except ValueError:
+        return None
+    if not hmac.compare_digest(signature, _signature(student_id, card_version)):
+        return None
+    return student_id, card_version
+
+
+def resolve_student(qr_data):
+    """
+    Resuelve el contenido de un QR a la entrada de student_cache del estudiante.
+
+    Los QR firmados se autentican con la firma y se buscan por clave primaria;
+    un carnet cuya versión ya no coincide está revocado. Los carnets antiguos
+    con UUID siguen funcionando con la búsqueda por qr_code_data.
+    """
+    if qr_data.startswith(SIGNED_PREFIX):
+        signed = parse_signed_payload(qr_data)
+        if signed is None:
+            return None
+        student_id, card_version = signed
+        student = student_cache.get_by_id(student_id)
+        if student is None or student['card_version'] != card_version:
+            return None
+        return student
+    return student_cache.get_by_qr(qr_data)
@@ -0,0 +1,227 @@
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from flask import g, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.sql import Select
+
+
+class RoutingSession(Session):
+    """
+    Sesión de Flask-SQLAlchemy que envía los SELECT a la réplica de lectura
+    cuando la vista lo pidió (decorador read_replica) y la réplica está al día.
+
+    Todo lo demás (INSERT/UPDATE/DELETE, flush, sesiones con cambios pendientes
+    y código marcado con on_primary()) sigue yendo a la base principal.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and isinstance(clause, Select) and not self._flushing
+                and not (self.new or self.dirty or self.deleted) and _replica_requested()):
+            engine = read_replica_state.engine_for_reads()
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _replica_requested():
+    return has_app_context() and g.get('read_replica', False) and not g.get('replica_pinned', 0)
+
+
+class ReadReplica:
+    """
+    Réplica de lectura opcional (REPLICA_DATABASE_URI). Se usa solo mientras su
+    retraso respecto a la principal no supere REPLICA_MAX_LAG_SECONDS; si está
+    atrasada o falla, las lecturas vuelven a la principal y se reintenta pasados
+    REPLICA_RETRY_SECONDS.
+
+    El retraso se estima comparando la salida más reciente (por clave primaria,
+    sin recorrer la tabla) en ambas bases, como mucho cada REPLICA_CHECK_SECONDS.
+    Un error de la base principal durante la comprobación no cuenta contra la réplica.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.engine = None
+        self.max_lag = 30
+        self.check_interval = 5
+        self.retry_interval = 30
+        self._lock = threading.Lock()
+        self._healthy = False
+        self._checked_at = 0.0
+        self._down_until = 0.0
+        self.lag_seconds = None
+        self.routed = 0
+        self.fallbacks = 0
+        self.errors = 0
+
+    def init_app(self, app):
+        self.dispose()
+        self.app = app
+        self.max_lag = app.config.get('REPLICA_MAX_LAG_SECONDS', self.max_lag)
+        self.check_interval = app.config.get('REPLICA_CHECK_SECONDS', self.check_interval)
+        self.retry_interval = app.config.get('REPLICA_RETRY_SECONDS', self.retry_interval)
+        uri = app.config.get('REPLICA_DATABASE_URI')
+        # Motor propio (no SQLALCHEMY_BINDS): las migraciones solo ven la base principal
+        self.engine = create_engine(uri, pool_pre_ping=True) if uri else None
+        if self.engine is not None:
+            event.listen(self.engine, 'handle_error', _flag_replica_error)
+        self._healthy = False
+        self._checked_at = 0.0
+        self._down_until = 0.0
+        self.lag_seconds = None
+        self.routed = self.fallbacks = self.errors = 0
+
+    def dispose(self):
+        if self.engine is not None:
+            self.engine.dispose()
+            self.engine = None
+
+    @property
+    def enabled(self):
+        return self.engine is not None
+
+    def engine_for_reads(self):
+        """Motor de la réplica si se puede usar ahora mismo, o None."""
+        if self.engine is None:
+            return None
+        if self.is_healthy():
+            self.routed += 1
+            return self.engine
+        self.fallbacks += 1
+        return None
+
+    def is_healthy(self):
+        now = time.monotonic()
+        with self._lock:
+            if now < self._down_until:
+                return False
+            if now - self._checked_at < self.check_interval:
+                return self._healthy
+            self._checked_at = now
+        try:
+            lag = self._measure_lag()
+        except _PrimaryUnavailable:
+            # Sin la principal no hay con qué comparar: se mantiene el último estado
+            with self._lock:
+                return self._healthy
+        with self._lock:
+            self.lag_seconds = lag
+            self._healthy = lag is not None and lag <= self.max_lag
+            if lag is None:
+                self._down_until = now + self.retry_interval
+            return self._healthy
+
+    def _measure_lag(self):
+        """
+        Segundos entre la última salida de la principal y la de la réplica (None si
+        la réplica falla). Lanza _PrimaryUnavailable si la que falla es la principal.
+        """
+        from app import db
+        try:
+            primary_last = _last_exit(db.engine)
+        except OperationalError as error:
+            raise _PrimaryUnavailable() from error
+        try:
+            replica_last = _last_exit(self.engine)
+        except OperationalError:
+            if has_app_context():
+                g.pop('replica_failed', None)  # ya se contó aquí; no es un error de la vista
+            self.errors += 1
+            return None
+        if primary_last is None or (replica_last is not None and replica_last.id >= primary_last.id):
+            return 0.0
+        if replica_last is None:
+            return float('inf')
+        return max((primary_last.timestamp - replica_last.timestamp).total_seconds(), 0.0)
+
+    def mark_down(self):
+        """Deja de usar la réplica durante REPLICA_RETRY_SECONDS (p. ej. tras un error)."""
+        with self._lock:
+            self.errors += 1
+            self._healthy = False
+            self._down_until = time.monotonic() + self.retry_interval
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'healthy': self._healthy and time.monotonic() >= self._down_until,
+            'lag_seconds': self.lag_seconds,
+            'max_lag_seconds': self.max_lag,
+            'routed': self.routed,
+            'fallbacks': self.fallbacks,
+            'errors': self.errors,
+        }
+
+
+read_replica_state = ReadReplica()
+
+
+class _PrimaryUnavailable(Exception):
+    """La base principal falló al medir el retraso de la réplica."""
+
+
+def _last_exit(engine):
+    """(id, timestamp) de la última salida según la clave primaria, o None."""
+    from app.models.exit_log import ExitLog
+    with engine.connect() as conn:
+        return conn.execute(
+            select(ExitLog.id, ExitLog.timestamp).order_by(ExitLog.id.desc()).limit(1)
+        ).first()
+
+
+def _flag_replica_error(context):
+    # Distingue en read_replica los errores de la réplica de los de la principal
+    if has_app_context():
+        g.replica_failed = True
+
+
+def read_replica(view):
+    """
+    Marca una vista de solo lectura (reportes, dashboard) para que sus consultas
+    usen la réplica. Si la réplica falla a mitad de la petición, se repite la
+    vista completa contra la base principal; los errores de la principal se
+    propagan sin marcar la réplica como caída.
+    """
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        # No se restablece al salir: las respuestas en streaming siguen leyendo después
+        g.read_replica = True
+        try:
+            return view(*args, **kwargs)
+        except OperationalError:
+            if not g.pop('replica_failed', False):
+                raise
+            from app import db
+            read_replica_state.mark_down()
+            db.session.rollback()
+            g.read_replica = False
+            return view(*args, **kwargs)
+    return wrapped
+
+
+@contextmanager
+def replica_reads():
+    """Igual que read_replica, para código fuera de una vista (p. ej. trabajos en segundo plano)."""
+    previous = g.get('read_replica', False)
+    g.read_replica = True
+    try:
+        yield
+    finally:
+        g.read_replica = previous
+
+
+@contextmanager
+def on_primary():
+    """Fuerza la base principal dentro del bloque aunque la vista use la réplica."""
+    if not has_app_context():
+        yield
+        return
+    g.replica_pinned = g.get('replica_pinned', 0) + 1
+    try:
+        yield
+    finally:
+        g.replica_pinned -= 1
@@ -0,0 +1,164 @@
+import base64
+import csv
+import json
+import zlib
+from io import StringIO
+from datetime import datetime
+from sqlalchemy import and_, func, or_, select
+from app import db
+from app.models.door import Door
+from app.models.exit_log import ExitLog
+from app.models.exit_stats import ExitStats
+from app.models.student import Student
+from app.models.user import User
+
+# Filas por página del reporte (HTML y /api/reports)
+REPORT_PAGE_SIZE = 100
+
+# Mapeo de los nombres de columnas a los objetos de SQLAlchemy
+SORTABLE_COLUMNS = {
+    'timestamp': ExitLog.timestamp,
+    'student': Student.name,
+    'course': Student.course,
+    'door': Door.name,
+    'operator': User.username
+}
+
+
+def parse_date_range(start_date_str, end_date_str):
+    """Convierte las fechas 'AAAA-MM-DD' del formulario en fechas locales de Colombia."""
+    start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
+    end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
+    return start_date, end_date
+
+
+def encode_cursor(sort_value, log_id):
+    """Cursor opaco con el valor de orden y el id de la última fila de la página."""
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps([sort_value, log_id], separators=(',', ':'), ensure_ascii=False)
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, sort_by):
+    """Inverso de encode_cursor. Lanza ValueError si el cursor no es válido."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        sort_value, log_id = json.loads(raw.decode('utf-8'))
+        if sort_by == 'timestamp':
+            sort_value = datetime.fromisoformat(sort_value)
+        elif not isinstance(sort_value, str):
+            raise ValueError('valor de orden inválido')
+        return sort_value, int(log_id)
+    except (TypeError, ValueError, UnicodeDecodeError, json.JSONDecodeError) as error:
+        raise ValueError(f'Cursor inválido: {error}') from error
+
+
+def report_page(start_date, end_date, sort_by='timestamp', direction='desc', after=None, limit=REPORT_PAGE_SIZE):
+    """
+    Una página del reporte de salidas con paginación por cursor (keyset).
+
+    Se ordena por (columna elegida, ExitLog.id): el id desempata filas con el
+    mismo valor, así que el orden es total y una página nunca repite ni salta
+    filas aunque haya muchos empates (p. ej. el mismo curso). El cursor `after`
+    es el que devolvió la página anterior. Devuelve (filas, cursor siguiente o None).
+    """
+    if sort_by not in SORTABLE_COLUMNS:
+        sort_by = 'timestamp'
+    sort_column = SORTABLE_COLUMNS[sort_by]
+    descending = direction != 'asc'
+
+    stmt = (
+        select(ExitLog.id, ExitLog.timestamp, Student.name, Student.course, Door.name, User.username,
+               sort_column.label('sort_value'))
+        .join(Student, ExitLog.student_id == Student.id)
+        .join(Door, ExitLog.door_id == Door.id)
+        .join(User, ExitLog.operator_id == User.id)
+        .where(ExitLog.local_date.between(start_date, end_date))
+    )
+    if after:
+        sort_value, last_id = decode_cursor(after, sort_by)
+        if descending:
+            stmt = stmt.where(or_(sort_column < sort_value, and_(sort_column == sort_value, ExitLog.id < last_id)))
+        else:
+            stmt = stmt.where(or_(sort_column > sort_value, and_(sort_column == sort_value, ExitLog.id > last_id)))
+    if descending:
+        stmt = stmt.order_by(sort_column.desc(), ExitLog.id.desc())
+    else:
+        stmt = stmt.order_by(sort_column.asc(), ExitLog.id.asc())
+
+    # Una fila extra indica si hay página siguiente sin contar todo el rango
+    result = db.session.execute(stmt.limit(limit + 1)).all()
+    rows = [
+        {
+            'id': log_id,
+            # El timestamp guardado ya es la hora de Colombia
+            'timestamp': timestamp.strftime('%Y-%m-%d %I:%M %p'),
+            'student': student_name,
+            'course': course,
+            'door': door_name,
+            'operator': username
+        } for log_id, timestamp, student_name, course, door_name, username, sort_value in result[:limit]
+    ]
+    next_cursor = None
+    if len(result) > limit:
+        last = result[limit - 1]
+        next_cursor = encode_cursor(last.sort_value, last.id)
+    return rows, next_cursor
+
+
+def report_total(start_date, end_date):
+    """Total de salidas del rango sumado del rollup exit_stats, sin recorrer exit_log."""
+    return db.session.execute(
+        select(func.coalesce(func.sum(ExitStats.count), 0))
+        .where(ExitStats.local_date.between(start_date, end_date))
+    ).scalar()
+
+
+# Encabezados del CSV exportado
+CSV_HEADER = ["Timestamp (Hora Colombia)", "ID Estudiante", "Nombre Estudiante", "Curso", "Puerta", "Operador"]
+
+
+def export_csv_chunks(start_date, end_date, chunk_size=5000):
+    """
+    Genera el CSV del rango por bloques de chunk_size filas. Se seleccionan solo
+    columnas (sin objetos ORM) y se leen con yield_per/stream_results, que en
+    MySQL usa un cursor del lado del servidor: la memoria no depende del tamaño
+    del rango y el encabezado sale antes de ejecutar la consulta.
+    """
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADER)
+    yield buffer.getvalue()
+
+    result = db.session.execute(
+        select(ExitLog.timestamp, Student.id, Student.name, Student.course, Door.name, User.username)
+        .join(Student, ExitLog.student_id == Student.id)
+        .join(Door, ExitLog.door_id == Door.id)
+        .join(User, ExitLog.operator_id == User.id)
+        .where(ExitLog.local_date.between(start_date, end_date))
+        .order_by(ExitLog.local_date, ExitLog.id)
+        .execution_options(yield_per=chunk_size, stream_results=True)
+    )
+    for partition in result.partitions():
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(
+            # El timestamp guardado ya es la hora de Colombia
+            (timestamp.strftime('%Y-%m-%d %I:%M %p'), student_id, name, course, door_name, username)
+            for timestamp, student_id, name, course, door_name, username in partition
+        )
+        yield buffer.getvalue()
+
+
+def gzip_stream(chunks, compresslevel=6):
+    """
+    Comprime un flujo de texto en formato gzip sin acumularlo. Cada bloque se
+    vacía con Z_SYNC_FLUSH para que el cliente reciba datos de inmediato.
+    """
+    compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, 31)  # wbits=31: cabecera gzip
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8')) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,32 @@
+import gzip
+import json
+from flask import request, Response
+
+
+def not_modified(etag):
+    """
+    Devuelve una respuesta 304 si el cliente ya tiene la versión identificada
+    por etag (cabecera If-None-Match), o None para que la vista genere el cuerpo.
+    """
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    return None
+
+
+def compact_json_response(payload, etag=None, min_gzip_size=1024):
+    """
+    Serializa payload sin espacios y lo comprime con gzip cuando el cliente lo
+    acepta y el cuerpo es lo bastante grande para que valga la pena.
+    """
+    body = json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    response = Response(mimetype='application/json')
+    if len(body) >= min_gzip_size and 'gzip' in request.headers.get('Accept-Encoding', ''):
+        body = gzip.compress(body, compresslevel=6)
+        response.headers['Content-Encoding'] = 'gzip'
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.set_data(body)
+    if etag:
+        response.set_etag(etag)
+    return response
@@ -0,0 +1,82 @@
+from flask import Blueprint, jsonify, request
+from flask_login import login_required
+from app.dashboard import colombia_today, dashboard_etag, dashboard_summary, exit_feed, EXIT_FEED_LIMIT, EXIT_FEED_OVERLAP
+from app.reports import SORTABLE_COLUMNS, parse_date_range, report_page, report_total
+from app.responses import not_modified, compact_json_response
+from app.replica import read_replica
+
+bp = Blueprint('api', __name__)
+
+@bp.route('/dashboard')
+@login_required
+@read_replica
+def dashboard():
+    """
+    Contadores y series de gráficas del dashboard. Responde 304 mientras no
+    haya salidas nuevas ni cambios de estudiantes o puertas.
+    """
+    today = colombia_today()
+    etag = dashboard_etag(today)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+    summary = dashboard_summary(today)
+    summary['exits_by_door_today'] = [
+        {'door_id': door_id, 'door_name': door_name, 'count': count}
+        for door_id, door_name, count in summary['exits_by_door_today']
+    ]
+    summary['date'] = today.isoformat()
+    return compact_json_response(summary, etag=etag)
+
+@bp.route('/exits')
+@login_required
+@read_replica
+def exits():
+    """
+    Salidas de hoy posteriores a since_id (el último id que vio el cliente),
+    más las de los últimos EXIT_FEED_OVERLAP ids anteriores para recoger las que
+    se confirmaron tarde: el cliente descarta por id las que ya tiene.
+    Si has_more es verdadero, el cliente vuelve a pedir con el nuevo last_id.
+    """
+    since_id = request.args.get('since_id', 0)
+    try:
+        since_id = int(since_id)
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'since_id inválido.'}), 400
+
+    today = colombia_today()
+    entries = exit_feed(since_id=max(since_id - EXIT_FEED_OVERLAP, 0), local_date=today)
+    return compact_json_response({
+        'date': today.isoformat(),
+        'exits': entries,
+        'last_id': max(entries[-1]['id'], since_id) if entries else since_id,
+        'has_more': len(entries) == EXIT_FEED_LIMIT
+    })
+
+@bp.route('/reports')
+@login_required
+@read_replica
+def reports():
+    """
+    Páginas del reporte de salidas para cargar la tabla bajo demanda.
+    Parámetros: start_date, end_date (AAAA-MM-DD), sort_by, direction y after
+    (el next_cursor de la página anterior). El total sale del rollup.
+    """
+    today_str = colombia_today().isoformat()
+    sort_by = request.args.get('sort_by', 'timestamp')
+    direction = request.args.get('direction', 'desc')
+    if sort_by not in SORTABLE_COLUMNS or direction not in ('asc', 'desc'):
+        return jsonify({'success': False, 'error': 'Orden inválido.'}), 400
+    try:
+        start_date, end_date = parse_date_range(request.args.get('start_date', today_str),
+                                                request.args.get('end_date', today_str))
+        rows, next_cursor = report_page(start_date, end_date, sort_by, direction,
+                                        after=request.args.get('after'))
+    except (ValueError, TypeError):
+        return jsonify({'success': False, 'error': 'Fechas o cursor inválidos.'}), 400
+
+    return compact_json_response({
+        'rows': rows,
+        'next_cursor': next_cursor,
+        'total': report_total(start_date, end_date)
+    })
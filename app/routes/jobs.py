@@ -0,0 +1,65 @@
+from flask import Blueprint, render_template, jsonify, abort, redirect, request, send_file, url_for
+from flask_login import login_required, current_user
+from app.jobs import job_runner, DONE
+from app.models.user import UserRole
+
+bp = Blueprint('jobs', __name__)
+
+
+def job_started(job_id):
+    """
+    Respuesta de los endpoints que lanzan un trabajo: 202 con el id para
+    clientes JSON, o redirección a la página de estado para el navegador.
+    """
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify({
+            'job_id': job_id,
+            'status_url': url_for('jobs.job_status', job_id=job_id),
+            'page_url': url_for('jobs.job_page', job_id=job_id)
+        }), 202
+    return redirect(url_for('jobs.job_page', job_id=job_id))
+
+
+def _get_own_job(job_id):
+    """Estado del trabajo si pertenece al usuario actual (o es administrador); si no, 404."""
+    state = job_runner.get(job_id)
+    if state is None or (state['owner_id'] != current_user.id and current_user.role != UserRole.ADMIN):
+        abort(404)
+    return state
+
+
+@bp.route('/<job_id>')
+@login_required
+def job_page(job_id):
+    state = _get_own_job(job_id)
+    return render_template('jobs/status.html', title='Trabajo en curso', job=state)
+
+
+@bp.route('/<job_id>/status')
+@login_required
+def job_status(job_id):
+    state = _get_own_job(job_id)
+    return jsonify({
+        'id': state['id'],
+        'kind': state['kind'],
+        'status': state['status'],
+        'progress': state['progress'],
+        'message': state['message'],
+        'error': state['error'],
+        'download_url': url_for('jobs.job_download', job_id=job_id)
+        if state['status'] == DONE and state['artifact'] else None
+    })
+
+
+@bp.route('/<job_id>/download')
+@login_required
+def job_download(job_id):
+    state = _get_own_job(job_id)
+    if state['status'] != DONE or not state['artifact']:
+        abort(404)
+    return send_file(
+        job_runner.artifact_path(state),
+        as_attachment=True,
+        download_name=state['download_name'],
+        mimetype=state['mimetype']
+    )
@@ -1,21 +1,24 @@
 import os
+import uuid
 import secrets
-import qrcode
-import zipfile
 from io import BytesIO
 from flask import (Blueprint, render_template, flash, redirect, url_for, 
-                   request, current_app, send_file, after_this_request)
+                   request, current_app, send_file, jsonify)
 
-from flask_login import login_required
+from flask_login import login_required, current_user
 from app import db
-from app.models.student import Student
+from app.models.student import Student, record_student_deletion
 from app.models.door import Door
+from app.cache import student_cache, door_cache
+from app.metrics import component_stats, request_metrics
+from app.jobs import job_runner
+from app.replica import read_replica
+from app.routes.jobs import job_started
 from app.forms import StudentForm, DoorForm, ImportStudentsForm, UploadPhotosForm
 from app.decorators import admin_required
 from werkzeug.utils import secure_filename
 import openpyxl
-from app.pdf_generator import generate_single_card_pdf, generate_bulk_cards_pdf
-import zipfile
+from app.pdf_generator import generate_single_card_pdf
 
 bp = Blueprint('management', __name__)
 
@@ -24,6 +27,7 @@ bp = Blueprint('management', __name__)
 @bp.route('/students')
 @login_required
 @admin_required
+@read_replica
 def list_students():
     students = Student.query.all()
     return render_template('management/students.html', students=students, title="Gestión de Estudiantes")
@@ -50,6 +54,7 @@ def add_student():
             authorized_to_leave=form.authorized_to_leave.data,
             photo=filename
         )
+        new_student.row_version = student_cache.invalidate()
         db.session.add(new_student)
         db.session.commit()
         flash('Estudiante añadido correctamente.', 'success')
@@ -77,10 +82,15 @@ def edit_student(id):
             form.photo.data.save(photo_path)
             student.photo = filename
 
+        version = student_cache.invalidate()
+        if form.id.data != student.id:
+            # Cambio de ID: los escáneres deben olvidar el ID anterior
+            record_student_deletion(student.id, version)
         student.id = form.id.data
         student.name = form.name.data
         student.course = form.course.data
         student.authorized_to_leave = form.authorized_to_leave.data
+        student.row_version = version
         db.session.commit()
         flash('Estudiante actualizado correctamente.', 'success')
         return redirect(url_for('management.list_students'))
@@ -101,6 +111,7 @@ def delete_student(id):
         if os.path.exists(photo_path):
             os.remove(photo_path)
     db.session.delete(student)
+    record_student_deletion(student.id, student_cache.invalidate())
     db.session.commit()
     flash('Estudiante eliminado correctamente.', 'success')
     return redirect(url_for('management.list_students'))
@@ -122,6 +133,7 @@ def add_door():
     if form.validate_on_submit():
         new_door = Door(name=form.name.data, status=form.status.data)
         db.session.add(new_door)
+        door_cache.invalidate()
         db.session.commit()
         flash('Puerta añadida correctamente.', 'success')
         return redirect(url_for('management.list_doors'))
@@ -136,6 +148,7 @@ def edit_door(id):
     if form.validate_on_submit():
         door.name = form.name.data
         door.status = form.status.data
+        door_cache.invalidate()
         db.session.commit()
         flash('Puerta actualizada correctamente.', 'success')
         return redirect(url_for('management.list_doors'))
@@ -150,6 +163,7 @@ def edit_door(id):
 def delete_door(id):
     door = Door.query.get_or_404(id)
     db.session.delete(door)
+    door_cache.invalidate()
     db.session.commit()
     flash('Puerta eliminada correctamente.', 'success')
     return redirect(url_for('management.list_doors'))
@@ -238,6 +252,9 @@ def import_students():
             return redirect(url_for('management.import_students'))
             
         if students_to_add:
+            version = student_cache.invalidate()
+            for new_student in students_to_add:
+                new_student.row_version = version
             db.session.bulk_save_objects(students_to_add)
             db.session.commit()
             flash(f'Se han importado {len(students_to_add)} estudiantes exitosamente.', 'success')
@@ -253,42 +270,13 @@ def import_students():
 @login_required
 @admin_required
 def download_qrs_zip():
-    students = Student.query.all()
-    if not students:
+    if not db.session.query(Student.id).first():
         flash("No hay estudiantes para generar códigos QR.", "warning")
         return redirect(url_for('management.list_students'))
 
-    temp_dir = current_app.config['TEMP_FOLDER']
-    zip_filename = os.path.join(temp_dir, 'codigos_qr_estudiantes.zip')
-
-    with zipfile.ZipFile(zip_filename, 'w') as zf:
-        for student in students:
-            qr_data = student.qr_code_data
-            qr_img = qrcode.make(qr_data)
-            
-            # Guardar la imagen QR en un buffer en memoria
-            img_buffer = BytesIO()
-            qr_img.save(img_buffer, format='PNG')
-            img_buffer.seek(0)
-            
-            # Nombre del archivo dentro del ZIP
-            filename_in_zip = f"{student.id}_{student.name.replace(' ', '_')}.png"
-            zf.writestr(filename_in_zip, img_buffer.getvalue())
-
-    @after_this_request
-    def cleanup(response):
-        try:
-            os.remove(zip_filename)
-        except Exception as e:
-            current_app.logger.error(f"Error al limpiar el archivo ZIP: {e}")
-        return response
-
-    return send_file(
-        zip_filename,
-        as_attachment=True,
-        download_name='codigos_qr_estudiantes.zip',
-        mimetype='application/zip'
-    )
+    job_id = job_runner.submit('qr_zip', current_user.id,
+                               download_name='codigos_qr_estudiantes.zip', mimetype='application/zip')
+    return job_started(job_id)
 
 @bp.route('/student/card/<string:id>')
 @login_required
@@ -304,23 +292,33 @@ def download_single_card(id):
         mimetype='application/pdf'
     )
 
+@bp.route('/student/card/revoke/<string:id>', methods=['POST'])
+@login_required
+@admin_required
+def revoke_card(id):
+    """
+    Revoca los carnets impresos del estudiante: incrementa la versión del carnet
+    (invalida el QR firmado) y cambia su UUID (invalida el QR antiguo).
+    """
+    student = Student.query.get_or_404(id)
+    student.card_version += 1
+    student.qr_code_data = str(uuid.uuid4())
+    student.row_version = student_cache.invalidate()
+    db.session.commit()
+    flash(f'Carnet de {student.name} revocado. Imprima un carnet nuevo.', 'success')
+    return redirect(url_for('management.list_students'))
+
 @bp.route('/students/cards/download/all')
 @login_required
 @admin_required
 def download_all_cards():
-    students = Student.query.order_by(Student.course, Student.name).all()
-    if not students:
+    if not db.session.query(Student.id).first():
         flash("No hay estudiantes para generar carnets.", "warning")
         return redirect(url_for('management.list_students'))
 
-    pdf_buffer = generate_bulk_cards_pdf(students)
-    
-    return send_file(
-        pdf_buffer,
-        as_attachment=True,
-        download_name='todos_los_carnets.pdf',
-        mimetype='application/pdf'
-    )
+    job_id = job_runner.submit('cards_pdf', current_user.id,
+                               download_name='todos_los_carnets.pdf', mimetype='application/pdf')
+    return job_started(job_id)
 
 # --- NUEVA RUTA PARA CARGAR FOTOS ---
 
@@ -330,63 +328,21 @@ def download_all_cards():
 def upload_photos():
     form = UploadPhotosForm()
     if form.validate_on_submit():
-        zip_file_storage = form.zip_file.data
-        photos_folder = os.path.join(current_app.config['UPLOAD_FOLDER'], 'photos')
+        # El ZIP se guarda en disco y las fotos se procesan en segundo plano
+        zip_path = job_runner.input_path('fotos.zip')
+        form.zip_file.data.save(zip_path)
+        job_id = job_runner.submit('photos_upload', current_user.id, params={'zip_path': zip_path})
+        return job_started(job_id)
         
-        updated_count = 0
-        failed_ids = []
-
-        try:
-            with zipfile.ZipFile(zip_file_storage, 'r') as zip_ref:
-                for filename in zip_ref.namelist():
-                    # Ignorar archivos de sistema de macOS y subdirectorios
-                    if filename.startswith('__MACOSX/') or filename.endswith('/'):
-                        continue
-                    
-                    # Extraer ID del estudiante del nombre del archivo
-                    base_filename = os.path.basename(filename)
-                    student_id, file_ext = os.path.splitext(base_filename)
-                    
-                    if file_ext.lower() not in ['.jpg', '.jpeg', '.png']:
-                        failed_ids.append(f"{base_filename} (formato no válido)")
-                        continue
+    return render_template('management/upload_photos.html', title="Cargar Fotos por Lote", form=form)
 
-                    student = Student.query.get(student_id)
-                    if student:
-                        # Eliminar foto anterior si existe
-                        if student.photo:
-                            old_photo_path = os.path.join(photos_folder, student.photo)
-                            if os.path.exists(old_photo_path):
-                                os.remove(old_photo_path)
-                        
-                        # Crear un nuevo nombre de archivo seguro
-                        random_hex = secrets.token_hex(8)
-                        new_filename = random_hex + file_ext.lower()
-                        
-                        # Extraer y guardar la nueva foto
-                        photo_data = zip_ref.read(filename)
-                        with open(os.path.join(photos_folder, new_filename), 'wb') as f:
-                            f.write(photo_data)
-                            
-                        # Actualizar la base de datos
-                        student.photo = new_filename
-                        updated_count += 1
-                    else:
-                        failed_ids.append(f"{student_id} (estudiante no encontrado)")
-            
-            if updated_count > 0:
-                db.session.commit()
-                flash(f'Se actualizaron exitosamente las fotos de {updated_count} estudiantes.', 'success')
-            
-            if failed_ids:
-                flash(f'No se pudieron procesar las siguientes fotos: {", ".join(failed_ids)}', 'danger')
-
-            if updated_count == 0 and not failed_ids:
-                flash('El archivo ZIP no contenía fotos válidas para estudiantes existentes.', 'info')
-
-            return redirect(url_for('management.list_students'))
+# --- Estadísticas internas ---
 
-        except zipfile.BadZipFile:
-            flash('Error: El archivo subido no es un ZIP válido.', 'danger')
-        
-    return render_template('management/upload_photos.html', title="Cargar Fotos por Lote", form=form)
\ No newline at end of file
+@bp.route('/stats')
+@login_required
+@admin_required
+def runtime_stats():
+    """Contadores de las cachés, la escritura agrupada y las peticiones de este proceso."""
+    stats = component_stats()
+    stats['requests'] = request_metrics.stats()
+    return jsonify(stats)
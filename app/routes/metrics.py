@@ -0,0 +1,16 @@
+from flask import Blueprint, Response
+from flask_login import login_required
+from app.decorators import admin_required
+from app.metrics import render_prometheus
+
+bp = Blueprint('metrics', __name__)
+
+@bp.route('/metrics')
+@login_required
+@admin_required
+def metrics():
+    """
+    Métricas de este proceso en formato de texto de Prometheus: latencia, consultas
+    SQL y tamaño de respuesta por endpoint, más los contadores de /manage/stats.
+    """
+    return Response(render_prometheus(), mimetype='text/plain; version=0.0.4')
@@ -1,11 +1,17 @@
 from flask import Blueprint, render_template, jsonify, request, current_app
 from flask_login import login_required, current_user
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from app import db
-from app.models.student import Student
-from app.models.door import Door, DoorStatus
-from app.models.exit_log import ExitLog, colombia_tz
+from app.models.student import Student, StudentTombstone
+from app.models.cache_version import current_version
+from app.models.door import DoorStatus
+from app.models.exit_log import colombia_tz
+from app.cache import student_cache, door_cache
+from app.exits import register_exit, register_exit_batch
+from app.responses import not_modified, compact_json_response
+from app.qr_codes import resolve_student, signed_payload
 from datetime import datetime, timedelta
-from pytz import utc
 
 bp = Blueprint('scanner', __name__)
 
@@ -14,74 +20,293 @@ bp = Blueprint('scanner', __name__)
 def scan_page():
     """Muestra la página principal de escaneo."""
     # Solo las puertas abiertas están disponibles para seleccionar
-    open_doors = Door.query.filter_by(status=DoorStatus.OPEN).all()
+    open_doors = door_cache.open_doors()
     return render_template('scanner/scanner.html', title="Escanear Salida", doors=open_doors)
 
+@bp.route('/scan/doors')
+@login_required
+def door_status():
+    """
+    Estado de las puertas para que el escáner detecte cierres sin recargar la página.
+    Pensado para consultarse con frecuencia: responde 304 si nada cambió.
+    """
+    doors = door_cache.all_doors()
+    etag = f'doors-{door_cache.version}'
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    response = jsonify({
+        'version': door_cache.version,
+        'doors': [{'id': door['id'], 'name': door['name'], 'status': door['status'].name} for door in doors]
+    })
+    response.set_etag(etag)
+    return response
+
 @bp.route('/scan/verify', methods=['POST'])
 @login_required
 def verify_qr():
     """API endpoint para verificar un código QR."""
-    data = request.get_json()
-    qr_code_data = data.get('qr_data')
+    data = request.get_json(silent=True)
+    qr_code_data = data.get('qr_data') if isinstance(data, dict) else None
     
-    if not qr_code_data:
+    if not qr_code_data or not isinstance(qr_code_data, str):
         return jsonify({'success': False, 'error': 'No se recibió el código QR.'}), 400
 
-    student = Student.query.filter_by(qr_code_data=qr_code_data).first()
+    student = resolve_student(qr_code_data)
 
     if not student:
         return jsonify({'success': False, 'error': 'Código QR no válido. Estudiante no encontrado.'}), 404
 
     return jsonify({
         'success': True,
-        'student': {
-            'id': student.id,
-            'name': student.name,
-            'course': student.course,
-            'photo_url': f"/static/uploads/photos/{student.photo}" if student.photo else "/static/img/avatar.png",
-            'authorized': student.authorized_to_leave
-        }
+        'student': _student_payload(student)
     })
 
 @bp.route('/scan/log', methods=['POST'])
 @login_required
 def log_exit():
     """API endpoint para registrar una salida confirmada con validación de cooldown."""
-    data = request.get_json()
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'success': False, 'error': 'Estudiante o puerta no válidos.'}), 400
     student_id = data.get('student_id')
     door_id = data.get('door_id')
 
-    student = Student.query.get(student_id)
-    door = Door.query.get(door_id)
+    student = student_cache.get_by_id(student_id)
+    door = door_cache.get(door_id)
 
     if not student or not door:
         return jsonify({'success': False, 'error': 'Estudiante o puerta no válidos.'}), 400
     
-    if door.status != DoorStatus.OPEN:
+    if door['status'] != DoorStatus.OPEN:
         return jsonify({'success': False, 'error': 'La puerta seleccionada está cerrada.'}), 400
 
-    cooldown_minutes = current_app.config.get('EXIT_LOG_COOLDOWN_MINUTES', 5)
-    last_log = ExitLog.query.filter_by(student_id=student_id).order_by(ExitLog.timestamp.desc()).first()
-
-    if last_log:
-        # --- CORRECCIÓN CLAVE ---
-        # El timestamp de la BD es naive, pero representa la hora de Colombia.
-        # Usamos .localize() para hacerlo "aware" de la zona horaria correcta.
-        last_log_timestamp_aware = colombia_tz.localize(last_log.timestamp)
-        
-        # Ahora sí, restamos dos datetimes que están en la misma zona horaria.
-        time_since_last_log = datetime.now(colombia_tz) - last_log_timestamp_aware
-        
-        if time_since_last_log.total_seconds() < (cooldown_minutes * 60):
-            error_message = f"Salida ya registrada para {student.name} hace menos de {cooldown_minutes} minutos."
-            return jsonify({'success': False, 'error': error_message}), 409
-    
-    new_log = ExitLog(
-        student_id=student_id,
-        door_id=door_id,
-        operator_id=current_user.id
-    )
-    db.session.add(new_log)
-    db.session.commit()
-    
-    return jsonify({'success': True, 'message': f'Salida de {student.name} registrada.'})
\ No newline at end of file
+    log_id, error_message = register_exit(student, door['id'], current_user.id)
+    if error_message:
+        return jsonify({'success': False, 'error': error_message}), 409
+
+    return jsonify({'success': True, 'message': f"Salida de {student['name']} registrada."})
+
+@bp.route('/scan/exit', methods=['POST'])
+@login_required
+def scan_exit():
+    """
+    API endpoint que verifica el QR y registra la salida en una sola petición.
+    Evita el segundo viaje de red (verify + log) durante la hora pico de salida.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        data = {}
+    qr_code_data = data.get('qr_data')
+    door_id = data.get('door_id')
+
+    if not qr_code_data or not isinstance(qr_code_data, str) or not door_id:
+        return jsonify({'success': False, 'error': 'No se recibió el código QR o la puerta.'}), 400
+
+    student = resolve_student(qr_code_data)
+    if not student:
+        return jsonify({'success': False, 'error': 'Código QR no válido. Estudiante no encontrado.'}), 404
+
+    student_payload = _student_payload(student)
+
+    if not student['authorized']:
+        return jsonify({'success': False, 'error': f"{student['name']} no está autorizado para salir.",
+                        'student': student_payload}), 403
+
+    door = door_cache.get(door_id)
+    if not door:
+        return jsonify({'success': False, 'error': 'Puerta no válida.', 'student': student_payload}), 400
+
+    if door['status'] != DoorStatus.OPEN:
+        return jsonify({'success': False, 'error': 'La puerta seleccionada está cerrada.',
+                        'student': student_payload}), 400
+
+    log_id, error_message = register_exit(student, door['id'], current_user.id)
+    if error_message:
+        return jsonify({'success': False, 'error': error_message, 'student': student_payload}), 409
+
+    return jsonify({
+        'success': True,
+        'message': f"Salida de {student['name']} registrada.",
+        'student': student_payload
+    })
+
+@bp.route('/scan/sync', methods=['POST'])
+@login_required
+def sync_exits():
+    """
+    API endpoint para sincronizar en bloque las salidas que el escáner guardó
+    sin conexión. Devuelve un resultado por elemento para que el dispositivo
+    pueda limpiar su cola.
+    """
+    data = request.get_json(silent=True)
+    items = data.get('exits') if isinstance(data, dict) else None
+    if not isinstance(items, list):
+        return jsonify({'success': False, 'error': 'Formato inválido: se esperaba la lista "exits".'}), 400
+
+    max_items = current_app.config.get('SCAN_SYNC_MAX_ITEMS', 1000)
+    if len(items) > max_items:
+        return jsonify({'success': False, 'error': f'Máximo {max_items} salidas por sincronización.'}), 413
+
+    # Las mismas reglas de /scan/exit: estudiante autorizado y puerta abierta
+    student_ids = {str(item.get('student_id')) for item in items if isinstance(item, dict)}
+    known_students = dict(db.session.execute(
+        select(Student.id, Student.authorized_to_leave).where(Student.id.in_(student_ids))
+    ).all()) if student_ids else {}
+    doors = {door['id']: door for door in door_cache.all_doors()}
+
+    results = []
+    entries = []
+    entry_positions = []
+    for item in items:
+        if not isinstance(item, dict):
+            results.append({'client_id': None, 'status': 'error', 'error': 'Elemento inválido.'})
+            continue
+        client_id = item.get('client_id')
+        error = None
+        timestamp = _parse_client_timestamp(item.get('timestamp'))
+        try:
+            door_id = int(item.get('door_id'))
+        except (TypeError, ValueError):
+            door_id = None
+
+        student_id = str(item.get('student_id'))
+        if student_id not in known_students:
+            error = 'Estudiante no válido.'
+        elif not known_students[student_id]:
+            error = 'El estudiante no está autorizado para salir.'
+        elif door_id not in doors:
+            error = 'Puerta no válida.'
+        elif doors[door_id]['status'] != DoorStatus.OPEN:
+            error = 'La puerta seleccionada está cerrada.'
+        elif timestamp is None:
+            error = 'Fecha y hora no válidas.'
+        elif item.get('operator_id') is not None and str(item.get('operator_id')) != str(current_user.id):
+            error = 'La salida fue registrada por otro operador.'
+
+        results.append({'client_id': client_id, 'status': 'error' if error else 'ok', 'error': error})
+        if not error:
+            entry_positions.append(len(results) - 1)
+            entries.append({
+                'student_id': student_id,
+                'door_id': door_id,
+                'operator_id': current_user.id,
+                'timestamp': timestamp,
+            })
+
+    try:
+        batch_errors = register_exit_batch(entries)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': 'Conflicto al guardar las salidas. Intente de nuevo.'}), 503
+
+    for position, error in zip(entry_positions, batch_errors):
+        if error:
+            results[position].update(status='duplicate', error=error)
+
+    accepted = sum(1 for result in results if result['status'] == 'ok')
+    return jsonify({'success': True, 'accepted': accepted, 'results': results})
+
+@bp.route('/scan/roster')
+@login_required
+def roster_snapshot():
+    """
+    Copia completa del roster en formato columnar para que el escáner verifique
+    los QR localmente. La ETag es la versión del roster, así que una recarga sin
+    cambios se responde con 304.
+    """
+    # Se lee la versión antes que las filas: si una escritura ocurre en medio, la
+    # siguiente petición de cambios la vuelve a enviar (aplicarla es idempotente).
+    version = current_version('students')
+    etag = f'roster-{version}'
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    rows = db.session.execute(_roster_select()).all()
+    return compact_json_response({'version': version, 'students': _roster_columns(rows)}, etag=etag)
+
+@bp.route('/scan/roster/delta')
+@login_required
+def roster_delta():
+    """
+    Estudiantes modificados y eliminados desde la versión indicada en ?since=.
+    El cliente aplica primero 'deleted' y luego 'students'.
+    """
+    since = request.args.get('since', type=int)
+    version = current_version('students')
+    if since is None or since < 0 or since > version:
+        return jsonify({'success': False, 'error': 'Versión de roster inválida.', 'version': version}), 400
+
+    etag = f'roster-{since}-{version}'
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    rows = db.session.execute(_roster_select().where(Student.row_version > since)).all()
+    deleted = db.session.execute(
+        select(StudentTombstone.student_id).where(StudentTombstone.version > since)
+    ).scalars().all()
+    return compact_json_response({
+        'version': version,
+        'since': since,
+        'students': _roster_columns(rows),
+        'deleted': deleted
+    }, etag=etag)
+
+# --- Funciones auxiliares compartidas por los endpoints de escaneo ---
+
+def _student_payload(student):
+    """Datos del estudiante (entrada de student_cache) que el escáner muestra en el modal."""
+    return {
+        'id': student['id'],
+        'name': student['name'],
+        'course': student['course'],
+        'photo_url': student['photo_url'],
+        'authorized': student['authorized']
+    }
+
+
+def _roster_select():
+    return select(Student.id, Student.name, Student.course, Student.photo,
+                  Student.authorized_to_leave, Student.qr_code_data, Student.card_version)
+
+def _roster_columns(rows):
+    """Formato columnar: una lista por campo, más compacto y fácil de comprimir que una lista de objetos."""
+    return {
+        'id': [row.id for row in rows],
+        'name': [row.name for row in rows],
+        'course': [row.course for row in rows],
+        'photo': [row.photo for row in rows],
+        'authorized': [1 if row.authorized_to_leave else 0 for row in rows],
+        'qr': [row.qr_code_data for row in rows],
+        # Contenido del QR firmado vigente, para verificar localmente los carnets nuevos
+        'card': [signed_payload(row.id, row.card_version) for row in rows],
+    }
+
+
+def _parse_client_timestamp(value):
+    """
+    Convierte la hora del dispositivo (ISO 8601 o epoch en milisegundos) a hora
+    de Colombia sin tzinfo, como se guarda en exit_log. Rechaza horas futuras y
+    las más antiguas que SCAN_SYNC_MAX_AGE_HOURS.
+    """
+    try:
+        if isinstance(value, (int, float)):
+            moment = datetime.fromtimestamp(value / 1000, tz=colombia_tz)
+        else:
+            moment = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+            if moment.tzinfo is None:
+                moment = colombia_tz.localize(moment)
+    except (TypeError, ValueError, OverflowError, OSError):
+        return None
+
+    tolerance = timedelta(minutes=current_app.config.get('SCAN_SYNC_CLOCK_SKEW_MINUTES', 5))
+    now = datetime.now(colombia_tz)
+    if moment > now + tolerance:
+        return None
+    if moment < now - timedelta(hours=current_app.config.get('SCAN_SYNC_MAX_AGE_HOURS', 72)):
+        return None
+    return moment.astimezone(colombia_tz).replace(tzinfo=None)
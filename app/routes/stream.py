@@ -0,0 +1,37 @@
+import queue
+from flask import Blueprint, Response, current_app
+from flask_login import login_required
+from app.live_feed import live_feed, format_event
+
+bp = Blueprint('stream', __name__)
+
+@bp.route('/exits')
+@login_required
+def exits():
+    """
+    Server-sent events con cada salida nueva ('exit') y los conteos del día por
+    puerta y curso ('counts'). Todas las conexiones del proceso comparten el
+    mismo publicador, así que cada espectador extra no añade consultas.
+    Nota: cada conexión ocupa un hilo; con gunicorn conviene --worker-class gthread.
+    """
+    heartbeat = current_app.config.get('LIVE_FEED_HEARTBEAT_SECONDS', 15)
+    subscriber = live_feed.subscribe()
+
+    def generate():
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                try:
+                    event, data = subscriber.get(timeout=heartbeat)
+                except queue.Empty:
+                    # Comentario de keep-alive: detecta clientes desconectados
+                    yield ': ping\n\n'
+                    continue
+                if event == 'close':
+                    return
+                yield format_event(event, data)
+        finally:
+            live_feed.unsubscribe(subscriber)
+
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
@@ -0,0 +1,166 @@
+import random
+import uuid
+from collections import Counter
+from datetime import datetime, time, timedelta
+from itertools import accumulate
+from sqlalchemy import insert, select
+from werkzeug.security import generate_password_hash
+from app import db
+from app.cache import student_cache, door_cache
+from app.models.door import Door, DoorStatus
+from app.models.exit_log import ExitLog, StudentLastExit, colombia_tz
+from app.models.exit_stats import ExitStats
+from app.models.student import Student
+from app.models.user import User, UserRole
+
+# Los registros sembrados llevan estos prefijos para no chocar con datos reales
+STUDENT_ID_PREFIX = 'SIM'
+DOOR_NAME_PREFIX = 'Puerta simulada'
+OPERATOR_PREFIX = 'operador_sim'
+
+FIRST_NAMES = ['Ana', 'Luis', 'Camila', 'Juan', 'Valentina', 'Santiago', 'Sofía', 'Mateo', 'Isabella',
+               'Samuel', 'Mariana', 'Sebastián', 'Gabriela', 'Nicolás', 'Daniela', 'Alejandro', 'Laura',
+               'Tomás', 'Sara', 'Martín', 'Paula', 'Emilio', 'Lucía', 'Andrés', 'Juliana', 'David']
+LAST_NAMES = ['Rojas', 'Pérez', 'Gómez', 'Rodríguez', 'Martínez', 'García', 'López', 'Hernández',
+              'González', 'Díaz', 'Moreno', 'Muñoz', 'Álvarez', 'Romero', 'Torres', 'Ramírez',
+              'Castro', 'Vargas', 'Ortiz', 'Jiménez', 'Suárez', 'Mejía', 'Restrepo', 'Cárdenas']
+COURSES = [f'{grade}{group}' for grade in range(1, 12) for group in 'ABC']
+
+# Distribución horaria: la mayoría sale alrededor de la hora de salida y el resto
+# durante la jornada (citas médicas, permisos)
+SCHOOL_START = time(7, 0)
+DISMISSAL = time(15, 0)
+PEAK_SHARE = 0.8
+PEAK_SIGMA_MINUTES = 12
+
+
+def school_days(end_date, count):
+    """Los últimos `count` días hábiles (lunes a viernes) hasta end_date, en orden."""
+    days = []
+    day = end_date
+    while len(days) < count:
+        if day.weekday() < 5:
+            days.append(day)
+        day -= timedelta(days=1)
+    return days[::-1]
+
+
+def exit_second_of_day(rng):
+    """Segundo del día de una salida según la distribución de la hora pico."""
+    start = SCHOOL_START.hour * 3600
+    dismissal = DISMISSAL.hour * 3600 + DISMISSAL.minute * 60
+    if rng.random() < PEAK_SHARE:
+        second = int(rng.gauss(dismissal, PEAK_SIGMA_MINUTES * 60))
+        return min(max(second, dismissal - 3600), dismissal + 3600)
+    return rng.randrange(start, dismissal - 1800)
+
+
+def seed_database(students=1000, exits=100000, doors=4, operators=5, days=180, seed=42,
+                  end_date=None, batch_size=10000, progress=None):
+    """
+    Genera datos sintéticos con inserts de Core en bloque y un commit por bloque.
+    El resultado depende solo de los parámetros (incluida end_date), no de la hora
+    en que se ejecuta. Devuelve un diccionario con lo que se insertó.
+
+    Falla con ValueError si ya hay datos sembrados: los IDs generados chocarían.
+    """
+    if exits and not (students and doors and operators):
+        raise ValueError('Para generar salidas hace falta al menos un estudiante, una puerta y un operador.')
+    rng = random.Random(seed)
+    end_date = end_date or datetime.now(colombia_tz).date()
+    progress = progress or (lambda message: None)
+
+    if db.session.execute(select(Student.id).where(Student.id.like(f'{STUDENT_ID_PREFIX}%')).limit(1)).first():
+        raise ValueError('La base ya tiene datos sembrados (estudiantes con ID SIM...).')
+
+    # Puertas y operadores: pocos, se insertan y se leen sus IDs
+    door_names = [f'{DOOR_NAME_PREFIX} {i + 1}' for i in range(doors)]
+    db.session.execute(insert(Door.__table__), [
+        {'name': name, 'status': DoorStatus.OPEN} for name in door_names
+    ])
+    door_ids = [door_id for door_id, in db.session.execute(
+        select(Door.id).where(Door.name.in_(door_names)).order_by(Door.id))]
+    # La puerta principal concentra la mayoría de salidas
+    door_weights = list(accumulate(1 / (i + 1) for i in range(doors)))
+
+    password_hash = generate_password_hash(OPERATOR_PREFIX)
+    operator_names = [f'{OPERATOR_PREFIX}_{i + 1}' for i in range(operators)]
+    db.session.execute(insert(User.__table__), [
+        {'username': name, 'email': f'{name}@example.com', 'password_hash': password_hash, 'role': UserRole.OPERATOR}
+        for name in operator_names
+    ])
+    operator_ids = [user_id for user_id, in db.session.execute(
+        select(User.id).where(User.username.in_(operator_names)).order_by(User.id))]
+    door_cache.invalidate()
+    db.session.commit()
+    progress(f'{doors} puertas y {operators} operadores creados.')
+
+    # Los estudiantes quedan en la versión nueva del roster, como una importación
+    version = student_cache.invalidate()
+    student_rows = []
+    for i in range(students):
+        student_rows.append({
+            'id': f'{STUDENT_ID_PREFIX}{i:07d}',
+            'name': f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}',
+            'course': COURSES[i * len(COURSES) // max(students, 1)],
+            'authorized_to_leave': rng.random() < 0.85,
+            'qr_code_data': str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            'card_version': 1,
+            'row_version': version,
+        })
+    for start in range(0, students, batch_size):
+        db.session.execute(insert(Student.__table__), student_rows[start:start + batch_size])
+        db.session.commit()
+    progress(f'{students} estudiantes creados.')
+
+    stats = Counter()
+    last_exit = {}
+    inserted = 0
+    batch = []
+    day_list = school_days(end_date, days)
+    per_day, extra = divmod(exits, len(day_list)) if day_list else (0, 0)
+    for day_number, day in enumerate(day_list):
+        count = per_day + (1 if day_number < extra else 0)
+        # Cada estudiante sale como mucho una vez al día mientras alcancen
+        picks = rng.sample(range(students), count) if count <= students else \
+            [rng.randrange(students) for _ in range(count)]
+        seconds = sorted(exit_second_of_day(rng) for _ in range(count))
+        midnight = datetime.combine(day, time())
+        for student_index, second in zip(picks, seconds):
+            student = student_rows[student_index]
+            timestamp = midnight + timedelta(seconds=second)
+            door_id = rng.choices(door_ids, cum_weights=door_weights)[0]
+            batch.append({
+                'timestamp': timestamp, 'local_date': day, 'student_id': student['id'],
+                'door_id': door_id, 'operator_id': rng.choice(operator_ids),
+            })
+            stats[(day, timestamp.hour, door_id, student['course'])] += 1
+            last_exit[student['id']] = timestamp
+            if len(batch) >= batch_size:
+                inserted += _flush_exits(batch)
+                progress(f'{inserted} de {exits} salidas...')
+    inserted += _flush_exits(batch)
+
+    # El rollup y el cooldown se escriben al final a partir de lo acumulado en memoria
+    stats_rows = [
+        {'local_date': local_date, 'hour': hour, 'door_id': door_id, 'course': course, 'count': count}
+        for (local_date, hour, door_id, course), count in stats.items()
+    ]
+    for start in range(0, len(stats_rows), batch_size):
+        db.session.execute(insert(ExitStats.__table__), stats_rows[start:start + batch_size])
+    last_rows = [{'student_id': student_id, 'timestamp': timestamp} for student_id, timestamp in last_exit.items()]
+    for start in range(0, len(last_rows), batch_size):
+        db.session.execute(insert(StudentLastExit.__table__), last_rows[start:start + batch_size])
+    db.session.commit()
+    progress(f'{inserted} salidas creadas.')
+    return {'students': students, 'doors': doors, 'operators': operators, 'exits': inserted, 'days': len(day_list)}
+
+
+def _flush_exits(batch):
+    if not batch:
+        return 0
+    db.session.execute(insert(ExitLog.__table__), batch)
+    db.session.commit()
+    count = len(batch)
+    batch.clear()
+    return count
@@ -0,0 +1,206 @@
+// Almacenamiento local (IndexedDB) del escáner para trabajar sin conexión.
+// - OfflineQueue guarda las salidas confirmadas mientras no hay red y las envía
+//   en bloque a /scan/sync cuando la conexión vuelve.
+// - Roster mantiene una copia del roster (/scan/roster y /scan/roster/delta)
+//   para verificar los QR localmente, con índices en memoria por QR y por ID.
+const OfflineStore = (() => {
+    const DB_NAME = 'control-salidas';
+    const DB_VERSION = 2;
+    const QUEUE_STORE = 'pending_exits';
+    const ROSTER_STORE = 'roster';
+    const META_STORE = 'meta';
+
+    let dbPromise = null;
+
+    function openDb() {
+        if (!dbPromise) {
+            dbPromise = new Promise((resolve, reject) => {
+                const request = indexedDB.open(DB_NAME, DB_VERSION);
+                request.onupgradeneeded = () => {
+                    const db = request.result;
+                    if (!db.objectStoreNames.contains(QUEUE_STORE)) {
+                        db.createObjectStore(QUEUE_STORE, { keyPath: 'client_id' });
+                    }
+                    if (!db.objectStoreNames.contains(ROSTER_STORE)) {
+                        db.createObjectStore(ROSTER_STORE, { keyPath: 'id' });
+                    }
+                    if (!db.objectStoreNames.contains(META_STORE)) {
+                        db.createObjectStore(META_STORE, { keyPath: 'key' });
+                    }
+                };
+                request.onsuccess = () => resolve(request.result);
+                request.onerror = () => reject(request.error);
+            });
+        }
+        return dbPromise;
+    }
+
+    // Ejecuta fn(store) en una transacción y resuelve con el resultado de la petición.
+    function withStore(storeName, mode, fn) {
+        return openDb().then(db => new Promise((resolve, reject) => {
+            const transaction = db.transaction(storeName, mode);
+            const request = fn(transaction.objectStore(storeName));
+            transaction.oncomplete = () => resolve(request ? request.result : undefined);
+            transaction.onerror = () => reject(transaction.error);
+        }));
+    }
+
+    // Igual que withStore pero con varios almacenes en una misma transacción.
+    function withStores(storeNames, mode, fn) {
+        return openDb().then(db => new Promise((resolve, reject) => {
+            const transaction = db.transaction(storeNames, mode);
+            fn(...storeNames.map(name => transaction.objectStore(name)));
+            transaction.oncomplete = () => resolve();
+            transaction.onerror = () => reject(transaction.error);
+        }));
+    }
+
+    function newClientId() {
+        if (self.crypto && crypto.randomUUID) {
+            return crypto.randomUUID();
+        }
+        return Date.now().toString(36) + Math.random().toString(36).slice(2);
+    }
+
+    const OfflineQueue = {
+        add(exit) {
+            const item = Object.assign({ client_id: newClientId(), timestamp: new Date().toISOString() }, exit);
+            return withStore(QUEUE_STORE, 'readwrite', store => store.put(item)).then(() => item);
+        },
+
+        all() {
+            return withStore(QUEUE_STORE, 'readonly', store => store.getAll());
+        },
+
+        count() {
+            return withStore(QUEUE_STORE, 'readonly', store => store.count());
+        },
+
+        remove(clientIds) {
+            return withStore(QUEUE_STORE, 'readwrite', store => {
+                clientIds.forEach(clientId => store.delete(clientId));
+                return null;
+            });
+        },
+
+        // Envía la cola en lotes. Los elementos con resultado (ok, duplicate o error)
+        // se eliminan; si la red o el servidor fallan, se conservan para el próximo intento.
+        async sync(batchSize = 500) {
+            const summary = { ok: 0, duplicate: 0, error: 0 };
+            const items = await this.all();
+            for (let start = 0; start < items.length; start += batchSize) {
+                const batch = items.slice(start, start + batchSize);
+                const response = await fetch('/scan/sync', {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({ exits: batch }),
+                });
+                if (!response.ok) {
+                    throw new Error(`Sincronización rechazada (${response.status})`);
+                }
+                const data = await response.json();
+                const processed = [];
+                data.results.forEach((result, index) => {
+                    summary[result.status] += 1;
+                    processed.push(batch[index].client_id);
+                });
+                await this.remove(processed);
+            }
+            return summary;
+        },
+    };
+
+    // Convierte el formato columnar del servidor en objetos como los de /scan/verify.
+    function columnsToStudents(columns) {
+        return columns.id.map((id, i) => ({
+            id: id,
+            name: columns.name[i],
+            course: columns.course[i],
+            photo_url: columns.photo[i] ? `/static/uploads/photos/${columns.photo[i]}` : '/static/img/avatar.png',
+            authorized: columns.authorized[i] === 1,
+            qr: columns.qr[i],
+            card: columns.card[i],
+        }));
+    }
+
+    const Roster = {
+        version: null,
+        byQr: new Map(),
+        byId: new Map(),
+
+        _index(students) {
+            this.byQr.clear();
+            this.byId.clear();
+            students.forEach(student => this._put(student));
+        },
+
+        // Se indexan el UUID (carnets antiguos) y el QR firmado vigente (carnets nuevos).
+        _put(student) {
+            this._delete(student.id);
+            this.byId.set(student.id, student);
+            this.byQr.set(student.qr, student);
+            if (student.card) { this.byQr.set(student.card, student); }
+        },
+
+        _delete(studentId) {
+            const previous = this.byId.get(studentId);
+            if (previous) {
+                this.byQr.delete(previous.qr);
+                if (previous.card) { this.byQr.delete(previous.card); }
+            }
+            this.byId.delete(studentId);
+        },
+
+        // Carga en memoria la copia guardada en IndexedDB.
+        async load() {
+            const [students, meta] = await Promise.all([
+                withStore(ROSTER_STORE, 'readonly', store => store.getAll()),
+                withStore(META_STORE, 'readonly', store => store.get('roster_version')),
+            ]);
+            this._index(students || []);
+            this.version = meta ? meta.value : null;
+        },
+
+        // Pide solo los cambios desde la versión local; sin versión local, la copia completa.
+        async refresh() {
+            if (this.version === null) {
+                return this._fullSync();
+            }
+            const response = await fetch(`/scan/roster/delta?since=${this.version}`);
+            if (response.status === 304) { return; }
+            if (response.status === 400) { return this._fullSync(); }
+            if (!response.ok) { throw new Error(`Roster no disponible (${response.status})`); }
+
+            const data = await response.json();
+            const changed = columnsToStudents(data.students);
+            await withStores([ROSTER_STORE, META_STORE], 'readwrite', (rosterStore, metaStore) => {
+                data.deleted.forEach(studentId => rosterStore.delete(studentId));
+                changed.forEach(student => rosterStore.put(student));
+                metaStore.put({ key: 'roster_version', value: data.version });
+            });
+            data.deleted.forEach(studentId => this._delete(studentId));
+            changed.forEach(student => this._put(student));
+            this.version = data.version;
+        },
+
+        async _fullSync() {
+            const response = await fetch('/scan/roster');
+            if (!response.ok) { throw new Error(`Roster no disponible (${response.status})`); }
+            const data = await response.json();
+            const students = columnsToStudents(data.students);
+            await withStores([ROSTER_STORE, META_STORE], 'readwrite', (rosterStore, metaStore) => {
+                rosterStore.clear();
+                students.forEach(student => rosterStore.put(student));
+                metaStore.put({ key: 'roster_version', value: data.version });
+            });
+            this._index(students);
+            this.version = data.version;
+        },
+
+        lookupQr(qrData) {
+            return this.byQr.get(qrData) || null;
+        },
+    };
+
+    return { OfflineQueue, Roster };
+})();
@@ -1,10 +1,11 @@
 // PASO IMPORTANTE: Incrementa la versión del caché.
 // Esto asegura que el navegador descarte el caché antiguo y cree uno nuevo.
-const CACHE_NAME = 'control-salidas-cache-v4'; 
+const CACHE_NAME = 'control-salidas-cache-v5'; 
 const urlsToCache = [
   '/',
   '/index',
   '/scan',
+  '/static/js/offline_store.js',
   '/static/img/logo.png',
   '/static/img/avatar.png'
 ];
@@ -38,7 +39,8 @@ self.addEventListener('activate', event => {
 
 // CAMBIO CLAVE: Nueva lógica para el evento 'fetch' (Network First)
 self.addEventListener('fetch', event => {
-  // Ignorar peticiones que no son GET (como POST)
+  // Ignorar peticiones que no son GET (como POST). Las salidas registradas sin
+  // conexión las guarda la página del escáner en IndexedDB (offline_store.js).
   if (event.request.method !== 'GET') {
     return;
   }
@@ -0,0 +1,138 @@
+import os
+import secrets
+import zipfile
+from io import BytesIO
+import qrcode
+from flask import current_app
+from sqlalchemy.orm import joinedload
+from app import db
+from app.cache import student_cache
+from app.jobs import job_handler
+from app.models.exit_log import ExitLog
+from app.models.student import Student
+from app.pdf_generator import generate_bulk_cards_pdf, generate_report_pdf
+from app.qr_codes import qr_payload
+from app.replica import replica_reads
+from app.reports import parse_date_range
+
+# Tareas que se ejecutan en los procesos del pool de app/jobs.py, dentro de un
+# contexto de aplicación. Cada una escribe su resultado en job.artifact_path()
+# y puede devolver un mensaje para la página de estado.
+
+
+def students_by_id(student_ids, chunk_size=500):
+    """Diccionario id -> Student para los IDs dados, consultados en bloques."""
+    student_ids = sorted(student_ids)
+    students = {}
+    for start in range(0, len(student_ids), chunk_size):
+        chunk = student_ids[start:start + chunk_size]
+        students.update((student.id, student) for student in Student.query.filter(Student.id.in_(chunk)))
+    return students
+
+
+@job_handler('report_pdf')
+def report_pdf(job, start_date, end_date):
+    """Reporte de salidas en PDF para el rango de fechas."""
+    start, end = parse_date_range(start_date, end_date)
+    with replica_reads():
+        logs = ExitLog.query.options(
+            joinedload(ExitLog.student),
+            joinedload(ExitLog.door),
+            joinedload(ExitLog.operator)
+        ).filter(ExitLog.local_date.between(start, end)).all()
+
+    job.progress(0, 1, f'Generando el reporte de {len(logs)} salidas...')
+    pdf_buffer = generate_report_pdf(logs, start_date, end_date)
+    with open(job.artifact_path('pdf'), 'wb') as f:
+        f.write(pdf_buffer.getvalue())
+
+
+@job_handler('cards_pdf')
+def cards_pdf(job):
+    """Carnets de todos los estudiantes, uno por página."""
+    students = Student.query.order_by(Student.course, Student.name).all()
+    pdf_buffer = generate_bulk_cards_pdf(
+        students, progress=lambda done: job.progress(done, len(students), f'Carnet {done} de {len(students)}'))
+    with open(job.artifact_path('pdf'), 'wb') as f:
+        f.write(pdf_buffer.getvalue())
+
+
+@job_handler('qr_zip')
+def qr_zip(job):
+    """ZIP con la imagen PNG del QR de cada estudiante."""
+    students = Student.query.all()
+    with zipfile.ZipFile(job.artifact_path('zip'), 'w') as zf:
+        for done, student in enumerate(students, start=1):
+            qr_img = qrcode.make(qr_payload(student))
+            img_buffer = BytesIO()
+            qr_img.save(img_buffer, format='PNG')
+
+            # Nombre del archivo dentro del ZIP
+            filename_in_zip = f"{student.id}_{student.name.replace(' ', '_')}.png"
+            zf.writestr(filename_in_zip, img_buffer.getvalue())
+            job.progress(done, len(students), f'QR {done} de {len(students)}')
+
+
+@job_handler('photos_upload')
+def photos_upload(job, zip_path):
+    """Actualiza las fotos de los estudiantes a partir del ZIP subido (un archivo por ID)."""
+    photos_folder = os.path.join(current_app.config['UPLOAD_FOLDER'], 'photos')
+    updated_students = []
+    failed_ids = []
+
+    try:
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            names = zip_ref.namelist()
+            # Una consulta por bloque de IDs en lugar de una por foto
+            students = students_by_id({os.path.splitext(os.path.basename(name))[0] for name in names})
+            for done, filename in enumerate(names, start=1):
+                job.progress(done, len(names))
+                # Ignorar archivos de sistema de macOS y subdirectorios
+                if filename.startswith('__MACOSX/') or filename.endswith('/'):
+                    continue
+
+                # Extraer ID del estudiante del nombre del archivo
+                base_filename = os.path.basename(filename)
+                student_id, file_ext = os.path.splitext(base_filename)
+
+                if file_ext.lower() not in ['.jpg', '.jpeg', '.png']:
+                    failed_ids.append(f"{base_filename} (formato no válido)")
+                    continue
+
+                student = students.get(student_id)
+                if not student:
+                    failed_ids.append(f"{student_id} (estudiante no encontrado)")
+                    continue
+
+                # Eliminar foto anterior si existe
+                if student.photo:
+                    old_photo_path = os.path.join(photos_folder, student.photo)
+                    if os.path.exists(old_photo_path):
+                        os.remove(old_photo_path)
+
+                # Extraer y guardar la nueva foto con un nombre seguro
+                new_filename = secrets.token_hex(8) + file_ext.lower()
+                with open(os.path.join(photos_folder, new_filename), 'wb') as f:
+                    f.write(zip_ref.read(filename))
+
+                student.photo = new_filename
+                updated_students.append(student)
+    except zipfile.BadZipFile:
+        raise ValueError('El archivo subido no es un ZIP válido.')
+    finally:
+        os.remove(zip_path)
+
+    if updated_students:
+        version = student_cache.invalidate()
+        for student in updated_students:
+            student.row_version = version
+        db.session.commit()
+
+    messages = []
+    if updated_students:
+        messages.append(f'Se actualizaron exitosamente las fotos de {len(updated_students)} estudiantes.')
+    if failed_ids:
+        messages.append(f'No se pudieron procesar las siguientes fotos: {", ".join(failed_ids)}')
+    if not messages:
+        messages.append('El archivo ZIP no contenía fotos válidas para estudiantes existentes.')
+    return ' '.join(messages)
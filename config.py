@@ -14,4 +14,51 @@ class Config:
     TEMP_FOLDER = os.path.join(basedir, 'temp')
      # Tiempo mínimo en minutos entre registros de salida para el mismo estudiante
     EXIT_LOG_COOLDOWN_MINUTES = 60
-    MAX_CONTENT_LENGTH = 50 * 1024 * 1024
\ No newline at end of file
+    MAX_CONTENT_LENGTH = 50 * 1024 * 1024
+    # Escritura agrupada de salidas (group commit) para la hora pico; desactivada por defecto
+    EXIT_LOG_WRITE_BEHIND = os.environ.get('EXIT_LOG_WRITE_BEHIND', '0').lower() in ('1', 'true', 'yes')
+    EXIT_LOG_BATCH_MAX_ROWS = int(os.environ.get('EXIT_LOG_BATCH_MAX_ROWS', 50))
+    EXIT_LOG_FLUSH_INTERVAL_MS = int(os.environ.get('EXIT_LOG_FLUSH_INTERVAL_MS', 20))
+    EXIT_LOG_WRITE_TIMEOUT_SECONDS = 10
+    # Feed en vivo del dashboard (/stream/exits): frecuencia de consulta por proceso y keep-alive
+    LIVE_FEED_POLL_SECONDS = 1
+    LIVE_FEED_HEARTBEAT_SECONDS = 15
+    # Exportación CSV en streaming: filas por bloque y compresión gzip si el navegador la acepta
+    CSV_EXPORT_CHUNK_SIZE = 5000
+    CSV_EXPORT_GZIP = True
+    # Trabajos en segundo plano (PDF, ZIP de QR, fotos): procesos del pool y vida de los resultados
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+    JOB_TTL_SECONDS = 3600
+    # Aislamiento de peticiones por clase (límites por proceso). El escáner nunca
+    # espera; las pesadas fallan rápido con 503 + Retry-After si el cupo está lleno.
+    HEAVY_REQUEST_CONCURRENCY = int(os.environ.get('HEAVY_REQUEST_CONCURRENCY', 2))
+    STREAM_MAX_CONNECTIONS = int(os.environ.get('STREAM_MAX_CONNECTIONS', 50))
+    # Pool compartido por el resto de peticiones; dejarlo por debajo de los hilos del
+    # worker (--threads de gunicorn) reserva capacidad para el escáner. Vacío = sin
+    # límite: la reserva para el escáner queda inactiva hasta configurarlo.
+    GENERAL_REQUEST_CONCURRENCY = int(os.environ.get('GENERAL_REQUEST_CONCURRENCY', 0)) or None
+    GENERAL_REQUEST_QUEUE_SECONDS = 10
+    BUSY_RETRY_AFTER_SECONDS = 5
+    # Réplica de lectura opcional para reportes y dashboard (vacío = todo va a la principal).
+    # Si su retraso supera REPLICA_MAX_LAG_SECONDS o falla, se lee de la principal.
+    REPLICA_DATABASE_URI = os.environ.get('REPLICA_DATABASE_URI') or None
+    REPLICA_MAX_LAG_SECONDS = float(os.environ.get('REPLICA_MAX_LAG_SECONDS', 30))
+    REPLICA_CHECK_SECONDS = 5
+    REPLICA_RETRY_SECONDS = 30
+    # Peticiones más lentas que esto se escriben en el log con sus consultas SQL
+    SLOW_REQUEST_MS = int(os.environ.get('SLOW_REQUEST_MS', 500))
+    SLOW_REQUEST_MAX_STATEMENTS = 50
+    # Sincronización de salidas guardadas sin conexión por el escáner
+    SCAN_SYNC_MAX_ITEMS = 1000
+    SCAN_SYNC_CLOCK_SKEW_MINUTES = 5
+    # Antigüedad máxima de una salida sincronizada: evita registrar salidas con fecha atrasada
+    SCAN_SYNC_MAX_AGE_HOURS = int(os.environ.get('SCAN_SYNC_MAX_AGE_HOURS', 72))
+    # Imprimir en los carnets QR firmados (ID + versión + HMAC con SECRET_KEY) en lugar del UUID.
+    # La verificación acepta ambos formatos, así que los carnets antiguos siguen siendo válidos.
+    QR_SIGNED_PAYLOADS = os.environ.get('QR_SIGNED_PAYLOADS', '0').lower() in ('1', 'true', 'yes')
+    # Caché en memoria de estudiantes para el escáner (entradas por proceso)
+    STUDENT_CACHE_SIZE = int(os.environ.get('STUDENT_CACHE_SIZE', 5000))
+    # Vida máxima de un usuario en la caché de flask-login (load_user)
+    USER_CACHE_TTL_SECONDS = int(os.environ.get('USER_CACHE_TTL_SECONDS', 60))
+    # Cada cuántos segundos un proceso comprueba si otro invalidó sus cachés
+    CACHE_VERSION_CHECK_SECONDS = float(os.environ.get('CACHE_VERSION_CHECK_SECONDS', 5))
\ No newline at end of file
@@ -0,0 +1,29 @@
+"""Add cache_version table
+
+Revision ID: 3b9c1d7e4a20
+Revises: e297f1374a78
+Create Date: 2026-10-18 09:12:04.118342
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b9c1d7e4a20'
+down_revision = 'e297f1374a78'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    cache_version = op.create_table('cache_version',
+    sa.Column('name', sa.String(length=32), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.bulk_insert(cache_version, [{'name': 'students', 'version': 0}])
+
+
+def downgrade():
+    op.drop_table('cache_version')
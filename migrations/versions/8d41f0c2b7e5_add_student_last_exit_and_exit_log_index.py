@@ -0,0 +1,40 @@
+"""Add student_last_exit table and exit_log (student_id, timestamp) index
+
+Revision ID: 8d41f0c2b7e5
+Revises: 3b9c1d7e4a20
+Create Date: 2026-10-18 10:03:51.402776
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d41f0c2b7e5'
+down_revision = '3b9c1d7e4a20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('exit_log', schema=None) as batch_op:
+        batch_op.create_index('ix_exit_log_student_id_timestamp', ['student_id', 'timestamp'], unique=False)
+
+    op.create_table('student_last_exit',
+    sa.Column('student_id', sa.String(length=10), nullable=False),
+    sa.Column('timestamp', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['student_id'], ['student.id'], ),
+    sa.PrimaryKeyConstraint('student_id')
+    )
+
+    # Poblar la última salida de cada estudiante a partir del historial existente
+    op.execute(
+        'INSERT INTO student_last_exit (student_id, timestamp) '
+        'SELECT student_id, MAX(timestamp) FROM exit_log GROUP BY student_id'
+    )
+
+
+def downgrade():
+    op.drop_table('student_last_exit')
+    with op.batch_alter_table('exit_log', schema=None) as batch_op:
+        batch_op.drop_index('ix_exit_log_student_id_timestamp')
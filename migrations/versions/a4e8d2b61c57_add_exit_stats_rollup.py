@@ -0,0 +1,57 @@
+"""Add exit_stats rollup table for the dashboard
+
+Revision ID: a4e8d2b61c57
+Revises: f17b3a5c9e02
+Create Date: 2026-10-18 12:41:09.518203
+
+"""
+from collections import Counter
+from alembic import op
+import sqlalchemy as sa
+import pytz
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4e8d2b61c57'
+down_revision = 'f17b3a5c9e02'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    exit_stats = op.create_table('exit_stats',
+    sa.Column('local_date', sa.Date(), nullable=False),
+    sa.Column('hour', sa.SmallInteger(), autoincrement=False, nullable=False),
+    sa.Column('door_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('course', sa.String(length=64), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['door_id'], ['door.id'], ),
+    sa.PrimaryKeyConstraint('local_date', 'hour', 'door_id', 'course')
+    )
+
+    # Poblar el rollup con el historial existente. Se agrupa en Python porque
+    # las funciones de fecha/hora difieren entre SQLite y MySQL; los timestamps
+    # ya están guardados en hora de Colombia.
+    exit_log = sa.table('exit_log', sa.column('timestamp', sa.DateTime()), sa.column('student_id'), sa.column('door_id'))
+    student = sa.table('student', sa.column('id'), sa.column('course'))
+    colombia_tz = pytz.timezone('America/Bogota')
+
+    counts = Counter()
+    result = op.get_bind().execute(
+        sa.select(exit_log.c.timestamp, exit_log.c.door_id, student.c.course)
+        .select_from(exit_log.join(student, exit_log.c.student_id == student.c.id))
+    )
+    for timestamp, door_id, course in result:
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone(colombia_tz)
+        counts[(timestamp.date(), timestamp.hour, door_id, course)] += 1
+
+    if counts:
+        op.bulk_insert(exit_stats, [
+            {'local_date': local_date, 'hour': hour, 'door_id': door_id, 'course': course, 'count': count}
+            for (local_date, hour, door_id, course), count in counts.items()
+        ])
+
+
+def downgrade():
+    op.drop_table('exit_stats')
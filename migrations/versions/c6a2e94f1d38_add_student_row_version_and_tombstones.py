@@ -0,0 +1,40 @@
+"""Add student row_version and student_tombstone for roster delta sync
+
+Revision ID: c6a2e94f1d38
+Revises: 8d41f0c2b7e5
+Create Date: 2026-10-18 11:27:40.551903
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6a2e94f1d38'
+down_revision = '8d41f0c2b7e5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('student', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('row_version', sa.Integer(), server_default='0', nullable=False))
+        batch_op.create_index(batch_op.f('ix_student_row_version'), ['row_version'], unique=False)
+
+    op.create_table('student_tombstone',
+    sa.Column('student_id', sa.String(length=10), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('student_id')
+    )
+    with op.batch_alter_table('student_tombstone', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_student_tombstone_version'), ['version'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('student_tombstone', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_student_tombstone_version'))
+
+    op.drop_table('student_tombstone')
+    with op.batch_alter_table('student', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_student_row_version'))
+        batch_op.drop_column('row_version')
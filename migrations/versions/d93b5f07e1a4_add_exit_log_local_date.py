@@ -0,0 +1,45 @@
+"""Add indexed exit_log.local_date column
+
+Revision ID: d93b5f07e1a4
+Revises: a4e8d2b61c57
+Create Date: 2026-10-18 13:27:44.061935
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd93b5f07e1a4'
+down_revision = 'a4e8d2b61c57'
+branch_labels = None
+depends_on = None
+
+# Filas por UPDATE al poblar la columna, para que cada sentencia bloquee un rango acotado
+BACKFILL_BATCH_SIZE = 5000
+
+
+def upgrade():
+    with op.batch_alter_table('exit_log', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('local_date', sa.Date(), nullable=True))
+
+    # El timestamp ya está guardado en hora de Colombia, así que DATE() da la
+    # fecha local tanto en SQLite como en MySQL. Se recorre por rangos de id.
+    bind = op.get_bind()
+    max_id = bind.execute(sa.text('SELECT MAX(id) FROM exit_log')).scalar() or 0
+    for start in range(0, max_id + 1, BACKFILL_BATCH_SIZE):
+        bind.execute(
+            sa.text('UPDATE exit_log SET local_date = DATE(timestamp) '
+                    'WHERE local_date IS NULL AND id >= :start AND id < :end'),
+            {'start': start, 'end': start + BACKFILL_BATCH_SIZE}
+        )
+
+    with op.batch_alter_table('exit_log', schema=None) as batch_op:
+        batch_op.alter_column('local_date', existing_type=sa.Date(), nullable=False)
+        batch_op.create_index(batch_op.f('ix_exit_log_local_date'), ['local_date'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('exit_log', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_exit_log_local_date'))
+        batch_op.drop_column('local_date')
@@ -0,0 +1,26 @@
+"""Add student card_version for signed QR payloads
+
+Revision ID: f17b3a5c9e02
+Revises: c6a2e94f1d38
+Create Date: 2026-10-18 12:40:16.209835
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f17b3a5c9e02'
+down_revision = 'c6a2e94f1d38'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('student', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('card_version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('student', schema=None) as batch_op:
+        batch_op.drop_column('card_version')
@@ -0,0 +1,148 @@
+import pytest
+from config import Config
+from app import create_app, db
+from app.models.user import User, UserRole
+from app.models.student import Student
+from app.models.door import Door, DoorStatus
+
+
+def create_test_app(tmp_path, **overrides):
+    """
+    Aplicación de pruebas con una base de datos SQLite temporal en tmp_path,
+    ya creada y con los datos básicos. overrides reemplaza valores de la configuración.
+    """
+    class TestConfig(Config):
+        TESTING = True
+        WTF_CSRF_ENABLED = False
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'test.db')
+        UPLOAD_FOLDER = str(tmp_path / 'uploads')
+        TEMP_FOLDER = str(tmp_path / 'temp')
+
+    for name, value in overrides.items():
+        setattr(TestConfig, name, value)
+    flask_app = create_app(TestConfig)
+    with flask_app.app_context():
+        db.create_all()
+        seed_basic_data()
+    return flask_app
+
+
+def close_test_app(flask_app):
+    with flask_app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def app(tmp_path):
+    """
+    Aplicación de pruebas con una base de datos SQLite temporal.
+    """
+    flask_app = create_test_app(tmp_path)
+    yield flask_app
+    close_test_app(flask_app)
+
+
+def seed_basic_data():
+    """Crea un administrador, un operador, dos puertas y dos estudiantes."""
+    admin = User(username='admin', email='admin@example.com', role=UserRole.ADMIN)
+    admin.set_password('admin')
+    operator = User(username='operador', email='operador@example.com', role=UserRole.OPERATOR)
+    operator.set_password('operador')
+    db.session.add_all([
+        admin,
+        operator,
+        Door(id=1, name='Puerta Principal', status=DoorStatus.OPEN),
+        Door(id=2, name='Salida Patio', status=DoorStatus.CLOSED),
+        Student(id='1001', name='Ana Rojas', course='9B', authorized_to_leave=True, qr_code_data='qr-1001'),
+        Student(id='1002', name='Luis Pérez', course='8A', authorized_to_leave=False, qr_code_data='qr-1002'),
+    ])
+    db.session.commit()
+
+
+def seed_exit_logs(count, students=20, days=1):
+    """
+    Agrega `students` estudiantes y `count` salidas repartidas entre ellos, las
+    dos puertas y los dos operadores durante los últimos `days` días, con inserts
+    de Core en bloque, y reconstruye el rollup. Devuelve (primer día, último día)
+    como AAAA-MM-DD. Debe llamarse dentro de un contexto de aplicación.
+    """
+    from datetime import datetime, timedelta
+    from sqlalchemy import insert
+    from app.models.exit_log import ExitLog, colombia_tz
+    from app.models.exit_stats import rebuild_exit_stats
+
+    existing = Student.query.count()
+    ids = [f'S{existing + i:05d}' for i in range(students)]
+    db.session.execute(insert(Student.__table__), [
+        {'id': student_id, 'name': f'Estudiante {student_id}', 'course': f'{6 + i % 6}{"ABC"[i % 3]}',
+         'authorized_to_leave': True, 'qr_code_data': f'qr-{student_id}', 'card_version': 1, 'row_version': 0}
+        for i, student_id in enumerate(ids)
+    ])
+    last_day = datetime.now(colombia_tz).replace(hour=7, minute=0, second=0, microsecond=0, tzinfo=None)
+    first_day = last_day - timedelta(days=days - 1)
+    per_day = -(-count // days)
+    for offset in range(0, count, 10000):
+        db.session.execute(insert(ExitLog.__table__), [
+            {'timestamp': first_day + timedelta(days=i // per_day, seconds=(i % per_day) % 36000),
+             'student_id': ids[i % students], 'door_id': 1 + i % 2, 'operator_id': 1 + i % 2}
+            for i in range(offset, min(offset + 10000, count))
+        ])
+    rebuild_exit_stats()
+    db.session.commit()
+    return first_day.strftime('%Y-%m-%d'), last_day.strftime('%Y-%m-%d')
+
+
+def login(client, username, password):
+    return client.post('/auth/login', data={'username': username, 'password': password})
+
+
+def authorize_student(app, student_id):
+    """Autoriza la salida de un estudiante (1002 empieza sin autorización)."""
+    with app.app_context():
+        db.session.get(Student, student_id).authorized_to_leave = True
+        db.session.commit()
+
+
+@pytest.fixture
+def operator_client(app):
+    """Cliente de pruebas con la sesión del operador iniciada."""
+    client = app.test_client()
+    login(client, 'operador', 'operador')
+    return client
+
+
+@pytest.fixture
+def admin_client(app):
+    """Cliente de pruebas con la sesión del administrador iniciada."""
+    client = app.test_client()
+    login(client, 'admin', 'admin')
+    return client
+
+
+@pytest.fixture
+def sql_counter(app):
+    """
+    Cuenta las sentencias SQL que se ejecutan contra el motor de la aplicación
+    (o el de otra aplicación de pruebas, si se pasa como argumento).
+    Uso: with sql_counter() as statements: ...; len(statements)
+    """
+    from contextlib import contextmanager
+    from sqlalchemy import event
+
+    @contextmanager
+    def count(target_app=None):
+        with (target_app or app).app_context():
+            engine = db.engine
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+    return count
@@ -0,0 +1,315 @@
+"""
+Generador de carga de la hora de salida contra un servidor en marcha.
+
+Simula K puertas, cada una con un operador que inicia sesión por /auth/login
+(con el token CSRF del formulario) y atiende en orden los estudiantes que
+llegan a su puerta: POST /scan/verify y, si está autorizado, POST /scan/log.
+Las llegadas siguen un proceso de Poisson con la tasa total indicada; una
+fracción son reescaneos de estudiantes que ya salieron, que deben responder
+409 (cooldown).
+
+Uso, con la aplicación corriendo (gunicorn o flask run) y datos de prueba:
+    flask admin seed --students 5000 --exits 0 --doors 8 --operators 8
+    python test/load_scanner.py --url http://127.0.0.1:5000 --doors 4 --rate 20 --duration 60
+
+Al terminar muestra p50/p95/p99 por endpoint, el rendimiento, la tasa de 409
+y los errores. La espera en cola mide cuánto se atrasan las puertas: si su p95
+crece al subir --doors o --rate, el servidor ya no da abasto. Los estudiantes
+que salieron en los últimos EXIT_LOG_COOLDOWN_MINUTES (de una ejecución
+anterior o sembrados para hoy) también responden 409.
+"""
+import argparse
+import http.client
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from http.cookies import SimpleCookie
+from queue import Queue
+from urllib.parse import urlencode, urlparse
+
+CSRF_PATTERN = re.compile(rb'name="csrf_token"[^>]*value="([^"]+)"')
+
+
+class ScannerClient:
+    """Conexión HTTP persistente con sus cookies: el navegador de un operador."""
+
+    def __init__(self, base_url, timeout=30):
+        parsed = urlparse(base_url)
+        self.https = parsed.scheme == 'https'
+        self.host = parsed.hostname
+        self.port = parsed.port or (443 if self.https else 80)
+        self.timeout = timeout
+        self.cookies = {}
+        self._connection = None
+
+    def request(self, method, path, body=None, headers=None):
+        """Devuelve (estado, cabeceras, cuerpo). Reconecta una vez si el servidor cerró el keep-alive."""
+        headers = dict(headers or {})
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{name}={value}' for name, value in self.cookies.items())
+        for attempt in range(2):
+            if self._connection is None:
+                connection_class = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+                self._connection = connection_class(self.host, self.port, timeout=self.timeout)
+            try:
+                self._connection.request(method, path, body=body, headers=headers)
+                response = self._connection.getresponse()
+                data = response.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                self.close()
+                if attempt:
+                    raise
+        for header in response.headers.get_all('Set-Cookie') or []:
+            cookie = SimpleCookie()
+            cookie.load(header)
+            self.cookies.update((name, morsel.value) for name, morsel in cookie.items())
+        if response.getheader('Connection', '').lower() == 'close':
+            self.close()
+        return response.status, response.headers, data
+
+    def post_json(self, path, payload):
+        status, _, data = self.request('POST', path, json.dumps(payload), {'Content-Type': 'application/json'})
+        return status, data
+
+    def get_json(self, path):
+        status, _, data = self.request('GET', path)
+        if status != 200:
+            raise RuntimeError(f'GET {path} respondió {status}')
+        return json.loads(data)
+
+    def login(self, username, password):
+        status, _, page = self.request('GET', '/auth/login')
+        if status != 200:
+            raise RuntimeError(f'GET /auth/login respondió {status}')
+        form = {'username': username, 'password': password}
+        match = CSRF_PATTERN.search(page)
+        if match:
+            form['csrf_token'] = match.group(1).decode()
+        status, headers, _ = self.request('POST', '/auth/login', urlencode(form),
+                                          {'Content-Type': 'application/x-www-form-urlencoded'})
+        # Un inicio fallido también redirige, pero de vuelta al formulario
+        if status != 302 or '/auth/login' in headers.get('Location', ''):
+            raise RuntimeError(f"No se pudo iniciar sesión como '{username}'.")
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+class Recorder:
+    """Latencias y resultados de todos los hilos."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.errors = Counter()
+        self.queue_waits = []
+        self.scans = 0
+
+    def request(self, endpoint, seconds, status):
+        with self._lock:
+            self.latencies[endpoint].append(seconds)
+            self.statuses[endpoint][status] += 1
+            if status >= 500 or status in (400, 401, 403):
+                self.errors[f'{endpoint} {status}'] += 1
+
+    def error(self, endpoint, exc):
+        with self._lock:
+            self.errors[f'{endpoint} {type(exc).__name__}'] += 1
+
+    def scan_done(self, waited):
+        with self._lock:
+            self.scans += 1
+            self.queue_waits.append(waited)
+
+
+def percentile(values, p):
+    """Percentil por rango más cercano de una lista ordenada."""
+    if not values:
+        return 0.0
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+
+def timed(recorder, endpoint, call):
+    started = time.perf_counter()
+    try:
+        status, data = call()
+    except Exception as exc:
+        recorder.error(endpoint, exc)
+        return None, None
+    recorder.request(endpoint, time.perf_counter() - started, status)
+    return status, data
+
+
+def door_worker(client, door_id, arrivals, recorder, logged):
+    """Un operador en su puerta: atiende las llegadas en orden, una a la vez."""
+    while True:
+        item = arrivals.get()
+        if item is None:
+            return
+        arrived_at, qr_data = item
+        waited = time.perf_counter() - arrived_at
+        status, data = timed(recorder, '/scan/verify',
+                             lambda: client.post_json('/scan/verify', {'qr_data': qr_data}))
+        if status == 200:
+            student = json.loads(data)['student']
+            if student['authorized']:
+                status, _ = timed(recorder, '/scan/log', lambda: client.post_json(
+                    '/scan/log', {'student_id': student['id'], 'door_id': door_id}))
+                if status == 200:
+                    logged.append(qr_data)
+        recorder.scan_done(waited)
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    recorder = Recorder()
+
+    clients = []
+    for door_number in range(args.doors):
+        client = ScannerClient(args.url, timeout=args.timeout)
+        client.login(args.user.format(n=door_number % args.operators + 1), args.password)
+        clients.append(client)
+
+    open_doors = [door['id'] for door in clients[0].get_json('/scan/doors')['doors'] if door['status'] == 'OPEN']
+    if not open_doors:
+        raise RuntimeError('No hay puertas abiertas.')
+    roster = clients[0].get_json('/scan/roster')['students']
+    codes = roster['card'] if args.signed else roster['qr']
+    if not codes:
+        raise RuntimeError('El roster está vacío; siembre datos con flask admin seed.')
+    rng.shuffle(codes)
+    fresh = deque(codes)
+    logged = deque(maxlen=1000)
+
+    queues = [Queue() for _ in clients]
+    workers = [
+        threading.Thread(target=door_worker, daemon=True,
+                         args=(client, open_doors[i % len(open_doors)], queues[i], recorder, logged))
+        for i, client in enumerate(clients)
+    ]
+    for worker in workers:
+        worker.start()
+
+    print(f'{args.doors} puertas ({len(open_doors)} abiertas en el servidor), {len(codes)} estudiantes, '
+          f'{args.rate}/s durante {args.duration} s...', file=sys.stderr)
+    started = time.perf_counter()
+    next_arrival = started
+    arrivals = 0
+    while True:
+        next_arrival += rng.expovariate(args.rate)
+        if next_arrival - started >= args.duration:
+            break
+        time.sleep(max(0.0, next_arrival - time.perf_counter()))
+        if logged and rng.random() < args.repeat:
+            # Reescaneo de alguien que ya salió: debe caer en el cooldown
+            qr_data = rng.choice(logged)
+        else:
+            if not fresh:
+                rng.shuffle(codes)
+                fresh.extend(codes)
+            qr_data = fresh.popleft()
+        queues[rng.randrange(len(queues))].put((next_arrival, qr_data))
+        arrivals += 1
+
+    # Las puertas terminan la fila que quedó al cerrar las llegadas
+    for arrivals_queue in queues:
+        arrivals_queue.put(None)
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    for client in clients:
+        client.close()
+    return summarize(recorder, arrivals, elapsed)
+
+
+def summarize(recorder, arrivals, elapsed):
+    endpoints = {}
+    for endpoint, values in sorted(recorder.latencies.items()):
+        values.sort()
+        endpoints[endpoint] = {
+            'requests': len(values),
+            'p50_ms': round(percentile(values, 50) * 1000, 1),
+            'p95_ms': round(percentile(values, 95) * 1000, 1),
+            'p99_ms': round(percentile(values, 99) * 1000, 1),
+            'max_ms': round(values[-1] * 1000, 1),
+            'statuses': dict(recorder.statuses[endpoint]),
+        }
+    waits = sorted(recorder.queue_waits)
+    log_statuses = recorder.statuses.get('/scan/log', Counter())
+    logs = sum(log_statuses.values())
+    return {
+        'seconds': round(elapsed, 2),
+        'arrivals': arrivals,
+        'scans': recorder.scans,
+        'scans_per_second': round(recorder.scans / elapsed, 2) if elapsed else 0.0,
+        'endpoints': endpoints,
+        'cooldown_409': log_statuses.get(409, 0),
+        'cooldown_rate': round(log_statuses.get(409, 0) / logs, 4) if logs else 0.0,
+        'queue_wait_ms': {
+            'p50': round(percentile(waits, 50) * 1000, 1),
+            'p95': round(percentile(waits, 95) * 1000, 1),
+            'p99': round(percentile(waits, 99) * 1000, 1),
+        },
+        'errors': sum(recorder.errors.values()),
+        'error_detail': dict(recorder.errors),
+    }
+
+
+def print_report(summary):
+    print(f"\n{summary['arrivals']} llegadas, {summary['scans']} escaneos en {summary['seconds']} s "
+          f"({summary['scans_per_second']}/s)")
+    print(f"{'endpoint':<14}{'peticiones':>11}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'máx ms':>9}  estados")
+    for endpoint, stats in summary['endpoints'].items():
+        statuses = ', '.join(f'{status}: {count}' for status, count in sorted(stats['statuses'].items()))
+        print(f"{endpoint:<14}{stats['requests']:>11}{stats['p50_ms']:>9}{stats['p95_ms']:>9}"
+              f"{stats['p99_ms']:>9}{stats['max_ms']:>9}  {statuses}")
+    print(f"409 (cooldown): {summary['cooldown_409']} ({summary['cooldown_rate'] * 100:.1f}% de /scan/log)")
+    waits = summary['queue_wait_ms']
+    print(f"Espera en la fila de la puerta: p50 {waits['p50']} ms, p95 {waits['p95']} ms, p99 {waits['p99']} ms")
+    print(f"Errores: {summary['errors']}")
+    for detail, count in sorted(summary['error_detail'].items()):
+        print(f'  {detail}: {count}')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Carga de la hora de salida sobre /scan/verify y /scan/log.')
+    parser.add_argument('--url', default='http://127.0.0.1:5000', help='URL base del servidor.')
+    parser.add_argument('--doors', type=int, default=4, help='Puertas simultáneas (un operador por puerta).')
+    parser.add_argument('--rate', type=float, default=10.0, help='Llegadas por segundo entre todas las puertas.')
+    parser.add_argument('--duration', type=float, default=30.0, help='Segundos generando llegadas.')
+    parser.add_argument('--repeat', type=float, default=0.1,
+                        help='Fracción de llegadas que reescanean a alguien que ya salió (409 esperado).')
+    parser.add_argument('--user', default='operador_sim_{n}',
+                        help='Usuario de cada operador; {n} se reemplaza por 1..--operators.')
+    parser.add_argument('--password', default='operador_sim', help='Contraseña de los operadores.')
+    parser.add_argument('--operators', type=int, default=None, help='Usuarios distintos (por defecto, uno por puerta).')
+    parser.add_argument('--signed', action='store_true', help='Escanear el QR firmado en lugar del UUID.')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Tiempo máximo por petición en segundos.')
+    parser.add_argument('--seed', type=int, default=1, help='Semilla de las llegadas.')
+    parser.add_argument('--json', dest='json_path', help='Guardar además el resumen en este archivo JSON.')
+    args = parser.parse_args(argv)
+    args.operators = args.operators or args.doors
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    summary = run(args)
+    print_report(summary)
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+    return 1 if summary['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,74 @@
+def test_dashboard_etag_changes_with_new_exits(admin_client):
+    response = admin_client.get('/api/dashboard')
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    data = response.get_json()
+    assert data['total_students'] == 2
+    assert data['total_exits_today'] == 0
+
+    response = admin_client.get('/api/dashboard', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+
+    admin_client.post('/scan/exit', json={'qr_data': 'qr-1001', 'door_id': 1})
+    response = admin_client.get('/api/dashboard', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['total_exits_today'] == 1
+    assert data['exits_by_door_today'] == [{'door_id': 1, 'door_name': 'Puerta Principal', 'count': 1}]
+    assert data['chart_data']['courses'] == {'labels': ['9B'], 'data': [1]}
+
+
+def test_exits_since_id_returns_only_new_rows(app, admin_client):
+    with app.app_context():
+        from app import db
+        from app.models.door import Door, DoorStatus
+        db.session.get(Door, 2).status = DoorStatus.OPEN
+        db.session.commit()
+
+    admin_client.post('/scan/exit', json={'qr_data': 'qr-1001', 'door_id': 1})
+    data = admin_client.get('/api/exits').get_json()
+    assert [exit['student_name'] for exit in data['exits']] == ['Ana Rojas']
+    last_id = data['last_id']
+
+    # Sin salidas nuevas solo se repiten las ya vistas
+    data = admin_client.get(f'/api/exits?since_id={last_id}').get_json()
+    assert [exit['id'] for exit in data['exits']] == [last_id]
+    assert data['last_id'] == last_id
+
+    with app.app_context():
+        from app import db
+        from app.models.student import Student
+        db.session.get(Student, '1002').authorized_to_leave = True
+        db.session.commit()
+    admin_client.post('/scan/exit', json={'qr_data': 'qr-1002', 'door_id': 2})
+    data = admin_client.get(f'/api/exits?since_id={last_id}').get_json()
+    new_exits = [exit for exit in data['exits'] if exit['id'] > last_id]
+    assert [(exit['student_name'], exit['door_id']) for exit in new_exits] == [('Luis Pérez', 2)]
+    assert data['last_id'] > last_id
+
+    assert admin_client.get('/api/exits?since_id=abc').status_code == 400
+
+
+def test_exits_committed_out_of_order_are_not_lost(app, admin_client):
+    """
+    Una salida con id menor confirmada después de una mayor sigue llegando a un
+    cliente que ya vio la mayor.
+    """
+    from datetime import datetime
+    from app import db
+    from app.models.exit_log import ExitLog, colombia_tz
+
+    def commit_exit(log_id, student_id):
+        with app.app_context():
+            db.session.add(ExitLog(id=log_id, timestamp=datetime.now(colombia_tz), student_id=student_id,
+                                   door_id=1, operator_id=1))
+            db.session.commit()
+
+    commit_exit(11, '1001')
+    data = admin_client.get('/api/exits').get_json()
+    assert data['last_id'] == 11
+
+    commit_exit(10, '1002')
+    data = admin_client.get(f"/api/exits?since_id={data['last_id']}").get_json()
+    assert [exit['id'] for exit in data['exits']] == [10, 11]
+    assert data['last_id'] == 11
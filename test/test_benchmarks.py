@@ -0,0 +1,122 @@
+"""
+Benchmarks de los endpoints principales con 1k, 10k y 100k salidas.
+
+Se omiten por defecto porque sembrar 100k salidas tarda. Uso:
+    ENDPOINT_BENCHMARK_ROWS=1000,10000,100000 python -m pytest -q test/test_benchmarks.py
+Cada ejecución guarda la mediana y el máximo de cada operación y tamaño en
+.benchmarks/endpoints-<fecha>.json, junto con la mediana de la ejecución
+anterior y el cambio relativo (change: 0.25 = 25 % más lento).
+"""
+import json
+import os
+import statistics
+import time
+from datetime import datetime
+from pathlib import Path
+import pytest
+from app.jobs import Job
+from app.tasks import report_pdf
+from conftest import create_test_app, close_test_app, seed_exit_logs, login
+
+LOG_COUNTS = [int(rows) for rows in os.environ.get('ENDPOINT_BENCHMARK_ROWS', '').split(',') if rows.strip()]
+DAYS = 30
+RESULTS_FOLDER = Path(__file__).resolve().parent.parent / '.benchmarks'
+
+pytestmark = pytest.mark.skipif(not LOG_COUNTS, reason='defina ENDPOINT_BENCHMARK_ROWS para ejecutarlo')
+
+# Resultados de esta ejecución: '<operación> <salidas>' -> tiempos en ms
+results = {}
+
+
+@pytest.fixture(scope='module', autouse=True)
+def save_results():
+    """Al terminar, guarda los resultados comparados con la ejecución anterior."""
+    yield
+    if not results:
+        return
+    RESULTS_FOLDER.mkdir(exist_ok=True)
+    previous_runs = sorted(RESULTS_FOLDER.glob('endpoints-*.json'))
+    previous = json.loads(previous_runs[-1].read_text())['results'] if previous_runs else {}
+    for key, result in results.items():
+        before = previous.get(key)
+        if before:
+            result['previous_median_ms'] = before['median_ms']
+            result['change'] = round(result['median_ms'] / before['median_ms'] - 1, 3)
+    run = {'created': datetime.now().isoformat(timespec='seconds'), 'results': results}
+    path = RESULTS_FOLDER / f"endpoints-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    path.write_text(json.dumps(run, indent=2, sort_keys=True))
+
+
+@pytest.fixture(scope='module', params=LOG_COUNTS or [0], ids=lambda rows: f'{rows // 1000}k')
+def seeded_app(request, tmp_path_factory):
+    """Una base por tamaño, compartida por todos los benchmarks de ese tamaño."""
+    # Sin cooldown, cada /scan/log del benchmark registra una salida completa
+    flask_app = create_test_app(tmp_path_factory.mktemp(f'bench{request.param}'), EXIT_LOG_COOLDOWN_MINUTES=0)
+    with flask_app.app_context():
+        flask_app.config['BENCHMARK_RANGE'] = seed_exit_logs(request.param, students=500, days=DAYS)
+    flask_app.config['BENCHMARK_ROWS'] = request.param
+    yield flask_app
+    close_test_app(flask_app)
+
+
+@pytest.fixture
+def bench_client(seeded_app):
+    client = seeded_app.test_client()
+    login(client, 'admin', 'admin')
+    return client
+
+
+def fetch(client, method, url, **kwargs):
+    response = client.open(url, method=method, **kwargs)
+    body = response.get_data()
+    response.close()
+    assert response.status_code == 200, (url, response.status_code)
+    return body
+
+
+def measure(seeded_app, label, function, rounds):
+    """Ejecuta function `rounds` veces, registra mediana y máximo y devuelve el último resultado."""
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - started)
+    results[f"{label} {seeded_app.config['BENCHMARK_ROWS']}"] = {
+        'median_ms': round(statistics.median(timings) * 1000, 3),
+        'max_ms': round(max(timings) * 1000, 3),
+        'rounds': rounds,
+    }
+    return result
+
+
+def test_verify_qr(seeded_app, bench_client):
+    measure(seeded_app, '/scan/verify',
+            lambda: fetch(bench_client, 'POST', '/scan/verify', json={'qr_data': 'qr-1001'}), rounds=200)
+
+
+def test_log_exit(seeded_app, bench_client):
+    measure(seeded_app, '/scan/log',
+            lambda: fetch(bench_client, 'POST', '/scan/log', json={'student_id': '1001', 'door_id': 1}), rounds=200)
+
+
+def test_index(seeded_app, bench_client):
+    measure(seeded_app, '/index', lambda: fetch(bench_client, 'GET', '/index'), rounds=50)
+
+
+def test_export_csv(seeded_app, bench_client):
+    first, last = seeded_app.config['BENCHMARK_RANGE']
+    body = measure(seeded_app, '/export/csv',
+                   lambda: fetch(bench_client, 'GET', f'/export/csv?start_date={first}&end_date={last}'), rounds=3)
+    assert body.count(b'\n') > 1
+
+
+def test_export_pdf(seeded_app, tmp_path):
+    # La vista solo encola el trabajo; lo que cuesta es la tarea que genera el PDF
+    first, last = seeded_app.config['BENCHMARK_RANGE']
+
+    def generate():
+        with seeded_app.app_context():
+            report_pdf(Job(str(tmp_path), {'id': '0' * 32}), first, last)
+
+    measure(seeded_app, 'Reporte PDF', generate, rounds=1)
+    assert (tmp_path / ('0' * 32 + '.pdf')).stat().st_size > 0
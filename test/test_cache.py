@@ -0,0 +1,40 @@
+from app import db
+from app.cache import student_cache
+from app.models.cache_version import bump_version
+
+
+def test_student_cache_hits_and_misses(app, operator_client):
+    """
+    Escaneos repetidos del mismo QR se sirven desde la caché.
+    """
+    for _ in range(3):
+        assert operator_client.post('/scan/verify', json={'qr_data': 'qr-1001'}).status_code == 200
+    stats = student_cache.stats()
+    assert stats['misses'] == 1
+    assert stats['hits'] == 2
+
+
+def test_management_edit_invalidates_cache(app, admin_client):
+    """
+    Editar un estudiante desde gestión invalida la caché del escáner.
+    """
+    admin_client.post('/scan/verify', json={'qr_data': 'qr-1001'})
+    admin_client.post('/manage/student/edit/1001', data={
+        'id': '1001', 'name': 'Ana Sofía Rojas', 'course': '10A', 'authorized_to_leave': 'y'
+    })
+    student = admin_client.post('/scan/verify', json={'qr_data': 'qr-1001'}).get_json()['student']
+    assert student['name'] == 'Ana Sofía Rojas'
+    assert student['course'] == '10A'
+
+
+def test_version_bump_from_other_process_invalidates(app, operator_client):
+    """
+    Un incremento de versión hecho por otro proceso vacía la caché local en la siguiente comprobación.
+    """
+    operator_client.post('/scan/verify', json={'qr_data': 'qr-1001'})
+    with app.app_context():
+        bump_version('students')
+        db.session.commit()
+    student_cache.check_interval = 0
+    operator_client.post('/scan/verify', json={'qr_data': 'qr-1001'})
+    assert student_cache.stats()['misses'] == 2
@@ -0,0 +1,57 @@
+"""
+Benchmark del PDF de todos los carnets: tamaño del archivo y tiempo por carnet.
+
+Se omite por defecto porque generar las fotos y el PDF tarda minutos. Uso:
+    CARD_BENCHMARK_STUDENTS=1000 python -m pytest -q test/test_card_benchmark.py -s
+"""
+import os
+import re
+import time
+import pytest
+from PIL import Image
+from app.models.student import Student
+from app.pdf_generator import generate_bulk_cards_pdf
+
+BENCHMARK_STUDENTS = int(os.environ.get('CARD_BENCHMARK_STUDENTS', 0))
+# Un tercio de los estudiantes no tiene foto y usa el avatar por defecto
+PHOTO_SIZE = (1200, 1600)
+
+pytestmark = pytest.mark.skipif(not BENCHMARK_STUDENTS, reason='defina CARD_BENCHMARK_STUDENTS para ejecutarlo')
+
+
+def benchmark_students(app, count):
+    """Estudiantes con una foto distinta cada uno (como las de cámara) salvo uno de cada tres."""
+    photos_folder = os.path.join(app.config['UPLOAD_FOLDER'], 'photos')
+    os.makedirs(photos_folder, exist_ok=True)
+    gradient = Image.linear_gradient('L').resize(PHOTO_SIZE)
+    students = []
+    for i in range(count):
+        photo = None
+        if i % 3:
+            photo = f'bench{i}.jpg'
+            tint = Image.new('L', PHOTO_SIZE, i % 256)
+            Image.merge('RGB', (gradient, tint, gradient.rotate(i % 360))).save(
+                os.path.join(photos_folder, photo), quality=90)
+        students.append(Student(id=f'B{i:05d}', name=f'Estudiante de Prueba {i}', course=f'{i % 11 + 1}A',
+                                photo=photo, qr_code_data=f'qr-bench-{i}'))
+    return students
+
+
+def measure(students):
+    started = time.perf_counter()
+    pdf = generate_bulk_cards_pdf(students).getvalue()
+    return pdf, time.perf_counter() - started
+
+
+def test_bulk_cards_size_and_time(app):
+    with app.app_context():
+        students = benchmark_students(app, BENCHMARK_STUDENTS)
+        pdf, total = measure(students)
+
+    print(f'\n{BENCHMARK_STUDENTS} carnets: {len(pdf) / 1e6:.1f} MB, '
+          f'{total:.1f} s ({total / BENCHMARK_STUDENTS * 1000:.1f} ms por carnet)')
+
+    assert len(re.findall(rb'/Type /Page[^s]', pdf)) == BENCHMARK_STUDENTS
+    # Fondo y avatar van una sola vez; cada carnet aporta su QR y su foto reducida
+    assert len(re.findall(rb'/Subtype /Form', pdf)) == 2
+    assert len(pdf) < BENCHMARK_STUDENTS * 100 * 1024
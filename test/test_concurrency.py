@@ -0,0 +1,138 @@
+import threading
+from app import db
+from app.models.door import Door, DoorStatus
+from app.models.exit_log import ExitLog
+from conftest import login
+
+PARALLEL_REQUESTS = 12
+
+
+def test_parallel_log_exit_inserts_exactly_one_row(app):
+    """
+    Varias puertas registran la misma salida al mismo tiempo: solo una fila
+    llega a exit_log y las demás peticiones reciben 409.
+    """
+    with app.app_context():
+        db.session.get(Door, 2).status = DoorStatus.OPEN
+        db.session.commit()
+
+    clients = []
+    for i in range(PARALLEL_REQUESTS):
+        client = app.test_client()
+        login(client, 'operador', 'operador')
+        clients.append(client)
+
+    barrier = threading.Barrier(PARALLEL_REQUESTS)
+    status_codes = []
+    lock = threading.Lock()
+
+    def scan(client, door_id):
+        barrier.wait()
+        response = client.post('/scan/log', json={'student_id': '1001', 'door_id': door_id})
+        with lock:
+            status_codes.append(response.status_code)
+
+    threads = [threading.Thread(target=scan, args=(client, 1 + i % 2)) for i, client in enumerate(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(status_codes) == [200] + [409] * (PARALLEL_REQUESTS - 1)
+    with app.app_context():
+        assert db.session.query(ExitLog).filter_by(student_id='1001').count() == 1
+
+
+def test_write_behind_groups_exits_into_batches(app):
+    """
+    Con la escritura agrupada activa, las salidas simultáneas se confirman en
+    menos commits que peticiones y el cooldown sigue valiendo dentro del lote.
+    """
+    from app.exit_writer import exit_writer
+    from app.models.student import Student
+
+    app.config['EXIT_LOG_WRITE_BEHIND'] = True
+    exit_writer.flush_interval = 0.2
+    with app.app_context():
+        for i in range(PARALLEL_REQUESTS):
+            db.session.add(Student(id=f'2{i:03d}', name=f'Estudiante {i}', course='7C',
+                                   qr_code_data=f'qr-2{i:03d}', authorized_to_leave=True))
+        db.session.commit()
+
+    client = app.test_client()
+    login(client, 'operador', 'operador')
+    student_ids = [f'2{i:03d}' for i in range(PARALLEL_REQUESTS)] + ['1001', '1001']
+    barrier = threading.Barrier(len(student_ids))
+    status_codes = []
+    lock = threading.Lock()
+
+    def scan(student_id):
+        thread_client = app.test_client()
+        with client.session_transaction() as source, thread_client.session_transaction() as target:
+            target.update(source)
+        barrier.wait()
+        response = thread_client.post('/scan/log', json={'student_id': student_id, 'door_id': 1})
+        with lock:
+            status_codes.append(response.status_code)
+
+    threads = [threading.Thread(target=scan, args=(student_id,)) for student_id in student_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(status_codes) == [200] * (PARALLEL_REQUESTS + 1) + [409]
+    stats = exit_writer.stats()
+    assert stats['rows'] == len(student_ids)
+    assert stats['batches'] < len(student_ids)
+    with app.app_context():
+        assert db.session.query(ExitLog).count() == PARALLEL_REQUESTS + 1
+        assert db.session.query(ExitLog).filter_by(student_id='1001').count() == 1
+
+
+def test_write_behind_survives_errors_outside_the_transaction(app, monkeypatch):
+    """
+    Si algo falla fuera de la transacción del lote (aquí, al cerrar la sesión),
+    la petición no se queda esperando y el hilo de escritura sigue vivo.
+    """
+    from app.exit_writer import exit_writer
+    from app.models.student import Student
+
+    app.config['EXIT_LOG_WRITE_BEHIND'] = True
+    exit_writer.wait_timeout = 2
+    with app.app_context():
+        db.session.add(Student(id='2001', name='Otro Estudiante', course='7C',
+                               qr_code_data='qr-2001', authorized_to_leave=True))
+        db.session.commit()
+    client = app.test_client()
+    login(client, 'operador', 'operador')
+
+    original_remove = db.session.remove
+    failures = []
+
+    def failing_remove():
+        if not failures:
+            failures.append(True)
+            raise RuntimeError('fallo al cerrar la sesión')
+        original_remove()
+
+    monkeypatch.setattr(db.session, 'remove', failing_remove)
+    # La salida ya se confirmó antes del fallo, así que se informa como registrada
+    assert client.post('/scan/log', json={'student_id': '1001', 'door_id': 1}).status_code == 200
+    thread = exit_writer._thread
+    assert client.post('/scan/log', json={'student_id': '2001', 'door_id': 1}).status_code == 200
+    assert exit_writer._thread is thread and thread.is_alive()
+    with app.app_context():
+        assert db.session.query(ExitLog).count() == 2
+
+
+def test_write_behind_batch_does_not_reload_inserted_rows(app, operator_client, sql_counter):
+    """El id de cada salida se toma antes del commit: el lote no vuelve a leer exit_log."""
+    app.config['EXIT_LOG_WRITE_BEHIND'] = True
+    operator_client.get('/scan/doors')
+    operator_client.post('/scan/verify', json={'qr_data': 'qr-1001'})
+    with sql_counter() as statements:
+        assert operator_client.post('/scan/log', json={'student_id': '1001', 'door_id': 1}).status_code == 200
+    assert not [statement for statement in statements
+                if statement.lstrip().upper().startswith('SELECT') and 'exit_log' in statement]
+    assert len(statements) == 4
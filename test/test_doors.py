@@ -0,0 +1,27 @@
+def test_door_status_poll_uses_etag(app, admin_client):
+    """
+    /scan/doors responde 304 mientras no cambien las puertas, y refleja un cierre hecho desde gestión.
+    """
+    response = admin_client.get('/scan/doors')
+    etag = response.headers['ETag']
+    statuses = {door['id']: door['status'] for door in response.get_json()['doors']}
+    assert statuses == {1: 'OPEN', 2: 'CLOSED'}
+    assert admin_client.get('/scan/doors', headers={'If-None-Match': etag}).status_code == 304
+
+    admin_client.post('/manage/door/edit/1', data={'name': 'Puerta Principal', 'status': 'CLOSED'})
+
+    response = admin_client.get('/scan/doors', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['doors'][0]['status'] == 'CLOSED'
+
+
+def test_closed_door_rejects_exit_after_edit(app, admin_client):
+    """
+    El registro de salida usa el estado actualizado de la puerta.
+    """
+    assert b'Puerta Principal' in admin_client.get('/scan').data
+    admin_client.post('/manage/door/edit/1', data={'name': 'Puerta Principal', 'status': 'CLOSED'})
+
+    assert b'Puerta Principal' not in admin_client.get('/scan').data
+    response = admin_client.post('/scan/log', json={'student_id': '1001', 'door_id': '1'})
+    assert response.status_code == 400
@@ -0,0 +1,93 @@
+"""
+Benchmark de regresión de la exportación CSV sobre una tabla grande.
+
+Se omite por defecto porque sembrar millones de filas tarda minutos. Uso:
+    EXPORT_BENCHMARK_ROWS=2000000 python -m pytest -q test/test_export_benchmark.py -s
+"""
+import os
+import time
+import tracemalloc
+import zlib
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import insert
+from app import db
+from app.models.exit_log import ExitLog
+from app.reports import export_csv_chunks, gzip_stream
+
+BENCHMARK_ROWS = int(os.environ.get('EXPORT_BENCHMARK_ROWS', 0))
+SEED_BATCH = 50000
+
+pytestmark = pytest.mark.skipif(not BENCHMARK_ROWS, reason='defina EXPORT_BENCHMARK_ROWS para ejecutarlo')
+
+
+def seed_exit_log(rows, start):
+    """Inserta `rows` salidas repartidas en 200 días a partir de `start`."""
+    per_day = max(rows // 200, 1)
+    for offset in range(0, rows, SEED_BATCH):
+        db.session.execute(insert(ExitLog.__table__), [
+            {'timestamp': start + timedelta(days=i // per_day, seconds=i % per_day),
+             'student_id': ('1001', '1002')[i % 2], 'door_id': 1, 'operator_id': 1}
+            for i in range(offset, min(offset + SEED_BATCH, rows))
+        ])
+        db.session.commit()
+
+
+def consume(start_date, end_date, gzip=False):
+    chunks = export_csv_chunks(start_date, end_date)
+    decompressor = None
+    if gzip:
+        chunks = gzip_stream(chunks)
+        decompressor = zlib.decompressobj(31)
+    started = time.perf_counter()
+    first_chunk_at = None
+    lines = 0
+    for chunk in chunks:
+        if first_chunk_at is None:
+            first_chunk_at = time.perf_counter() - started
+        if decompressor:
+            lines += decompressor.decompress(chunk).count(b'\n')
+        else:
+            lines += chunk.count('\n')
+    return lines - 1, first_chunk_at, time.perf_counter() - started
+
+
+def measure(start_date, end_date, gzip=False):
+    """
+    Devuelve (filas, segundos al primer bloque, segundos totales, pico de memoria
+    en bytes). Los tiempos se toman sin tracemalloc, que los distorsiona.
+    """
+    rows, first_chunk_at, total = consume(start_date, end_date, gzip)
+    tracemalloc.start()
+    consume(start_date, end_date, gzip)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return rows, first_chunk_at, total, peak
+
+
+def report(label, result):
+    rows, first_chunk_at, total, peak = result
+    print(f'{label}: {rows} filas, primer bloque {first_chunk_at * 1000:.1f} ms, '
+          f'total {total:.2f} s ({rows / total:,.0f} filas/s), pico {peak / 1e6:.1f} MB')
+
+
+def test_csv_export_memory_is_flat(app):
+    start = datetime(2025, 1, 6, 7, 0)
+    last_day = (start + timedelta(days=365)).date()
+    with app.app_context():
+        seed_exit_log(BENCHMARK_ROWS, start)
+
+        month = measure(start.date(), (start + timedelta(days=29)).date())
+        whole_year = measure(start.date(), last_day)
+        whole_year_gzip = measure(start.date(), last_day, gzip=True)
+
+    print()
+    report('30 días', month)
+    report('Año', whole_year)
+    report('Año con gzip', whole_year_gzip)
+
+    assert whole_year[0] == whole_year_gzip[0] == BENCHMARK_ROWS
+    # El encabezado sale antes de consultar, y la memoria no crece con el rango
+    assert whole_year[1] < 0.05
+    assert whole_year[3] < month[3] * 1.5
+    assert whole_year_gzip[3] < month[3] * 1.5
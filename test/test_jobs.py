@@ -0,0 +1,97 @@
+import os
+import time
+import zipfile
+from io import BytesIO
+from PIL import Image
+from app import db
+from app.jobs import job_runner
+from app.models.student import Student
+
+JSON = {'Accept': 'application/json'}
+
+
+def wait_for_job(client, status_url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        data = client.get(status_url).get_json()
+        if data['status'] in ('done', 'failed'):
+            return data
+        time.sleep(0.2)
+    raise AssertionError('El trabajo no terminó a tiempo')
+
+
+def test_cards_and_qr_zip_run_in_background(app, admin_client, operator_client):
+    response = admin_client.get('/manage/students/cards/download/all', headers=JSON)
+    assert response.status_code == 202
+    cards_job = response.get_json()
+
+    response = admin_client.get('/manage/qrcodes/download/zip', headers=JSON)
+    qr_job = response.get_json()
+
+    data = wait_for_job(admin_client, cards_job['status_url'])
+    assert data['status'] == 'done', data['error']
+    response = admin_client.get(data['download_url'])
+    assert response.data.startswith(b'%PDF')
+    assert 'todos_los_carnets.pdf' in response.headers['Content-Disposition']
+
+    data = wait_for_job(admin_client, qr_job['status_url'])
+    assert data['status'] == 'done', data['error']
+    with zipfile.ZipFile(BytesIO(admin_client.get(data['download_url']).data)) as zf:
+        assert sorted(zf.namelist()) == ['1001_Ana_Rojas.png', '1002_Luis_Pérez.png']
+
+    # Los trabajos son privados de quien los lanzó
+    assert operator_client.get(cards_job['status_url']).status_code == 404
+
+    # El navegador va a la página de estado
+    response = admin_client.get('/manage/students/cards/download/all')
+    assert response.status_code == 302
+    assert '/jobs/' in response.headers['Location']
+
+
+def test_photo_upload_job_updates_students(app, admin_client):
+    photo = BytesIO()
+    Image.new('RGB', (40, 40), 'red').save(photo, format='PNG')
+    upload = BytesIO()
+    with zipfile.ZipFile(upload, 'w') as zf:
+        zf.writestr('1001.png', photo.getvalue())
+        zf.writestr('9999.png', photo.getvalue())
+        zf.writestr('notas.txt', 'x')
+    upload.seek(0)
+
+    response = admin_client.post('/manage/students/upload-photos', headers=JSON,
+                                 data={'zip_file': (upload, 'fotos.zip')}, content_type='multipart/form-data')
+    assert response.status_code == 202
+    data = wait_for_job(admin_client, response.get_json()['status_url'])
+    assert data['status'] == 'done', data['error']
+    assert 'fotos de 1 estudiantes' in data['message']
+    assert '9999 (estudiante no encontrado)' in data['message']
+    assert data['download_url'] is None
+
+    with app.app_context():
+        photo_name = db.session.get(Student, '1001').photo
+    assert os.path.exists(os.path.join(app.config['UPLOAD_FOLDER'], 'photos', photo_name))
+
+
+def test_expired_jobs_are_cleaned(app, admin_client):
+    response = admin_client.get('/manage/qrcodes/download/zip', headers=JSON)
+    data = wait_for_job(admin_client, response.get_json()['status_url'])
+    assert data['status'] == 'done'
+
+    job_runner.ttl = -1
+    assert job_runner.cleanup_expired() == 2  # estado + ZIP
+    assert admin_client.get(data['download_url']).status_code == 404
+
+
+def test_report_pdf_job(app, admin_client):
+    from datetime import datetime
+    from app.models.exit_log import colombia_tz
+
+    today = datetime.now(colombia_tz).strftime('%Y-%m-%d')
+    response = admin_client.get(f'/export/pdf?start_date={today}&end_date={today}', headers=JSON)
+    assert response.status_code == 302  # sin salidas: vuelve al reporte
+
+    admin_client.post('/scan/exit', json={'qr_data': 'qr-1001', 'door_id': 1})
+    response = admin_client.get(f'/export/pdf?start_date={today}&end_date={today}', headers=JSON)
+    data = wait_for_job(admin_client, response.get_json()['status_url'])
+    assert data['status'] == 'done', data['error']
+    assert admin_client.get(data['download_url']).data.startswith(b'%PDF')
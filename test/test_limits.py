@@ -0,0 +1,46 @@
+from datetime import datetime
+from app.limits import request_limiter, HEAVY, _Pool
+from app.models.exit_log import colombia_tz
+
+
+def test_heavy_requests_fail_fast_while_scanner_keeps_working(app, admin_client, operator_client):
+    request_limiter.pools[HEAVY] = _Pool(1, 0)
+    today = datetime.now(colombia_tz).strftime('%Y-%m-%d')
+    export_url = f'/export/csv?start_date={today}&end_date={today}'
+
+    # Una exportación en curso (el streaming mantiene ocupado el cupo hasta cerrarse)
+    running_export = admin_client.get(export_url, buffered=False)
+    assert running_export.status_code == 200
+
+    busy = admin_client.get(export_url)
+    assert busy.status_code == 503
+    assert busy.headers['Retry-After'] == '5'
+    assert admin_client.get('/manage/qrcodes/download/zip', headers={'Accept': 'application/json'}).status_code == 503
+
+    # El escáner no comparte cupo con las descargas
+    response = operator_client.post('/scan/verify', json={'qr_data': 'qr-1001'})
+    assert response.status_code == 200
+
+    running_export.close()
+    response = admin_client.get(export_url)
+    assert response.status_code == 200
+    response.close()
+
+    stats = admin_client.get('/manage/stats').get_json()['request_classes']
+    assert stats['heavy']['rejected'] == 2
+    assert stats['heavy']['in_flight'] == 0
+    assert stats['scanner']['requests'] == 1
+    assert stats['scanner']['limit'] is None
+
+
+def test_upload_forms_are_not_heavy_until_submitted(app, admin_client):
+    request_limiter.pools[HEAVY] = _Pool(1, 0)
+    today = datetime.now(colombia_tz).strftime('%Y-%m-%d')
+    running_export = admin_client.get(f'/export/csv?start_date={today}&end_date={today}', buffered=False)
+    try:
+        assert admin_client.get('/manage/students/import').status_code == 200
+        assert admin_client.get('/manage/students/upload-photos').status_code == 200
+        assert admin_client.get('/manage/students/template').status_code == 200
+        assert admin_client.post('/manage/students/import').status_code == 503
+    finally:
+        running_export.close()
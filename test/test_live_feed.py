@@ -0,0 +1,101 @@
+import json
+import time
+from datetime import datetime, timedelta
+from app.live_feed import live_feed
+from conftest import authorize_student
+
+
+def wait_for_first_poll():
+    deadline = time.monotonic() + 5
+    while live_feed.last_id is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert live_feed.last_id is not None
+
+
+def read_event(chunks):
+    """Devuelve (evento, datos) del siguiente mensaje, saltando keep-alives."""
+    for chunk in chunks:
+        text = chunk.decode() if isinstance(chunk, bytes) else chunk
+        if text.startswith('event:'):
+            lines = dict(line.split(': ', 1) for line in text.strip().split('\n'))
+            return lines['event'], json.loads(lines['data'])
+    raise AssertionError('El stream terminó sin eventos')
+
+
+def test_stream_pushes_new_exits_and_counts(app, admin_client, operator_client):
+    app.config['LIVE_FEED_POLL_SECONDS'] = 0.05
+    live_feed.poll_interval = 0.05
+
+    response = admin_client.get('/stream/exits', buffered=False)
+    assert response.mimetype == 'text/event-stream'
+    chunks = iter(response.response)
+    try:
+        assert read_event(chunks)[0] == 'counts'
+
+        operator_client.post('/scan/exit', json={'qr_data': 'qr-1001', 'door_id': 1})
+        event, data = read_event(chunks)
+        assert event == 'exit'
+        assert data['student_name'] == 'Ana Rojas'
+
+        event, data = read_event(chunks)
+        assert event == 'counts'
+        assert data['total_exits_today'] == 1
+        assert data['exits_by_course_today'] == {'9B': 1}
+    finally:
+        response.close()
+
+
+def test_poll_cost_does_not_depend_on_subscribers(app, operator_client, sql_counter):
+    """Un ciclo del publicador hace las mismas consultas con 1 o con 50 suscriptores."""
+    live_feed.poll_interval = 60
+    subscribers = [live_feed.subscribe()]
+    wait_for_first_poll()
+    try:
+        operator_client.post('/scan/exit', json={'qr_data': 'qr-1001', 'door_id': 1})
+        with sql_counter() as statements:
+            live_feed.poll()
+        single = len(statements)
+        assert subscribers[0].get_nowait()[0] in ('counts', 'exit')
+
+        subscribers += [live_feed.subscribe() for _ in range(49)]
+        authorize_student(app, '1002')
+        operator_client.post('/scan/sync', json={'exits': [
+            {'client_id': 'a', 'student_id': '1002', 'door_id': 1, 'timestamp': (datetime.now() - timedelta(days=1)).isoformat()},
+        ]})
+        with sql_counter() as statements:
+            live_feed.poll()
+        assert len(statements) == single
+    finally:
+        for subscriber in subscribers:
+            live_feed.unsubscribe(subscriber)
+
+
+def test_exits_committed_out_of_order_are_published_once(app):
+    """Una salida con id menor confirmada después de una mayor también se publica, una sola vez."""
+    from app import db
+    from app.models.exit_log import ExitLog, colombia_tz
+
+    def commit_exit(log_id, student_id):
+        with app.app_context():
+            db.session.add(ExitLog(id=log_id, timestamp=datetime.now(colombia_tz), student_id=student_id,
+                                   door_id=1, operator_id=1))
+            db.session.commit()
+
+    live_feed.poll_interval = 60
+    subscriber = live_feed.subscribe()
+    wait_for_first_poll()
+    try:
+        commit_exit(11, '1001')
+        live_feed.poll()
+        commit_exit(10, '1002')
+        live_feed.poll()
+        live_feed.poll()
+        published = []
+        while not subscriber.empty():
+            event, data = subscriber.get_nowait()
+            if event == 'exit':
+                published.append(data['id'])
+        assert published == [11, 10]
+        assert live_feed.last_id == 11
+    finally:
+        live_feed.unsubscribe(subscriber)
@@ -0,0 +1,30 @@
+import threading
+from werkzeug.serving import make_server
+from conftest import create_test_app, close_test_app
+import load_scanner
+
+
+def test_load_generator_logs_in_and_reports_cooldowns(tmp_path):
+    # Con CSRF activo, como en producción: el generador debe leer el token del formulario
+    app = create_test_app(tmp_path, WTF_CSRF_ENABLED=True)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        summary = load_scanner.run(load_scanner.parse_args([
+            '--url', f'http://127.0.0.1:{server.server_port}', '--doors', '2', '--rate', '40',
+            '--duration', '1', '--user', 'operador', '--password', 'operador',
+        ]))
+    finally:
+        server.shutdown()
+        close_test_app(app)
+
+    assert summary['errors'] == 0
+    assert summary['scans'] == summary['arrivals'] > 0
+    verify = summary['endpoints']['/scan/verify']
+    assert verify['requests'] == summary['arrivals']
+    assert verify['p50_ms'] <= verify['p95_ms'] <= verify['p99_ms'] <= verify['max_ms']
+    # Solo hay un estudiante autorizado: registra una salida y el resto cae en el cooldown
+    log = summary['endpoints']['/scan/log']
+    assert log['statuses'][200] == 1
+    assert summary['cooldown_409'] == log['requests'] - 1 > 0
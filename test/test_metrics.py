@@ -0,0 +1,56 @@
+import logging
+from datetime import datetime
+from app.metrics import request_metrics
+from app.models.exit_log import colombia_tz
+
+
+def metric_lines(client, prefix):
+    text = client.get('/metrics').get_data(as_text=True)
+    return {line.rsplit(' ', 1)[0]: line.rsplit(' ', 1)[1] for line in text.splitlines()
+            if line.startswith(prefix)}
+
+
+def test_metrics_report_latency_and_sql_per_endpoint(admin_client):
+    assert admin_client.post('/scan/exit', json={'qr_data': 'qr-1001', 'door_id': 1}).get_json()['success']
+    today = datetime.now(colombia_tz).strftime('%Y-%m-%d')
+    export = admin_client.get(f'/export/csv?start_date={today}&end_date={today}')
+    assert 'Ana Rojas' in export.get_data(as_text=True)
+    export.close()
+
+    response = admin_client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+
+    requests = metric_lines(admin_client, 'control_salidas_requests_total{')
+    assert requests['control_salidas_requests_total{endpoint="scanner.scan_exit",method="POST",status="200"}'] == '1'
+    assert requests['control_salidas_requests_total{endpoint="main.export_csv",method="GET",status="200"}'] == '1'
+
+    statements = metric_lines(admin_client, 'control_salidas_request_sql_statements_')
+    assert statements['control_salidas_request_sql_statements_count{endpoint="scanner.scan_exit"}'] == '1'
+    assert float(statements['control_salidas_request_sql_statements_sum{endpoint="scanner.scan_exit"}']) > 0
+    # Las consultas del CSV se hacen mientras se envía el cuerpo, después de la vista
+    assert float(statements['control_salidas_request_sql_statements_sum{endpoint="main.export_csv"}']) > 0
+    assert statements['control_salidas_request_sql_statements_bucket{endpoint="scanner.scan_exit",le="+Inf"}'] == '1'
+
+    sizes = metric_lines(admin_client, 'control_salidas_response_size_bytes_count')
+    assert 'control_salidas_response_size_bytes_count{endpoint="scanner.scan_exit"}' in sizes
+    assert 'control_salidas_response_size_bytes_count{endpoint="main.export_csv"}' not in sizes
+
+    gauges = metric_lines(admin_client, 'control_salidas_request_classes_requests')
+    assert gauges['control_salidas_request_classes_requests{class="scanner"}'] == '1'
+
+
+def test_metrics_require_admin(operator_client):
+    response = operator_client.get('/metrics')
+    assert response.status_code == 302
+
+
+def test_slow_requests_are_logged_with_their_sql(admin_client, caplog):
+    request_metrics.slow_request_seconds = 0
+    with caplog.at_level(logging.WARNING):
+        admin_client.post('/scan/verify', json={'qr_data': 'qr-1001'})
+    messages = [record.getMessage() for record in caplog.records if 'Petición lenta' in record.getMessage()]
+    assert messages
+    assert 'POST /scan/verify (scanner.verify_qr) 200' in messages[-1]
+    assert 'FROM student' in messages[-1]
+    assert admin_client.get('/manage/stats').get_json()['requests']['slow_requests'] >= 1
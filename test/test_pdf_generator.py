@@ -0,0 +1,55 @@
+import os
+import re
+from io import BytesIO
+from PIL import Image
+from app.models.student import Student
+from app.pdf_generator import generate_bulk_cards_pdf, print_photo, PRINT_DPI
+
+
+def add_photos(app, count):
+    """Estudiantes con fotos grandes (JPEG y PNG con transparencia), uno sin foto y uno con el archivo perdido."""
+    photos_folder = os.path.join(app.config['UPLOAD_FOLDER'], 'photos')
+    os.makedirs(photos_folder, exist_ok=True)
+    students = []
+    for i in range(count):
+        photo = f'foto{i}.jpg' if i % 2 else f'foto{i}.png'
+        if i % 2:
+            Image.new('RGB', (1600, 1200), (i * 20 % 255, 80, 160)).save(os.path.join(photos_folder, photo))
+        else:
+            Image.new('RGBA', (900, 900), (200, i * 20 % 255, 40, 128)).save(os.path.join(photos_folder, photo))
+        students.append(Student(id=f'{2000 + i}', name=f'Estudiante {i}', course='7A', photo=photo,
+                                qr_code_data=f'qr-{2000 + i}'))
+    students.append(Student(id='3000', name='Sin Foto', course='7A', qr_code_data='qr-3000'))
+    students.append(Student(id='3001', name='Foto Perdida', course='7A', photo='no-existe.jpg', qr_code_data='qr-3001'))
+    return students
+
+
+def test_bulk_cards_one_page_per_student(app):
+    with app.app_context():
+        students = add_photos(app, 7)
+        progress = []
+        pdf = generate_bulk_cards_pdf(students, progress=progress.append).getvalue()
+    assert progress == list(range(1, 10))
+    assert len(re.findall(rb'/Type /Page[^s]', pdf)) == 9
+
+
+def test_photos_are_reduced_to_print_size(app):
+    with app.app_context():
+        add_photos(app, 2)
+        folder = os.path.join(app.config['UPLOAD_FOLDER'], 'photos')
+        for name in ('foto0.png', 'foto1.jpg'):
+            with Image.open(BytesIO(print_photo(os.path.join(folder, name)))) as img:
+                assert max(img.size) == round(3 / 2.54 * PRINT_DPI)
+        assert print_photo(os.path.join(folder, 'no-existe.jpg')) is None
+
+
+def test_background_and_avatar_are_embedded_once(app):
+    with app.app_context():
+        students = [Student(id=f'{4000 + i}', name=f'Sin Foto {i}', course='8B', qr_code_data=f'qr-{4000 + i}')
+                    for i in range(5)]
+        pdf = generate_bulk_cards_pdf(students).getvalue()
+    # Un formulario por imagen compartida. Imágenes: fondo, avatar y su máscara
+    # de transparencia una sola vez, más un QR por carnet
+    assert len(re.findall(rb'/Subtype /Form', pdf)) == 2
+    assert len(re.findall(rb'/Subtype /Image', pdf)) == 3 + 5
+    assert len(re.findall(rb'/Type /Page[^s]', pdf)) == 5
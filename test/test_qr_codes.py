@@ -0,0 +1,56 @@
+from app.qr_codes import signed_payload
+
+
+def verify(client, qr_data):
+    return client.post('/scan/verify', json={'qr_data': qr_data})
+
+
+def test_signed_and_uuid_cards_coexist(app, operator_client):
+    """
+    Un QR firmado válido resuelve al estudiante sin usar el UUID, y el UUID sigue funcionando.
+    """
+    with app.app_context():
+        payload = signed_payload('1001', 1)
+    assert verify(operator_client, payload).get_json()['student']['id'] == '1001'
+    assert verify(operator_client, 'qr-1001').get_json()['student']['id'] == '1001'
+
+
+def test_tampered_signed_card_is_rejected(app, operator_client):
+    """
+    Cambiar el ID de un QR firmado invalida la firma.
+    """
+    with app.app_context():
+        payload = signed_payload('1001', 1)
+    tampered = payload.replace('S1.1001.', 'S1.1002.')
+    assert verify(operator_client, tampered).status_code == 404
+
+
+def test_revoked_card_is_rejected(app, admin_client):
+    """
+    Revocar el carnet incrementa la versión: el QR firmado anterior y el UUID anterior dejan de valer.
+    """
+    with app.app_context():
+        old_payload = signed_payload('1001', 1)
+        new_payload = signed_payload('1001', 2)
+    admin_client.post('/manage/student/card/revoke/1001')
+
+    assert verify(admin_client, old_payload).status_code == 404
+    assert verify(admin_client, 'qr-1001').status_code == 404
+    assert verify(admin_client, new_payload).status_code == 200
+
+
+def test_card_pdf_uses_signed_payload(app, admin_client):
+    """
+    Con QR_SIGNED_PAYLOADS activo, los carnets se siguen generando.
+    """
+    app.config['QR_SIGNED_PAYLOADS'] = True
+    response = admin_client.get('/manage/student/card/1001')
+    assert response.status_code == 200
+    assert response.data.startswith(b'%PDF')
+
+
+def test_non_string_qr_data_is_rejected(operator_client):
+    for qr_data in (1001, ['qr-1001'], None, {'id': '1001'}):
+        assert verify(operator_client, qr_data).status_code == 400
+        response = operator_client.post('/scan/exit', json={'qr_data': qr_data, 'door_id': 1})
+        assert response.status_code == 400
@@ -0,0 +1,109 @@
+"""
+Presupuestos de consultas SQL por endpoint. Si un cambio sube alguno de estos
+números, revisar si se coló una consulta por fila (N+1) antes de ajustarlo.
+"""
+import os
+import zipfile
+from io import BytesIO
+import pytest
+from PIL import Image
+from app.jobs import Job
+from app.models.student import Student
+from app.tasks import photos_upload
+from conftest import create_test_app, close_test_app, login, seed_exit_logs
+
+# Con las cachés ya cargadas. /scan/log y /scan/exit: reserva del cooldown
+# (UPDATE + INSERT la primera vez), INSERT de la salida y del rollup.
+SCANNER_BUDGETS = [
+    ('post', '/scan/verify', {'qr_data': 'qr-1001'}, 0),
+    ('post', '/scan/log', {'student_id': '1001', 'door_id': 1}, 4),
+    ('post', '/scan/exit', {'qr_data': 'qr-1001', 'door_id': 1}, 4),
+    ('get', '/scan/doors', None, 0),
+]
+
+# Endpoints de lectura: el número de consultas no debe depender de las filas
+READ_BUDGETS = [
+    ('/index', 3),
+    ('/api/dashboard', 5),
+    ('/reports?start_date={first}&end_date={last}', 2),
+    ('/api/reports?start_date={first}&end_date={last}', 2),
+    ('/api/exits', 1),
+    ('/export/csv?start_date={first}&end_date={last}', 1),
+    ('/manage/students', 1),
+]
+
+
+def request_statements(client, sql_counter, method, url, payload=None):
+    with sql_counter() as statements:
+        response = client.open(url, method=method.upper(), json=payload)
+        response.get_data()
+        response.close()
+    assert response.status_code < 400, (url, response.status_code)
+    return len(statements)
+
+
+@pytest.mark.parametrize('method, url, payload, budget', SCANNER_BUDGETS)
+def test_scanner_query_budgets(operator_client, sql_counter, method, url, payload, budget):
+    # Primeras peticiones: cargan las cachés de usuario, estudiantes y puertas
+    operator_client.get('/scan/doors')
+    operator_client.post('/scan/verify', json={'qr_data': 'qr-1001'})
+    assert request_statements(operator_client, sql_counter, method, url, payload) <= budget
+
+
+@pytest.mark.parametrize('url, budget', READ_BUDGETS)
+def test_read_endpoints_are_constant_in_row_count(tmp_path_factory, sql_counter, url, budget):
+    counts = []
+    for rows, students in ((10, 5), (300, 150)):
+        counts.append(seeded_statements(tmp_path_factory.mktemp('db'), sql_counter, url, rows, students))
+    assert counts[0] == counts[1]
+    assert counts[1] <= budget
+
+
+def seeded_statements(tmp_path, sql_counter, url, rows, students):
+    """Consultas de una petición (ya en caliente) sobre una base con `rows` salidas."""
+    app = create_test_app(tmp_path)
+    try:
+        with app.app_context():
+            first, last = seed_exit_logs(rows, students=students, days=3)
+        client = app.test_client()
+        login(client, 'admin', 'admin')
+        url = url.format(first=first, last=last)
+        client.get(url).close()
+
+        with sql_counter(app) as statements:
+            response = client.get(url)
+            response.get_data()
+            response.close()
+        assert response.status_code == 200
+        return len(statements)
+    finally:
+        close_test_app(app)
+
+
+def photos_zip(path, student_ids):
+    with zipfile.ZipFile(path, 'w') as zf:
+        for student_id in student_ids:
+            buffer = BytesIO()
+            Image.new('RGB', (4, 4)).save(buffer, 'PNG')
+            zf.writestr(f'{student_id}.png', buffer.getvalue())
+
+
+def test_photos_upload_queries_do_not_grow_with_photos(app, tmp_path, sql_counter):
+    os.makedirs(os.path.join(app.config['UPLOAD_FOLDER'], 'photos'), exist_ok=True)
+    with app.app_context():
+        seed_exit_logs(0, students=40)
+        ids = [student.id for student in Student.query.filter(Student.id.like('S%'))]
+
+    # La primera carga crea la fila de versión de la caché; se comparan las siguientes
+    counts = []
+    for batch in (ids[:2], ids[2:6], ids[6:]):
+        zip_path = str(tmp_path / 'photos.zip')
+        photos_zip(zip_path, batch)
+        job = Job(str(tmp_path), {'id': '0' * 32})
+        with app.app_context(), sql_counter() as statements:
+            photos_upload(job, zip_path)
+        counts.append(len(statements))
+
+    assert counts[1] == counts[2]
+    with app.app_context():
+        assert Student.query.filter(Student.photo.isnot(None)).count() == 40
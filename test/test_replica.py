@@ -0,0 +1,146 @@
+import shutil
+import pytest
+from sqlalchemy import create_engine, text
+from config import Config
+from app import create_app, db
+from app.models.exit_log import ExitLog
+from app.models.student import Student
+from app.replica import read_replica_state
+from conftest import login, seed_basic_data
+
+
+def make_app(tmp_path, replica_uri):
+    class ReplicaConfig(Config):
+        TESTING = True
+        WTF_CSRF_ENABLED = False
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'primary.db')
+        REPLICA_DATABASE_URI = replica_uri
+        REPLICA_CHECK_SECONDS = 0
+        UPLOAD_FOLDER = str(tmp_path / 'uploads')
+        TEMP_FOLDER = str(tmp_path / 'temp')
+
+    flask_app = create_app(ReplicaConfig)
+    with flask_app.app_context():
+        db.create_all()
+        seed_basic_data()
+        db.engine.dispose()
+    return flask_app
+
+
+@pytest.fixture
+def replica_app(tmp_path):
+    """Principal y réplica en dos archivos SQLite; la réplica es una copia de la principal."""
+    flask_app = make_app(tmp_path, 'sqlite:///' + str(tmp_path / 'replica.db'))
+    shutil.copy(tmp_path / 'primary.db', tmp_path / 'replica.db')
+    yield flask_app
+    with flask_app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+    read_replica_state.dispose()
+
+
+def replica_execute(tmp_path, sql):
+    engine = create_engine('sqlite:///' + str(tmp_path / 'replica.db'))
+    with engine.begin() as conn:
+        conn.execute(text(sql))
+    engine.dispose()
+
+
+def test_report_views_read_from_fresh_replica(replica_app, tmp_path):
+    replica_execute(tmp_path, "INSERT INTO student (id, name, course, authorized_to_leave, qr_code_data, card_version, row_version) "
+                              "VALUES ('2001', 'Solo En Réplica', '7A', 1, 'qr-2001', 1, 1)")
+    client = replica_app.test_client()
+    login(client, 'admin', 'admin')
+
+    response = client.get('/manage/students')
+    assert response.status_code == 200
+    assert 'Solo En Réplica' in response.get_data(as_text=True)
+    assert read_replica_state.stats()['routed'] > 0
+
+    # Las vistas sin el decorador (y la caché del escáner) siguen en la principal
+    response = client.post('/scan/verify', json={'qr_data': 'qr-2001'})
+    assert response.status_code == 404
+
+
+def test_stale_replica_falls_back_and_exits_stay_on_primary(replica_app, tmp_path):
+    client = replica_app.test_client()
+    login(client, 'admin', 'admin')
+    assert client.post('/scan/exit', json={'qr_data': 'qr-1001', 'door_id': 1}).get_json()['success']
+
+    with replica_app.app_context():
+        assert ExitLog.query.count() == 1
+    engine = create_engine('sqlite:///' + str(tmp_path / 'replica.db'))
+    with engine.connect() as conn:
+        assert conn.execute(text('SELECT COUNT(*) FROM exit_log')).scalar() == 0
+    engine.dispose()
+
+    # La réplica no tiene la salida nueva: el dashboard debe leer de la principal
+    data = client.get('/api/dashboard').get_json()
+    assert data['total_exits_today'] == 1
+    stats = read_replica_state.stats()
+    assert stats['fallbacks'] > 0
+    assert stats['healthy'] is False
+
+
+def test_unavailable_replica_falls_back_to_primary(tmp_path):
+    flask_app = make_app(tmp_path, 'sqlite:///' + str(tmp_path / 'missing' / 'replica.db'))
+    client = flask_app.test_client()
+    login(client, 'admin', 'admin')
+
+    response = client.get('/manage/students')
+    assert response.status_code == 200
+    assert 'Ana Rojas' in response.get_data(as_text=True)
+    stats = read_replica_state.stats()
+    assert stats['routed'] == 0
+    assert stats['errors'] == 1
+    read_replica_state.dispose()
+
+
+def test_query_error_on_replica_retries_view_on_primary(replica_app, tmp_path):
+    # La réplica responde a la comprobación de retraso pero le falta la tabla de estudiantes
+    replica_execute(tmp_path, 'DROP TABLE student')
+    client = replica_app.test_client()
+    login(client, 'admin', 'admin')
+
+    response = client.get('/manage/students')
+    assert response.status_code == 200
+    assert 'Luis Pérez' in response.get_data(as_text=True)
+    assert read_replica_state.stats()['errors'] == 1
+
+    # Marcada como caída, las siguientes peticiones no la intentan
+    routed = read_replica_state.stats()['routed']
+    assert client.get('/manage/students').status_code == 200
+    assert read_replica_state.stats()['routed'] == routed
+
+    with replica_app.app_context():
+        assert db.session.get(Student, '1001') is not None
+
+
+def test_lag_probe_uses_primary_key_and_ignores_primary_errors(replica_app, monkeypatch):
+    from sqlalchemy import event
+    from sqlalchemy.exc import OperationalError
+    import app.replica as replica
+
+    statements = []
+
+    def listener(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    with replica_app.app_context():
+        engine = db.engine
+        event.listen(engine, 'before_cursor_execute', listener)
+        try:
+            assert read_replica_state.is_healthy()
+        finally:
+            event.remove(engine, 'before_cursor_execute', listener)
+    # Sin MAX(timestamp): la consulta va por la clave primaria en lugar de recorrer exit_log
+    assert len(statements) == 1
+    assert 'ORDER BY exit_log.id DESC' in statements[0] and 'max(' not in statements[0].lower()
+
+    def primary_down(engine):
+        raise OperationalError('SELECT 1', {}, Exception('principal caída'))
+
+    monkeypatch.setattr(replica, '_last_exit', primary_down)
+    with replica_app.app_context():
+        assert read_replica_state.is_healthy()
+    assert read_replica_state.stats()['errors'] == 0
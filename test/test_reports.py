@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta
+from app import db
+from app.models.exit_log import ExitLog, colombia_tz
+from conftest import authorize_student
+
+
+def test_local_date_is_set_on_every_insert(app, operator_client):
+    """
+    local_date guarda el día de Colombia de cada salida, incluidas las
+    sincronizadas en bloque, sin importar la hora UTC.
+    """
+    operator_client.post('/scan/exit', json={'qr_data': 'qr-1001', 'door_id': 1})
+    authorize_student(app, '1002')
+    late_yesterday = (datetime.now(colombia_tz) - timedelta(days=1)).replace(hour=23, minute=30, tzinfo=None)
+    response = operator_client.post('/scan/sync', json={'exits': [
+        {'client_id': 'a', 'student_id': '1002', 'door_id': 1, 'timestamp': late_yesterday.isoformat()},
+    ]})
+    assert response.get_json()['accepted'] == 1
+
+    with app.app_context():
+        dates = dict(db.session.query(ExitLog.student_id, ExitLog.local_date))
+    assert dates == {'1001': datetime.now(colombia_tz).date(), '1002': late_yesterday.date()}
+
+
+def test_reports_filter_by_local_date(app, admin_client):
+    authorize_student(app, '1002')
+    late_yesterday = (datetime.now(colombia_tz) - timedelta(days=1)).replace(hour=23, minute=30, tzinfo=None)
+    admin_client.post('/scan/sync', json={'exits': [
+        {'client_id': 'a', 'student_id': '1002', 'door_id': 1, 'timestamp': late_yesterday.isoformat()},
+    ]})
+    yesterday = late_yesterday.strftime('%Y-%m-%d')
+    today = datetime.now(colombia_tz).strftime('%Y-%m-%d')
+
+    response = admin_client.get(f'/reports?start_date={yesterday}&end_date={yesterday}')
+    assert 'Luis Pérez' in response.get_data(as_text=True)
+    response = admin_client.get(f'/reports?start_date={today}&end_date={today}')
+    assert 'Luis Pérez' not in response.get_data(as_text=True)
+
+    response = admin_client.get(f'/export/csv?start_date={yesterday}&end_date={yesterday}')
+    assert response.get_data(as_text=True).count('\n') == 2
+
+
+def seed_report_rows(app, count):
+    """Muchas salidas de hoy con empates en todas las columnas ordenables."""
+    from sqlalchemy import insert
+    from app.models.exit_stats import rebuild_exit_stats
+
+    noon = datetime.now(colombia_tz).replace(hour=12, minute=0, second=0, microsecond=0, tzinfo=None)
+    with app.app_context():
+        db.session.execute(insert(ExitLog.__table__), [
+            {'timestamp': noon + timedelta(minutes=i % 7), 'student_id': ('1001', '1002')[i % 2],
+             'door_id': 1 + i % 2, 'operator_id': 1 + i % 2}
+            for i in range(count)
+        ])
+        rebuild_exit_stats()
+        db.session.commit()
+    return noon.strftime('%Y-%m-%d')
+
+
+def test_report_api_keyset_pages_are_stable_for_every_sort(app, admin_client):
+    today = seed_report_rows(app, 250)
+    for sort_by in ('timestamp', 'student', 'course', 'door', 'operator'):
+        for direction in ('asc', 'desc'):
+            seen = []
+            after = ''
+            pages = 0
+            while True:
+                response = admin_client.get(
+                    f'/api/reports?start_date={today}&end_date={today}'
+                    f'&sort_by={sort_by}&direction={direction}&after={after}')
+                data = response.get_json()
+                assert data['total'] == 250
+                seen.extend(row['id'] for row in data['rows'])
+                pages += 1
+                if not data['next_cursor']:
+                    break
+                after = data['next_cursor']
+            assert pages == 3
+            assert sorted(seen) == list(range(1, 251)), (sort_by, direction)
+
+
+def test_reports_page_renders_first_page_only(app, admin_client):
+    today = seed_report_rows(app, 150)
+    html = admin_client.get(f'/reports?start_date={today}&end_date={today}').get_data(as_text=True)
+    assert '100</span> de 150 salidas' in html
+    assert 'Cargar más' in html
+
+    assert admin_client.get('/api/reports?after=@@@').status_code == 400
+    assert admin_client.get('/api/reports?sort_by=password').status_code == 400
+
+
+def test_csv_export_streams_in_chunks_and_gzips(app, admin_client):
+    import gzip
+    today = seed_report_rows(app, 120)
+    app.config['CSV_EXPORT_CHUNK_SIZE'] = 50
+
+    response = admin_client.get(f'/export/csv?start_date={today}&end_date={today}', buffered=False)
+    assert response.is_streamed
+    chunks = list(response.response)
+    # Encabezado + 3 bloques de 50, 50 y 20 filas
+    assert len(chunks) == 4
+    assert chunks[0].startswith(b'Timestamp (Hora Colombia)')
+    response.close()
+
+    response = admin_client.get(f'/export/csv?start_date={today}&end_date={today}',
+                                headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    lines = gzip.decompress(response.get_data()).decode('utf-8').splitlines()
+    assert len(lines) == 121
+    assert lines[1].split(',')[1] in ('1001', '1002')
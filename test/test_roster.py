@@ -0,0 +1,52 @@
+import gzip
+import json
+from app import db
+from app.models.student import Student
+
+
+def test_roster_snapshot_etag_and_gzip(app, operator_client):
+    """
+    La copia del roster es columnar, lleva ETag con la versión y se comprime con gzip.
+    """
+    response = operator_client.get('/scan/roster')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert sorted(data['students']['id']) == ['1001', '1002']
+    assert set(data['students']) == {'id', 'name', 'course', 'photo', 'authorized', 'qr', 'card'}
+
+    etag = response.headers['ETag']
+    response = operator_client.get('/scan/roster', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+
+    with app.app_context():
+        db.session.add_all([
+            Student(id=str(2000 + i), name=f'Estudiante {i}', course='7C', qr_code_data=f'qr-{2000 + i}')
+            for i in range(50)
+        ])
+        db.session.commit()
+    response = operator_client.get('/scan/roster', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert len(json.loads(gzip.decompress(response.data))['students']['id']) == 52
+
+
+def test_roster_delta_reports_changes_and_deletions(app, admin_client):
+    """
+    La respuesta de cambios solo incluye lo modificado o eliminado desde la versión pedida.
+    """
+    version = admin_client.get('/scan/roster').get_json()['version']
+
+    admin_client.post('/manage/student/edit/1001', data={
+        'id': '1001', 'name': 'Ana Sofía Rojas', 'course': '9B', 'authorized_to_leave': 'y'
+    })
+    admin_client.post('/manage/student/delete/1002')
+
+    delta = admin_client.get(f'/scan/roster/delta?since={version}').get_json()
+    assert delta['version'] == version + 2
+    assert delta['students']['id'] == ['1001']
+    assert delta['students']['name'] == ['Ana Sofía Rojas']
+    assert delta['deleted'] == ['1002']
+
+    delta = admin_client.get(f"/scan/roster/delta?since={delta['version']}").get_json()
+    assert delta['students']['id'] == [] and delta['deleted'] == []
+
+    assert admin_client.get('/scan/roster/delta?since=999').status_code == 400
@@ -0,0 +1,128 @@
+from app import db
+from app.models.exit_log import ExitLog
+
+
+def exit_count(app):
+    with app.app_context():
+        return db.session.query(ExitLog).count()
+
+
+def test_verify_then_log(app, operator_client):
+    """
+    El flujo de dos pasos (verify + log) sigue funcionando.
+    """
+    response = operator_client.post('/scan/verify', json={'qr_data': 'qr-1001'})
+    assert response.status_code == 200
+    assert response.get_json()['student']['name'] == 'Ana Rojas'
+
+    response = operator_client.post('/scan/log', json={'student_id': '1001', 'door_id': 1})
+    assert response.status_code == 200
+    assert exit_count(app) == 1
+
+
+def test_scan_exit_single_request(app, operator_client):
+    """
+    /scan/exit verifica y registra en una sola petición y respeta el cooldown.
+    """
+    response = operator_client.post('/scan/exit', json={'qr_data': 'qr-1001', 'door_id': 1})
+    data = response.get_json()
+    assert response.status_code == 200
+    assert data['success'] is True
+    assert data['student']['course'] == '9B'
+    assert exit_count(app) == 1
+
+    response = operator_client.post('/scan/exit', json={'qr_data': 'qr-1001', 'door_id': 1})
+    assert response.status_code == 409
+    assert response.get_json()['student']['id'] == '1001'
+    assert exit_count(app) == 1
+
+
+def test_scan_exit_rejections(app, operator_client):
+    """
+    /scan/exit rechaza estudiantes no autorizados, puertas cerradas y QR desconocidos.
+    """
+    assert operator_client.post('/scan/exit', json={'qr_data': 'qr-1002', 'door_id': 1}).status_code == 403
+    assert operator_client.post('/scan/exit', json={'qr_data': 'qr-1001', 'door_id': 2}).status_code == 400
+    assert operator_client.post('/scan/exit', json={'qr_data': 'desconocido', 'door_id': 1}).status_code == 404
+    assert exit_count(app) == 0
+
+
+def test_cooldown_uses_last_exit_table(app, operator_client):
+    """
+    El cooldown se decide con student_last_exit y respeta EXIT_LOG_COOLDOWN_MINUTES.
+    """
+    from datetime import datetime, timedelta
+    from app.models.exit_log import StudentLastExit, colombia_tz
+
+    assert operator_client.post('/scan/log', json={'student_id': '1001', 'door_id': 1}).status_code == 200
+    assert operator_client.post('/scan/log', json={'student_id': '1001', 'door_id': 1}).status_code == 409
+
+    with app.app_context():
+        last_exit = db.session.get(StudentLastExit, '1001')
+        cooldown = app.config['EXIT_LOG_COOLDOWN_MINUTES']
+        last_exit.timestamp = (datetime.now(colombia_tz) - timedelta(minutes=cooldown + 1)).replace(tzinfo=None)
+        db.session.commit()
+
+    assert operator_client.post('/scan/log', json={'student_id': '1001', 'door_id': 1}).status_code == 200
+    assert exit_count(app) == 2
+
+
+def test_sync_offline_exits(app, operator_client):
+    """
+    /scan/sync aplica el cooldown contra salidas guardadas y del mismo lote,
+    las mismas reglas de /scan/exit y devuelve un resultado por elemento.
+    """
+    from datetime import datetime, timedelta
+    from app.models.exit_log import StudentLastExit, colombia_tz
+    from app.models.student import Student
+
+    with app.app_context():
+        db.session.add(Student(id='1003', name='Sara Gómez', course='8A', authorized_to_leave=True,
+                               qr_code_data='qr-1003'))
+        db.session.commit()
+    assert operator_client.post('/scan/log', json={'student_id': '1001', 'door_id': 1}).status_code == 200
+    with app.app_context():
+        stored_exit = db.session.get(StudentLastExit, '1001').timestamp
+
+    earlier = (stored_exit - timedelta(days=1)).isoformat()
+    yesterday = (datetime.now(colombia_tz) - timedelta(days=1)).strftime('%Y-%m-%d')
+    exits = [
+        {'client_id': 'a', 'student_id': '1003', 'door_id': 1, 'timestamp': f'{yesterday}T12:00:00-05:00'},
+        {'client_id': 'b', 'student_id': '1003', 'door_id': 1, 'timestamp': f'{yesterday}T12:10:00-05:00'},
+        {'client_id': 'c', 'student_id': '1003', 'door_id': 1, 'timestamp': f'{yesterday}T15:00:00-05:00'},
+        {'client_id': 'd', 'student_id': '1001', 'door_id': 1, 'timestamp': stored_exit.isoformat()},
+        {'client_id': 'e', 'student_id': '1001', 'door_id': 1, 'timestamp': earlier},
+        {'client_id': 'f', 'student_id': '9999', 'door_id': 1, 'timestamp': f'{yesterday}T12:00:00-05:00'},
+        {'client_id': 'g', 'student_id': '1001', 'door_id': 1, 'timestamp': '2999-01-01T00:00:00Z'},
+        # No autorizado, puerta cerrada y fuera de SCAN_SYNC_MAX_AGE_HOURS
+        {'client_id': 'h', 'student_id': '1002', 'door_id': 1, 'timestamp': f'{yesterday}T12:00:00-05:00'},
+        {'client_id': 'i', 'student_id': '1003', 'door_id': 2, 'timestamp': f'{yesterday}T09:00:00-05:00'},
+        {'client_id': 'j', 'student_id': '1003', 'door_id': 1, 'timestamp': (stored_exit - timedelta(days=10)).isoformat()},
+    ]
+    response = operator_client.post('/scan/sync', json={'exits': exits})
+    data = response.get_json()
+    assert response.status_code == 200
+    statuses = {result['client_id']: result['status'] for result in data['results']}
+    assert statuses == {'a': 'ok', 'b': 'duplicate', 'c': 'ok', 'd': 'duplicate', 'e': 'ok',
+                        'f': 'error', 'g': 'error', 'h': 'error', 'i': 'error', 'j': 'error'}
+    assert data['accepted'] == 3
+    assert exit_count(app) == 4
+
+    with app.app_context():
+        # La salida sincronizada de 1003 queda como su última salida; la de 1001 no retrocede.
+        assert db.session.get(StudentLastExit, '1003').timestamp.hour == 15
+        assert db.session.get(StudentLastExit, '1001').timestamp == stored_exit
+
+
+def test_scanner_endpoints_reject_non_object_bodies(operator_client):
+    for body in ([1], 'qr-1001', 5):
+        for url in ('/scan/verify', '/scan/log', '/scan/exit'):
+            response = operator_client.post(url, json=body)
+            assert response.status_code == 400, (url, body)
+            assert response.get_json()['success'] is False
+
+
+def test_sync_rejects_a_bare_list(operator_client):
+    response = operator_client.post('/scan/sync', json=[{'client_id': 'a', 'student_id': '1001', 'door_id': 1}])
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
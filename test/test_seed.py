@@ -0,0 +1,51 @@
+from collections import Counter
+from sqlalchemy import func, select
+from app import db
+from app.models.exit_log import ExitLog
+from app.models.exit_stats import ExitStats
+from app.models.student import Student
+from conftest import create_test_app, close_test_app
+
+SEED_ARGS = ['admin', 'seed', '--students', '200', '--exits', '3000', '--doors', '3', '--operators', '2',
+             '--days', '20', '--end-date', '2026-10-16', '--batch-size', '700']
+
+
+def seeded_rows(tmp_path, seed='42'):
+    app = create_test_app(tmp_path)
+    try:
+        result = app.test_cli_runner().invoke(args=SEED_ARGS + ['--seed', seed])
+        assert 'Se generaron 200 estudiantes y 3000 salidas' in result.output
+        with app.app_context():
+            return db.session.execute(
+                select(ExitLog.timestamp, ExitLog.student_id, ExitLog.door_id, ExitLog.operator_id, Student.qr_code_data)
+                .join(Student).order_by(ExitLog.id)
+            ).all()
+    finally:
+        close_test_app(app)
+
+
+def test_seed_is_deterministic(tmp_path_factory):
+    first = seeded_rows(tmp_path_factory.mktemp('a'))
+    assert first == seeded_rows(tmp_path_factory.mktemp('b'))
+    assert first != seeded_rows(tmp_path_factory.mktemp('c'), seed='7')
+
+
+def test_seed_generates_consistent_school_day_data(app):
+    runner = app.test_cli_runner()
+    runner.invoke(args=SEED_ARGS)
+    with app.app_context():
+        assert Student.query.filter(Student.id.like('SIM%')).count() == 200
+        timestamps = [row.timestamp for row in ExitLog.query]
+        assert len(timestamps) == 3000
+        assert db.session.execute(select(func.sum(ExitStats.count))).scalar() == 3000
+        assert all(timestamp.weekday() < 5 for timestamp in timestamps)
+        assert max(timestamps).date().isoformat() == '2026-10-16'
+        # La hora pico de salida concentra la mayoría de registros
+        hours = Counter(timestamp.hour for timestamp in timestamps)
+        assert hours[14] + hours[15] > len(timestamps) / 2
+        # Ningún estudiante sale dos veces el mismo día si hay estudiantes suficientes
+        per_day = Counter((row.student_id, row.local_date) for row in ExitLog.query)
+        assert max(per_day.values()) == 1
+
+    result = runner.invoke(args=SEED_ARGS)
+    assert 'ya tiene datos sembrados' in result.output
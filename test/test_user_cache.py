@@ -0,0 +1,38 @@
+from app import db
+from app.models.user import User, UserRole
+
+
+def test_warm_scanner_requests_skip_user_query(app, operator_client, sql_counter):
+    """
+    Con las cachés calientes, /scan/verify no ejecuta ninguna consulta (antes: SELECT de user + QR).
+    """
+    operator_client.post('/scan/verify', json={'qr_data': 'qr-1001'})
+    with sql_counter() as statements:
+        response = operator_client.post('/scan/verify', json={'qr_data': 'qr-1001'})
+    assert response.status_code == 200
+    assert statements == []
+
+
+def test_role_change_invalidates_user_cache(app, admin_client):
+    """
+    Un cambio de rol se refleja en la siguiente petición aunque el usuario esté en caché.
+    """
+    assert admin_client.get('/manage/stats').status_code == 200
+    with app.app_context():
+        admin = User.query.filter_by(username='admin').first()
+        admin.role = UserRole.OPERATOR
+        db.session.commit()
+
+    response = admin_client.get('/manage/stats')
+    assert response.status_code == 302
+
+
+def test_reset_password_command(app):
+    """
+    El comando admin reset-password cambia la contraseña.
+    """
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['admin', 'reset-password', 'operador'], input='nueva\nnueva\n')
+    assert 'actualizada' in result.output
+    with app.app_context():
+        assert User.query.filter_by(username='operador').first().check_password('nueva')